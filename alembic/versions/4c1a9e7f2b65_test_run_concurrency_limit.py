@@ -0,0 +1,25 @@
+"""test run concurrency limit
+
+Revision ID: 4c1a9e7f2b65
+Revises: 7d2e4b1c9a30
+
+"""
+from alembic import op
+from sqlalchemy import Column, Integer
+
+# revision identifiers, used by Alembic.
+
+revision = "4c1a9e7f2b65"
+down_revision = "7d2e4b1c9a30"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Live limit of test requests in flight, when concurrency is adapted to the target
+    op.add_column("test_run", Column("concurrency_limit", Integer))
+
+
+def downgrade():
+    with op.batch_alter_table("test_run") as batch_op:
+        batch_op.drop_column("concurrency_limit")
@@ -0,0 +1,51 @@
+"""test queue sequence
+
+Revision ID: 7d2e4b1c9a30
+Revises: 09b34a6c797a
+
+"""
+from alembic import op
+from sqlalchemy import Column, Integer, String, TIMESTAMP, JSON, PrimaryKeyConstraint
+
+# revision identifiers, used by Alembic.
+
+revision = "7d2e4b1c9a30"
+down_revision = "09b34a6c797a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tests are only in the test queue while a test run is in progress,
+    # test runs in progress are generated again after the upgrade.
+    op.drop_table("test_queue")
+    op.create_table(
+        "test_queue",
+        Column("test_run_id", Integer, nullable=False),
+        Column("sequence", Integer, nullable=False),
+        Column("test_hash", String(255)),
+        Column("test", JSON),
+        Column("create_date", TIMESTAMP),
+        PrimaryKeyConstraint("test_run_id", "sequence"),
+    )
+    op.create_index("idx_test_queue_create_date", "test_queue", ["create_date"])
+
+
+def downgrade():
+    op.drop_table("test_queue")
+    op.create_table(
+        "test_queue",
+        Column(
+            "id", String(45)
+        ),  # UUID in case of duplicate test_run_id + test_hash combinations
+        Column("test_run_id", Integer),
+        Column("test_hash", String(255)),
+        Column("test", JSON),
+        Column("create_date", TIMESTAMP),
+    )
+    op.create_index(
+        "idx_test_queue_test_run_id_test_hash",
+        "test_queue",
+        ["id", "test_run_id", "test_hash"],
+    )
+    op.create_index("idx_test_queue_create_date", "test_queue", ["create_date"])
@@ -0,0 +1,25 @@
+"""test result retries
+
+Revision ID: 9e3b5d7a1c42
+Revises: 4c1a9e7f2b65
+
+"""
+from alembic import op
+from sqlalchemy import Column, Integer
+
+# revision identifiers, used by Alembic.
+
+revision = "9e3b5d7a1c42"
+down_revision = "4c1a9e7f2b65"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Times the test request was retried before the result
+    op.add_column("test_result", Column("retries", Integer))
+
+
+def downgrade():
+    with op.batch_alter_table("test_result") as batch_op:
+        batch_op.drop_column("retries")
@@ -0,0 +1,34 @@
+"""test result request hash test run index
+
+Revision ID: a3f6c8e2d514
+Revises: e7c1a4d9f352
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+
+revision = "a3f6c8e2d514"
+down_revision = "e7c1a4d9f352"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The previous response hash of a request hash is only looked up in the previous test run to the same
+    # endpoint and the current one, so the test run is part of the index as well
+    op.drop_index("idx_test_result_request_hash_create_date", "test_result")
+    op.create_index(
+        "idx_test_result_request_hash_test_run_id",
+        "test_result",
+        ["request_hash", "test_run_id", "create_date", "response_hash"],
+    )
+
+
+def downgrade():
+    op.drop_index("idx_test_result_request_hash_test_run_id", "test_result")
+    op.create_index(
+        "idx_test_result_request_hash_create_date",
+        "test_result",
+        ["request_hash", "create_date", "response_hash"],
+    )
@@ -0,0 +1,25 @@
+"""test run circuit state
+
+Revision ID: b8f4c2e6d013
+Revises: 9e3b5d7a1c42
+
+"""
+from alembic import op
+from sqlalchemy import Column, String
+
+# revision identifiers, used by Alembic.
+
+revision = "b8f4c2e6d013"
+down_revision = "9e3b5d7a1c42"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # State of the circuit breaker to the target, when test requests pause while the target is down
+    op.add_column("test_run", Column("circuit_state", String(45)))
+
+
+def downgrade():
+    with op.batch_alter_table("test_run") as batch_op:
+        batch_op.drop_column("circuit_state")
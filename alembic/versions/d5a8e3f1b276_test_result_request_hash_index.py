@@ -0,0 +1,28 @@
+"""test result request hash index
+
+Revision ID: d5a8e3f1b276
+Revises: b8f4c2e6d013
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+
+revision = "d5a8e3f1b276"
+down_revision = "b8f4c2e6d013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Covers the previous response hash of a request hash for the Regression validator,
+    # and loading the latest response hash of every request hash when a test run starts
+    op.create_index(
+        "idx_test_result_request_hash_create_date",
+        "test_result",
+        ["request_hash", "create_date", "response_hash"],
+    )
+
+
+def downgrade():
+    op.drop_index("idx_test_result_request_hash_create_date", "test_result")
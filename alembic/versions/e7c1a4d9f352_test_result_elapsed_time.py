@@ -0,0 +1,25 @@
+"""test result elapsed time
+
+Revision ID: e7c1a4d9f352
+Revises: d5a8e3f1b276
+
+"""
+from alembic import op
+from sqlalchemy import Column, Float
+
+# revision identifiers, used by Alembic.
+
+revision = "e7c1a4d9f352"
+down_revision = "d5a8e3f1b276"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Seconds until the response was received, the latency baseline of later test runs is built from it
+    op.add_column("test_result", Column("response_elapsed_time", Float))
+
+
+def downgrade():
+    with op.batch_alter_table("test_result") as batch_op:
+        batch_op.drop_column("response_elapsed_time")
@@ -0,0 +1,93 @@
+# The async consumer against a target that answers 429 once more than target_capacity requests are in flight,
+# with a fixed concurrency and with adaptive concurrency.
+# Results are not persisted, only the test requests are compared.
+# Run from the project root: python -m benchmarks.adaptive_concurrency
+import asyncio
+import logging
+import threading
+import time
+from queue import Queue
+from threading import Event
+from unittest.mock import patch
+
+from aiohttp import web
+
+from src.mutator import async_consumer
+from src.mutator.generator.test import Test
+from src.mutator.runner.adaptive_concurrency import AdaptiveConcurrency
+
+test_count = 2000
+target_capacity = 20
+target_latency_seconds = 0.05
+port = 18098
+in_flight = 0
+throttled = 0
+
+
+async def limited_response(request: web.Request) -> web.Response:
+    global in_flight, throttled
+    if in_flight >= target_capacity:
+        throttled += 1
+        return web.json_response({"ok": False}, status=429)
+    in_flight += 1
+    try:
+        await asyncio.sleep(target_latency_seconds)
+    finally:
+        in_flight -= 1
+    return web.json_response({"ok": True})
+
+
+def start_target():
+    loop = asyncio.new_event_loop()
+    app = web.Application()
+    app.router.add_post("/{tail:.*}", limited_response)
+    runner = web.AppRunner(app, access_log=None)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+
+def fill_queue() -> Queue:
+    worker_queue = Queue()
+    for i in range(test_count):
+        test = Test()
+        test.test_run_id = 1
+        test.test_value = str(i)
+        test.test_type = "REPLACE_BODY_VALUE"
+        test.test_hash = str(i)
+        test.method = "POST"
+        test.headers = {"Content-Type": "application/json"}
+        test.url = f"http://127.0.0.1:{port}/{i}"
+        test.body = {"value": i}
+        worker_queue.put(test)
+    worker_queue.put(None)
+    return worker_queue
+
+
+def main():
+    global throttled
+    logging.getLogger().setLevel(logging.CRITICAL)
+    start_target()
+    max_limit = async_consumer.async_concurrency
+    with patch.object(async_consumer, "process_test_result") as process_test_result:
+        for name, concurrency in [
+            (f"fixed {max_limit} at once", None),
+            (f"adaptive up to {max_limit}", AdaptiveConcurrency(max_limit)),
+        ]:
+            throttled = 0
+            process_test_result.reset_mock()
+            stop_threads = Event()
+            started = time.perf_counter()
+            async_consumer.async_consumer(
+                fill_queue(), 1, {}, stop_threads, None, None, concurrency
+            )
+            seconds = time.perf_counter() - started
+            limit = concurrency.get_limit() if concurrency else max_limit
+            print(
+                f"{name}: {process_test_result.call_count} of {test_count} tests "
+                f"in {seconds:.2f}s, {throttled} 429 responses, final limit {limit}"
+            )
+
+
+if __name__ == "__main__":
+    main()
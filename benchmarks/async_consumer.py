@@ -0,0 +1,95 @@
+# Test requests per second against a slow target, for consumer threads and the async consumer.
+# Results are not persisted, only the test requests are compared.
+# Run from the project root: python -m benchmarks.async_consumer
+import asyncio
+import logging
+import threading
+import time
+from queue import Queue
+from threading import Event
+from unittest.mock import patch
+
+from aiohttp import web
+
+from src.mutator import async_consumer, consumer
+from src.mutator.generator.test import Test
+
+test_count = 2000
+target_latency_seconds = 0.1
+consumer_threads = 5
+port = 18099
+
+
+async def slow_response(request: web.Request) -> web.Response:
+    await asyncio.sleep(target_latency_seconds)
+    return web.json_response({"ok": True})
+
+
+def start_target():
+    loop = asyncio.new_event_loop()
+    app = web.Application()
+    app.router.add_post("/{tail:.*}", slow_response)
+    runner = web.AppRunner(app, access_log=None)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+
+def fill_queue(consumers: int) -> Queue:
+    worker_queue = Queue()
+    for i in range(test_count):
+        test = Test()
+        test.test_run_id = 1
+        test.test_value = str(i)
+        test.test_type = "REPLACE_BODY_VALUE"
+        test.test_hash = str(i)
+        test.method = "POST"
+        test.headers = {"Content-Type": "application/json"}
+        test.url = f"http://127.0.0.1:{port}/{i}"
+        test.body = {"value": i}
+        worker_queue.put(test)
+    for _ in range(consumers):
+        worker_queue.put(None)
+    return worker_queue
+
+
+def run_threads():
+    worker_queue = fill_queue(consumer_threads)
+    stop_threads = Event()
+    threads = [
+        threading.Thread(
+            target=consumer.consumer, args=(worker_queue, 1, {}, stop_threads, None)
+        )
+        for _ in range(consumer_threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_async():
+    async_consumer.async_consumer(fill_queue(1), 1, {}, Event(), None)
+
+
+def main():
+    logging.getLogger().setLevel(logging.WARNING)
+    start_target()
+    with patch.object(consumer, "process_test_result"), patch.object(
+        async_consumer, "process_test_result"
+    ):
+        for name, run in [
+            (f"{consumer_threads} consumer threads", run_threads),
+            (f"async consumer, {async_consumer.async_concurrency} at once", run_async),
+        ]:
+            started = time.perf_counter()
+            run()
+            seconds = time.perf_counter() - started
+            print(
+                f"{name}: {test_count} tests in {seconds:.2f}s, "
+                f"{test_count / seconds:.0f} tests per second"
+            )
+
+
+if __name__ == "__main__":
+    main()
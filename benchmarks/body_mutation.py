@@ -0,0 +1,57 @@
+# Compares the previous remap based body mutations against the path indexed engine.
+# Run from the project root: python -m benchmarks.body_mutation
+import timeit
+
+from boltons.iterutils import remap
+
+from src.mutator.generator import body_mutation
+
+
+def build_body(width: int, depth: int):
+    if depth == 0:
+        return {f"field_{i}": i for i in range(width)}
+    return {
+        f"nested_{i}": [build_body(width, depth - 1), f"value_{i}"]
+        for i in range(width)
+    }
+
+
+# Previous implementation: full remap walk with a subtree comparison at every node
+def remap_replace_body_value(d, keyset, test_value):
+    def visit(path, key, value):
+        if (
+            path == keyset.get("path")
+            and key == keyset.get("key")
+            and value == keyset.get("value")
+        ):
+            return key, test_value
+        return key, value
+
+    return remap(d, visit=visit)
+
+
+def run_remap(body, keysets):
+    for keyset in keysets:
+        remap_replace_body_value(body, keyset, "test")
+
+
+def run_path_index(body, keysets):
+    for keyset in keysets:
+        body_mutation.replace_value(body, keyset["path"], keyset["key"], "test")
+
+
+def main():
+    for width, depth in [(6, 2), (8, 2), (6, 3)]:
+        body = build_body(width, depth)
+        keysets = body_mutation.index_body(body)
+        remap_seconds = timeit.timeit(lambda: run_remap(body, keysets), number=1)
+        path_seconds = timeit.timeit(lambda: run_path_index(body, keysets), number=1)
+        print(
+            f"{len(keysets)} nodes: remap {remap_seconds:.3f}s, "
+            f"path index {path_seconds:.3f}s, "
+            f"speedup {remap_seconds / path_seconds:.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
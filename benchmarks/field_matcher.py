@@ -0,0 +1,60 @@
+# Time to extract the response fields used for the Regression response hash, per response,
+# with boltons remap and the field matcher lambdas as before, and with the compiled field matchers.
+# Run from the project root: python -m benchmarks.field_matcher
+import timeit
+
+from boltons.iterutils import remap
+
+from src.mutator.runner.field_matcher import build_field_matcher
+from src.mutator.runner.hash_strategy import HashStrategy
+
+field_names = ["id", "create_date", "update_date", "version", "etag", "trace"]
+
+
+def build_body(width: int, depth: int):
+    if depth == 0:
+        return {
+            "id": width,
+            "create_date": "2222-10-24T00:00:00",
+            **{f"field_{i}": f"value of field {i}" for i in range(width)},
+        }
+    return {f"nested_{i}": [build_body(width, depth - 1), i] for i in range(width)} | {
+        "update_date": "2222-10-24T00:00:00"
+    }
+
+
+def build_lambda(strategy: HashStrategy):
+    # The field matchers before they were compiled
+    if strategy == HashStrategy.INCLUDE_EXACT_MATCH:
+        field_names_set = set(field_names)
+        return lambda p, k, v: k in field_names_set
+    elif strategy == HashStrategy.EXCLUDE_EXACT_MATCH:
+        field_names_set = set(field_names)
+        return lambda p, k, v: k not in field_names_set
+    return lambda p, k, v: not any(field_name in str(k) for field_name in field_names)
+
+
+def main():
+    for width, depth in [(10, 1), (10, 2), (20, 2)]:
+        body = build_body(width, depth)
+        for strategy in [
+            HashStrategy.EXCLUDE_EXACT_MATCH,
+            HashStrategy.EXCLUDE_PARTIAL_MATCH,
+        ]:
+            visit = build_lambda(strategy)
+            field_matcher = build_field_matcher(
+                {"field_names": field_names, "strategy": strategy.name}
+            )
+            assert remap(body, visit=visit) == field_matcher.extract(body)
+            number = 200
+            before = timeit.timeit(lambda: remap(body, visit=visit), number=number)
+            after = timeit.timeit(lambda: field_matcher.extract(body), number=number)
+            print(
+                f"{len(str(body)):>7} byte body, {strategy.name:<21}: "
+                f"remap {before / number * 1_000_000:8.1f}us, "
+                f"compiled {after / number * 1_000_000:7.1f}us, {before / after:4.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
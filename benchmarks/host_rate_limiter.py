@@ -0,0 +1,106 @@
+# Requests per second seen by one target host, with six worker processes of consumer threads testing it at once,
+# without and with the shared host rate limiter.
+# Results are not persisted, only the test requests are compared.
+# Run from the project root: python -m benchmarks.host_rate_limiter
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from queue import Queue
+from threading import Event
+from unittest.mock import patch
+
+from aiohttp import web
+
+from src.mutator import consumer
+from src.mutator.generator.test import Test
+from src.mutator.runner.host_rate_limiter import HostRateLimiter, use_host_rate_limiter
+
+worker_processes = 6
+consumer_threads = 5
+tests_per_worker = 40
+requests_per_second = 20
+port = 18097
+received = []
+
+
+async def count_request(request: web.Request) -> web.Response:
+    received.append(time.perf_counter())
+    return web.json_response({"ok": True})
+
+
+def start_target():
+    loop = asyncio.new_event_loop()
+    app = web.Application()
+    app.router.add_post("/{tail:.*}", count_request)
+    runner = web.AppRunner(app, access_log=None)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+
+def run_worker(host_rate_limiter: HostRateLimiter):
+    logging.getLogger().setLevel(logging.ERROR)
+    use_host_rate_limiter(host_rate_limiter)
+    worker_queue = Queue()
+    for i in range(tests_per_worker):
+        test = Test()
+        test.test_run_id = 1
+        test.test_value = str(i)
+        test.test_type = "REPLACE_BODY_VALUE"
+        test.test_hash = str(i)
+        test.method = "POST"
+        test.headers = {"Content-Type": "application/json"}
+        test.url = f"http://127.0.0.1:{port}/{i}"
+        test.body = {"value": i}
+        worker_queue.put(test)
+    for _ in range(consumer_threads):
+        worker_queue.put(None)
+    stop_threads = Event()
+    with patch.object(consumer, "process_test_result"):
+        threads = [
+            threading.Thread(
+                target=consumer.consumer,
+                args=(worker_queue, 1, {}, stop_threads, None),
+            )
+            for _ in range(consumer_threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+def main():
+    logging.getLogger().setLevel(logging.ERROR)
+    start_target()
+    for name, host_rate_limiter in [
+        ("no host limit", None),
+        (
+            f"host limit of {requests_per_second} per second",
+            HostRateLimiter(requests_per_second=requests_per_second, burst=1),
+        ),
+    ]:
+        received.clear()
+        workers = [
+            multiprocessing.Process(target=run_worker, args=(host_rate_limiter,))
+            for _ in range(worker_processes)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        seconds = received[-1] - received[0]
+        busiest_second = max(
+            sum(1 for other in received if received_at <= other < received_at + 1)
+            for received_at in received
+        )
+        print(
+            f"{name}: {len(received)} requests from {worker_processes} workers in {seconds:.2f}s, "
+            f"{(len(received) - 1) / seconds:.1f} per second, at most {busiest_second} in one second"
+        )
+
+
+if __name__ == "__main__":
+    main()
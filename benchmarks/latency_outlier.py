@@ -0,0 +1,85 @@
+# Time per result and memory of the latency baseline of a test run for a growing amount of results,
+# keeping every latency in order against counting them in a latency sketch, and of the whole LatencyOutlier validator.
+# Run from the project root: python -m benchmarks.latency_outlier
+import bisect
+import random
+import sys
+import time
+
+from src.common.test_result.test_result import TestResult
+from src.mutator.common.utils.latency_sketch import LatencySketch
+from src.mutator.result_processor.validations.latency_outlier import (
+    LatencyBaseline,
+    LatencyOutlier,
+)
+from src.mutator.runner.response.generic_response import GenericResponse
+
+result_counts = [1000, 10000, 100000]
+config = {"quantile": 0.99, "factor": 3, "min_samples": 100, "min_elapsed_time": 0.05}
+
+
+def create_test_results(count: int):
+    rng = random.Random(1)
+    test_results = []
+    for _ in range(count):
+        test_result = TestResult()
+        response = GenericResponse()
+        response.elapsed_time = rng.lognormvariate(-2, 1)
+        test_result.response = response
+        test_results.append(test_result)
+    return test_results
+
+
+def run_sorted_latencies(test_results) -> int:
+    # Every latency is kept in order, the quantile is read from its position
+    latencies = []
+    for test_result in test_results:
+        elapsed_time = test_result.response.elapsed_time
+        if len(latencies) >= config["min_samples"]:
+            quantile = latencies[int(config["quantile"] * (len(latencies) - 1))]
+            _ = elapsed_time > config["factor"] * quantile
+        bisect.insort(latencies, elapsed_time)
+    return sys.getsizeof(latencies) + len(latencies) * sys.getsizeof(0.1)
+
+
+def run_latency_sketch(test_results) -> int:
+    sketch = LatencySketch()
+    for test_result in test_results:
+        elapsed_time = test_result.response.elapsed_time
+        if sketch.count >= config["min_samples"]:
+            _ = elapsed_time > config["factor"] * sketch.quantile(config["quantile"])
+        sketch.add(elapsed_time)
+    return sys.getsizeof(sketch.buckets) + sum(
+        sys.getsizeof(count) for count in sketch.buckets
+    )
+
+
+def run_latency_outlier(test_results) -> int:
+    baseline = LatencyBaseline()
+    latency_outlier = LatencyOutlier(config, baseline)
+    for test_result in test_results:
+        latency_outlier.validate(test_result)
+    return sys.getsizeof(baseline.live.buckets) + sum(
+        sys.getsizeof(count) for count in baseline.live.buckets
+    )
+
+
+def main():
+    for result_count in result_counts:
+        test_results = create_test_results(result_count)
+        for name, run in [
+            ("sorted latencies", run_sorted_latencies),
+            ("latency sketch", run_latency_sketch),
+            ("LatencyOutlier validator", run_latency_outlier),
+        ]:
+            started = time.perf_counter()
+            size = run(test_results)
+            seconds = time.perf_counter() - started
+            print(
+                f"{name}, {result_count} results: {seconds / result_count * 1e6:.1f} µs per result, "
+                f"about {size / 1024:.0f} KiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Test generation throughput for an increasing amount of generator processes.
+# Run from the project root: python -m benchmarks.parallel_generation
+import os
+import pathlib
+import timeit
+from unittest.mock import patch
+
+from src.common.database.test_run import TestRun
+from src.mutator.common.test_value_storage.test_repository import (
+    TestRepository,
+    TestValueChunk,
+)
+from src.mutator.generator import generator
+
+# The bundled test values repeated, to stand in for a large wordlist
+bundled_test_repository = TestRepository(
+    pathlib.Path(os.path.abspath(__file__)).parents[1].__str__()
+    + "/src/mutator/config",
+    "/test_config.json",
+)
+test_repository = TestValueChunk(list(bundled_test_repository.get_test_value()) * 40)
+
+
+class CountingQueue:
+    def __init__(self):
+        self.count = 0
+
+    def put(self, queue_item):
+        self.count += 1
+
+
+def build_test_run() -> TestRun:
+    test_run = TestRun()
+    test_run.id = 1
+    test_run.endpoint = {
+        "method": "POST",
+        "headers": {"Content-Type": "application/json"},
+        "url": "http://localhost:8010/v1/results/1?query=parameter&queryArray=1,2,3",
+        "body": {
+            f"nested_{i}": [{f"field_{j}": j for j in range(6)}, f"value_{i}"]
+            for i in range(6)
+        },
+    }
+    return test_run
+
+
+def main():
+    test_run = build_test_run()
+    process_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    serial_seconds = None
+    for processes in process_counts:
+        queue = CountingQueue()
+        with patch.object(generator, "generator_processes", processes):
+            seconds = timeit.timeit(
+                lambda: generator.generate(test_repository, test_run, queue), number=1
+            )
+        serial_seconds = serial_seconds or seconds
+        print(
+            f"{processes} processes: {queue.count} tests in {seconds:.2f}s, "
+            f"{queue.count / seconds:.0f} tests/second, "
+            f"speedup {serial_seconds / seconds:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
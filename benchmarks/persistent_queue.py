@@ -0,0 +1,59 @@
+# Cost of popping and acking a batch of tests for different test queue sizes.
+# Run from the project root: python -m benchmarks.persistent_queue
+import os
+import tempfile
+import timeit
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from src.mutator.common.utils.persistent_queue.dao.queue_item import QueueItem
+from src.mutator.common.utils.persistent_queue.persistent_queue import PersistentQueue
+
+batch_size = 100
+batches = 50
+
+
+def fill_queue(engine, test_run_id: int, size: int):
+    create_date = datetime.utcnow()
+    with engine.begin() as connection:
+        for start in range(0, size, 10000):
+            connection.execute(
+                insert(QueueItem.__table__),
+                [
+                    {
+                        "test_run_id": test_run_id,
+                        "sequence": sequence,
+                        "test_hash": str(sequence),
+                        "test": {"test_value": "1"},
+                        "create_date": create_date,
+                    }
+                    for sequence in range(start + 1, min(start + 10000, size) + 1)
+                ],
+            )
+
+
+def pop_and_ack(persistent_queue: PersistentQueue):
+    persistent_queue.ack(persistent_queue.pop(batch_size))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'queue.db')}")
+        QueueItem.__table__.create(engine)
+        session = scoped_session(sessionmaker(bind=engine))
+        for test_run_id, size in enumerate([10_000, 100_000, 1_000_000], start=1):
+            fill_queue(engine, test_run_id, size)
+            persistent_queue = PersistentQueue(test_run_id, session)
+            seconds = timeit.timeit(
+                lambda: pop_and_ack(persistent_queue), number=batches
+            )
+            print(
+                f"{size} queued tests: {seconds / batches * 1000:.2f}ms "
+                f"per pop and ack of {batch_size} tests"
+            )
+
+
+if __name__ == "__main__":
+    main()
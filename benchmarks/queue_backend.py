@@ -0,0 +1,98 @@
+# Result commit latency on the sqlite database while tests are written to the test queue,
+# for the test_queue table and the segment file queue backends.
+# Run from the project root: python -m benchmarks.queue_backend
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from src.mutator.common.utils.persistent_queue.dao.queue_item import QueueItem
+from src.mutator.common.utils.persistent_queue.persistent_queue import PersistentQueue
+from src.mutator.common.utils.persistent_queue.segment_file_queue import (
+    SegmentFileQueue,
+)
+
+test_count = 20_000
+# A consumer persists a result every few milliseconds, while waiting on test requests
+result_interval_seconds = 0.005
+batch_size = 100
+
+
+def create_queue_items(start: int):
+    queue_items = []
+    for i in range(start, start + batch_size):
+        queue_item = QueueItem()
+        queue_item.test_run_id = 1
+        queue_item.test_hash = str(i)
+        queue_item.test = {"test_hash": str(i), "url": f"http://localhost/{i}"}
+        queue_items.append(queue_item)
+    return queue_items
+
+
+def commit_results(engine, stop: threading.Event, latencies: list):
+    # Stands in for the consumers persisting test results
+    while not stop.is_set():
+        started = time.perf_counter()
+        with engine.begin() as connection:
+            connection.execute(text("insert into result (value) values ('result')"))
+        latencies.append(time.perf_counter() - started)
+        time.sleep(result_interval_seconds)
+
+
+def run(directory: str, backend: str):
+    engine = create_engine(
+        f"sqlite:///{os.path.join(directory, backend + '.db')}",
+        connect_args={"timeout": 15},
+    )
+
+    # Same as the mutator database
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):  # noqa
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+    QueueItem.__table__.create(engine)
+    with engine.begin() as connection:
+        connection.execute(text("create table result (value text)"))
+    if backend == "sql":
+        queue = PersistentQueue(1, scoped_session(sessionmaker(bind=engine)))
+    else:
+        queue = SegmentFileQueue(1, os.path.join(directory, "test_queue"))
+
+    stop = threading.Event()
+    latencies = []
+    result_thread = threading.Thread(
+        target=commit_results, args=(engine, stop, latencies)
+    )
+    result_thread.start()
+    started = time.perf_counter()
+    for start in range(0, test_count, batch_size):
+        queue.push_batch(create_queue_items(start))
+    while queue.size():
+        queue.ack(queue.pop(batch_size))
+    seconds = time.perf_counter() - started
+    stop.set()
+    result_thread.join()
+
+    latencies.sort()
+    print(
+        f"{backend}: queued and read {test_count} tests in {seconds:.2f}s, "
+        f"{len(latencies)} result commits, "
+        f"p50 {latencies[len(latencies) // 2] * 1000:.2f}ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f}ms, "
+        f"max {latencies[-1] * 1000:.2f}ms"
+    )
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in ["sql", "segment_file"]:
+            run(directory, backend)
+
+
+if __name__ == "__main__":
+    main()
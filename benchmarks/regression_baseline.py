@@ -0,0 +1,115 @@
+# Time for the Regression validator to find the previous response hash of every test of a test run,
+# with a query per result against the test_result table without and with the request hash index,
+# and with the response hashes of the previous test run to the same endpoint loaded once per test run.
+# Run from the project root: python -m benchmarks.regression_baseline
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+
+from src.common.database.database_base import Base
+from src.common.database.result import Result
+from src.common.database.test_run import TestRun
+from src.common.state.states import State
+from src.manager.services.test_run.dao import test_result_dao
+from src.mutator.result_processor.validations.regression import (
+    load_regression_baseline,
+)
+
+previous_runs = 5
+test_count = 40000
+# Without the index every query scans the table, so only this many are timed
+unindexed_lookups = 200
+endpoint = {"url": "http://localhost/items", "method": "POST"}
+
+
+def fill_database(engine) -> None:
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        # The previous test runs and the test run that is starting
+        session.add_all(
+            [
+                TestRun(endpoint=endpoint, state=State.COMPLETED.value)
+                for _ in range(previous_runs)
+            ]
+            + [TestRun(endpoint=endpoint, state=State.RUNNING.value)]
+        )
+        session.flush()
+        for run in range(previous_runs):
+            session.execute(
+                insert(Result),
+                [
+                    {
+                        "test_run_id": run + 1,
+                        "request_hash": f"{i:040x}",
+                        "response_hash": f"2:{(i + run) % 100:064x}",
+                        "response_body": {"id": i, "name": "item"},
+                        "create_date": datetime(2024, 1, 1) + timedelta(days=run),
+                    }
+                    for i in range(test_count)
+                ],
+            )
+        session.commit()
+
+
+def create_index(engine) -> None:
+    # The index of alembic revision a3f6c8e2d514
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE INDEX idx_test_result_request_hash_test_run_id "
+                "ON test_result (request_hash, test_run_id, create_date, response_hash)"
+            )
+        )
+
+
+def query_per_result(engine, lookups: int = test_count) -> int:
+    found = 0
+    with Session(engine) as session:
+        for i in range(lookups):
+            if test_result_dao.get_previous_response_hash(
+                f"{i:040x}", [previous_runs, previous_runs + 1], session
+            ):
+                found += 1
+    return found
+
+
+def load_baseline(engine) -> int:
+    with Session(engine) as session:
+        test_run = session.get(TestRun, previous_runs + 1)
+        baseline = load_regression_baseline(test_run, session)
+    return sum(
+        1
+        for i in range(test_count)
+        if baseline.get_previous_response_hash(f"{i:040x}") is not None
+    )
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/benchmark.db")
+        fill_database(engine)
+        runs = [
+            (
+                "query per result, no index",
+                lambda: query_per_result(engine, unindexed_lookups),
+            ),
+            ("query per result, request hash index", lambda: query_per_result(engine)),
+            ("baseline loaded once per test run", lambda: load_baseline(engine)),
+        ]
+        for name, run in runs:
+            if name == runs[1][0]:
+                create_index(engine)
+            started = time.perf_counter()
+            found = run()
+            seconds = time.perf_counter() - started
+            print(
+                f"{name}: {found} previous response hashes in {seconds:.2f}s, "
+                f"{seconds / found * 1e6:.1f}us per result"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Test generation time for each test hash version.
+# Run from the project root: python -m benchmarks.request_hash
+import os
+import pathlib
+import timeit
+
+from src.common.database.test_run import TestRun
+from src.mutator.common.test_value_storage.test_repository import TestRepository
+from src.mutator.generator import generator
+
+test_repository = TestRepository(
+    pathlib.Path(os.path.abspath(__file__)).parents[1].__str__()
+    + "/src/mutator/config",
+    "/test_config.json",
+)
+
+
+class CountingQueue:
+    def __init__(self):
+        self.count = 0
+
+    def put(self, queue_item):
+        self.count += 1
+
+
+def build_body(width: int, depth: int):
+    if depth == 0:
+        return {f"field_{i}": i for i in range(width)}
+    return {
+        f"nested_{i}": [build_body(width, depth - 1), f"value_{i}"]
+        for i in range(width)
+    }
+
+
+def main():
+    for width, depth in [(6, 1), (6, 2), (8, 2)]:
+        test_run = TestRun()
+        test_run.id = 1
+        test_run.endpoint = {
+            "method": "POST",
+            "headers": {"Content-Type": "application/json"},
+            "url": "http://localhost:8010/v1/results?query=parameter",
+            "body": build_body(width, depth),
+        }
+        timings = []
+        for version in (1, 2):
+            test_run.config = {"test_hash_version": version}
+            queue = CountingQueue()
+            seconds = timeit.timeit(
+                lambda: generator.generate(test_repository, test_run, queue), number=1
+            )
+            timings.append(f"version {version} {seconds:.2f}s")
+        print(f"{queue.count} tests: {', '.join(timings)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Peak memory and time to read a response body, whole as before, and in chunks with the body cap.
+# The body is read from memory, only the handling of the body is compared.
+# Run from the project root: python -m benchmarks.response_body
+import time
+import tracemalloc
+
+from src.mutator.common.utils.hash import hash_object
+from src.mutator.runner.response.response_body import (
+    ResponseBody,
+    response_body_max_bytes,
+    response_chunk_bytes,
+)
+
+body_sizes = [10_000, 1_000_000, 20_000_000]
+
+
+def read_whole(body: bytes):
+    # Same as before: the whole text is kept, stringified again and hashed
+    text = body.decode("utf-8", errors="replace")
+    response_body = {"raw_response": str(text)}
+    return hash_object(response_body)
+
+
+def read_chunked(body: bytes):
+    response_body = ResponseBody()
+    view = memoryview(body)
+    for start in range(0, len(body), response_chunk_bytes):
+        response_body.feed(bytes(view[start : start + response_chunk_bytes]))
+    response_body.build_body("text/plain")
+    return response_body.get_hash()
+
+
+def measure(read, body: bytes):
+    tracemalloc.start()
+    started = time.perf_counter()
+    read(body)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    print(f"Body cap: {response_body_max_bytes} bytes")
+    for body_size in body_sizes:
+        body = b"Traceback (most recent call last):\n" * (body_size // 35)
+        for name, read in [("whole", read_whole), ("chunked", read_chunked)]:
+            seconds, peak = measure(read, body)
+            print(
+                f"{len(body):>10} byte body, {name:>7}: {seconds * 1000:8.2f}ms, peak memory {peak / 1_000_000:8.2f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
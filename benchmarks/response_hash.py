@@ -0,0 +1,61 @@
+# Time to create a response hash with each response hash version, for typical response sizes.
+# Version 1 is timed as it ran before version 2 was added, with the response formatted for debug logging
+# even when debug logging is off.
+# Run from the project root: python -m benchmarks.response_hash
+import hashlib
+import logging
+import timeit
+
+from src.mutator.common.utils.hash import hash_response
+
+logging.getLogger().setLevel(logging.INFO)
+
+
+def build_body(width: int, depth: int, number=int):
+    if depth == 0:
+        return {
+            f"field_{i}": number(i) if i % 4 == 0 else f"value of field {i}"
+            for i in range(width)
+        }
+    return {
+        f"nested_{i}": [build_body(width, depth - 1, number), True, None]
+        for i in range(width)
+    }
+
+
+def hash_version_1_before(response):
+    logging.debug(f"creating response hash for response_json:{response}")
+    logging.debug(f"Creating hash for: {response}")
+    return hashlib.sha1(response.__str__().encode("UTF-8")).hexdigest()  # nosec
+
+
+def main():
+    # Numbers written as floats, e.g. 4.0, are normalized by version 2
+    for width, depth, number_type in [
+        (10, 0, int),
+        (10, 1, int),
+        (10, 2, int),
+        (10, 3, int),
+        (10, 2, float),
+    ]:
+        response = {
+            "url": "http://localhost:8080/path",
+            "body": build_body(width, depth, number_type),
+            "status_code": 200,
+        }
+        size = len(str(response))
+        number = max(10, 2_000_000 // size)
+        timings = {
+            "version 1 before": lambda: hash_version_1_before(response),
+            "version 1": lambda: hash_response(response, 1),
+            "version 2": lambda: hash_response(response, 2),
+        }
+        results = ", ".join(
+            f"{name} {timeit.timeit(timing, number=number) / number * 1_000_000:.1f}us"
+            for name, timing in timings.items()
+        )
+        print(f"{size:>8} byte response with {number_type.__name__}s: {results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# Results persisted per second to a sqlite database in WAL mode, one commit per result from consumer threads
+# as before the result writer, against the result writer's batched commits.
+# Run from the project root: python -m benchmarks.result_writer
+import os
+import tempfile
+import threading
+import time
+from typing import List
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from src.common.database.database_base import Base
+from src.common.database.test_run import TestRun  # noqa, for the foreign key of results
+from src.common.database.validation_result import ValidationResult
+from src.common.test_result.test_result import TestResult
+from src.mutator.result_processor.service import result_processor_service
+from src.mutator.result_processor.service.result_writer import ResultWriter
+from src.mutator.runner.request.generic_request import GenericRequest
+from src.mutator.runner.response.generic_response import GenericResponse
+
+result_count = 2000
+consumer_threads = 5
+
+
+def create_test_result(sequence: int) -> TestResult:
+    test_result = TestResult()
+    test_result.test_run_id = None
+    test_result.test_type = "REPLACE_BODY_VALUE"
+    test_result.test_value = str(sequence)
+    test_result.retries = 0
+    request = GenericRequest()
+    request.hash = str(sequence)
+    request.method = "POST"
+    request.headers = {"Content-Type": "application/json"}
+    request.url = f"http://localhost:8080/v1/items/{sequence}"
+    request.body = {"id": sequence, "name": "item", "tags": ["a", "b", "c"]}
+    test_result.request = request
+    response = GenericResponse()
+    response.hash = "2:" + "0" * 40
+    response.headers = {"Content-Type": "application/json"}
+    response.body = {"id": sequence, "name": "item", "created": "2024-01-01"}
+    response.status_code = 200
+    test_result.response = response
+    validation = ValidationResult()
+    validation.type = "StatusCode"
+    validation.passed = True
+    validation.message = "Passed"
+    test_result.validations = [validation]
+    return test_result
+
+
+def create_database(directory: str):
+    engine = create_engine(
+        f"sqlite:///{directory}/benchmark.db", connect_args={"timeout": 15}
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):  # noqa
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    return scoped_session(sessionmaker(bind=engine))
+
+
+def run_commit_per_result(db_session, test_results: List[TestResult]):
+    def persist(thread_test_results: List[TestResult]):
+        for test_result in thread_test_results:
+            with db_session() as session:
+                result_processor_service.persist_test_result(test_result, session)
+
+    threads = [
+        threading.Thread(target=persist, args=(test_results[i::consumer_threads],))
+        for i in range(consumer_threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_result_writer(db_session, test_results: List[TestResult]):
+    result_writer = ResultWriter(db_session)
+    result_writer_thread = threading.Thread(target=result_writer.write_results)
+    result_writer_thread.start()
+
+    def hand_over(thread_test_results: List[TestResult]):
+        for test_result in thread_test_results:
+            result_writer.put(test_result)
+
+    threads = [
+        threading.Thread(target=hand_over, args=(test_results[i::consumer_threads],))
+        for i in range(consumer_threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result_writer.close()
+    result_writer_thread.join()
+
+
+def main():
+    for name, run in [
+        (f"commit per result, {consumer_threads} threads", run_commit_per_result),
+        ("result writer", run_result_writer),
+    ]:
+        with tempfile.TemporaryDirectory() as directory:
+            db_session = create_database(directory)
+            test_results = [create_test_result(i) for i in range(result_count)]
+            started = time.perf_counter()
+            run(db_session, test_results)
+            seconds = time.perf_counter() - started
+            print(
+                f"{name}: {result_count} results in {seconds:.2f}s, "
+                f"{result_count / seconds:.0f} results per second"
+            )
+            db_session.remove()
+            os.sync()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Test requests per second for consumer threads, against a target that answers one in every throttle_every first
+# requests with a 429 and a Retry-After of retry_after_seconds.
+# Results are not persisted, only the test requests are compared.
+# Run from the project root: python -m benchmarks.retry_queue
+import asyncio
+import logging
+import threading
+import time
+from queue import Queue
+from threading import Event
+from unittest.mock import patch
+
+from aiohttp import web
+
+from src.mutator import consumer
+from src.mutator.generator.test import Test
+from src.mutator.runner.retry_queue import RetryQueue
+
+test_count = 500
+throttle_every = 10
+retry_after_seconds = 1
+target_latency_seconds = 0.02
+consumer_threads = 5
+port = 18096
+requested_paths = set()
+throttled = 0
+
+
+async def throttling_response(request: web.Request) -> web.Response:
+    global throttled
+    await asyncio.sleep(target_latency_seconds)
+    path = request.path
+    first_request = path not in requested_paths
+    requested_paths.add(path)
+    if first_request and int(path.strip("/")) % throttle_every == 0:
+        throttled += 1
+        return web.json_response(
+            {"ok": False}, status=429, headers={"Retry-After": str(retry_after_seconds)}
+        )
+    return web.json_response({"ok": True})
+
+
+def start_target():
+    loop = asyncio.new_event_loop()
+    app = web.Application()
+    app.router.add_post("/{tail:.*}", throttling_response)
+    runner = web.AppRunner(app, access_log=None)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+
+def fill_queue() -> Queue:
+    worker_queue = Queue()
+    for i in range(test_count):
+        test = Test()
+        test.test_run_id = 1
+        test.test_value = str(i)
+        test.test_type = "REPLACE_BODY_VALUE"
+        test.test_hash = str(i)
+        test.method = "POST"
+        test.headers = {"Content-Type": "application/json"}
+        test.url = f"http://127.0.0.1:{port}/{i}"
+        test.body = {"value": i}
+        worker_queue.put(test)
+    for _ in range(consumer_threads):
+        worker_queue.put(None)
+    return worker_queue
+
+
+def main():
+    logging.getLogger().setLevel(logging.ERROR)
+    start_target()
+    worker_queue = fill_queue()
+    stop_threads = Event()
+    retry_queue = RetryQueue()
+    with patch.object(consumer, "process_test_result") as process_test_result:
+        threads = [
+            threading.Thread(
+                target=consumer.consumer,
+                args=(worker_queue, 5, {}, stop_threads, None),
+                kwargs={"retry_queue": retry_queue},
+            )
+            for _ in range(consumer_threads)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - started
+    print(
+        f"{consumer_threads} consumer threads: {process_test_result.call_count} of {test_count} tests "
+        f"in {seconds:.2f}s with {throttled} 429 responses, {test_count / seconds:.0f} tests per second"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Time to scan a response for an increasing amount of match strings, with a `in str(body)` check per match string
+# as the single match_string was checked before, and with the compiled StringMatch validator.
+# Run from the project root: python -m benchmarks.string_match
+import json
+import random
+import string
+import timeit
+
+from src.common.test_result.test_result import TestResult
+from src.mutator.result_processor.validations.string_match import StringMatch
+from src.mutator.runner.response.generic_response import GenericResponse
+
+number = 20
+random.seed(1)
+body = {
+    "items": [
+        {"id": i, "name": f"item {i}", "description": "lorem ipsum dolor " * 4}
+        for i in range(1000)
+    ]
+}
+
+
+def create_match_strings(count: int):
+    signatures = [
+        "Traceback (most recent call last)",
+        "SQLSTATE[",
+        "ORA-",
+        "java.lang.NullPointerException",
+        "internal.example.corp",
+    ]
+    while len(signatures) < count:
+        signatures.append(
+            "".join(random.choices(string.ascii_letters + string.digits, k=12))
+        )
+    return signatures[:count]
+
+
+def main():
+    test_result = TestResult()
+    response = GenericResponse()
+    response.body = body
+    response.raw_body = json.dumps(body).encode()
+    test_result.response = response
+    print(f"response body of {len(response.raw_body)} bytes")
+
+    for count in [1, 10, 100, 500, 2000, 5000]:
+        match_strings = create_match_strings(count)
+        string_match = StringMatch({"match_strings": match_strings})
+
+        def check_each():
+            text = str(test_result.response.body)
+            return [s for s in match_strings if s in text]
+
+        before = timeit.timeit(check_each, number=number) / number
+        after = (
+            timeit.timeit(lambda: string_match.validate(test_result), number=number)
+            / number
+        )
+        print(
+            f"{count} match strings: {before * 1000:.2f}ms checking each, "
+            f"{after * 1000:.2f}ms compiled"
+        )
+
+
+if __name__ == "__main__":
+    main()
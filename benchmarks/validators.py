@@ -0,0 +1,52 @@
+# Validation time per result, building the validators of a test run for every result as before,
+# against building them once per test run and validating every result with them.
+# Run from the project root: python -m benchmarks.validators
+import timeit
+
+from src.common.test_result.test_result import TestResult
+from src.mutator.result_processor.service import result_processor_service
+from src.mutator.runner.response.generic_response import GenericResponse
+
+number = 20000
+validation_config = {
+    "StatusCode": {"enabled": True, "invalid_status_codes": [401, 403, 418]},
+    "StringMatch": {"enabled": True, "match_string": "Traceback"},
+    "ElapsedTime": {"enabled": True, "max_elapsed_time": 2},
+    "Regression": {"enabled": False},
+    "LatencyOutlier": {"enabled": False},
+}
+
+
+def create_test_result() -> TestResult:
+    test_result = TestResult()
+    response = GenericResponse()
+    response.status_code = 200
+    response.body = {"id": 1, "name": "item"}
+    response.elapsed_time = 0.1
+    test_result.response = response
+    return test_result
+
+
+def main():
+    test_result = create_test_result()
+    validators = result_processor_service.build_validators(validation_config)
+
+    def build_per_result():
+        result_processor_service.validate_test_result(
+            test_result, result_processor_service.build_validators(validation_config)
+        )
+
+    def build_once():
+        result_processor_service.validate_test_result(test_result, validators)
+
+    before = timeit.timeit(build_per_result, number=number)
+    after = timeit.timeit(build_once, number=number)
+    print(
+        f"validators built per result: {before / number * 1e6:.1f}us per result\n"
+        f"validators built per test run: {after / number * 1e6:.1f}us per result, "
+        f"{before / after:.1f}x faster"
+    )
+
+
+if __name__ == "__main__":
+    main()
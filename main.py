@@ -5,6 +5,7 @@ import threading
 from queue import Queue
 
 from src.manager.app import app
+from src.mutator.runner.host_rate_limiter import host_rate_limiter
 from src.mutator.worker_loop import start_worker_loop
 
 use_processes = os.getenv("USE_PROCESSES", False)
@@ -21,12 +22,14 @@ def get_queue():
 def get_workers(worker_count, queue):
     if use_processes:
         return [
-            multiprocessing.Process(target=start_worker_loop, args=(queue,))
-            for _ in range(background_worker_count)
+            multiprocessing.Process(
+                target=start_worker_loop, args=(queue, host_rate_limiter)
+            )
+            for _ in range(worker_count)
         ]
     else:
         return [
-            threading.Thread(target=start_worker_loop, args=(queue,))
+            threading.Thread(target=start_worker_loop, args=(queue, host_rate_limiter))
             for _ in range(worker_count)
         ]
 
@@ -39,17 +42,19 @@ def start_workers(workers):
         worker.start()
 
 
-queue = get_queue()
+# Generator processes import this module again as __mp_main__, they must not start workers
+if __name__ != "__mp_main__":
+    queue = get_queue()
 
-# Start mutator
-# Use worker per CPU core else cap workers at 6
-cpu_count = os.cpu_count()
-background_worker_count = cpu_count if cpu_count < 6 else 6
-workers = get_workers(background_worker_count, queue)
-start_workers(workers)
+    # Start mutator
+    # Use worker per CPU core else cap workers at 6
+    cpu_count = os.cpu_count()
+    background_worker_count = cpu_count if cpu_count < 6 else 6
+    workers = get_workers(background_worker_count, queue)
+    start_workers(workers)
 
-# Start manager
-app.config["test_run_notification_queue"] = queue
+    # Start manager
+    app.config["test_run_notification_queue"] = queue
 
 if __name__ == "__main__":
     host = os.getenv("HOST", "127.0.0.1")
@@ -1,4 +1,13 @@
-from sqlalchemy import Column, Integer, String, TIMESTAMP, Boolean, ForeignKey, JSON
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    TIMESTAMP,
+    Boolean,
+    ForeignKey,
+    JSON,
+    Float,
+)
 from sqlalchemy.orm import relationship
 
 from src.common.database.database_base import Base
@@ -22,5 +31,7 @@ class Result(Base):
     response_headers = Column(JSON)
     response_body = Column(JSON)
     response_status_code = Column(Integer)
+    response_elapsed_time = Column(Float)
+    retries = Column(Integer)
     validations = relationship(ValidationResult, uselist=True, lazy="selectin")
     create_date = Column(TIMESTAMP)
@@ -14,6 +14,8 @@ class TestRun(Base):
     passed = Column(Boolean)
     test_generated_count = Column(Integer)
     test_result_count = Column(Integer)
+    concurrency_limit = Column(Integer)
+    circuit_state = Column(String(45))
     owner = Column(String(255))
     run_attempts = Column(Integer)
     lock_start_date = Column(TIMESTAMP)
@@ -13,4 +13,6 @@ class TestConfiguration:
     test_value: str
     test_count = None
     test_run_id = None
+    test_hash_version = None
+    request_fingerprint = None
     test_repository: TestRepository
@@ -13,3 +13,5 @@ class TestResult:
     request = GenericRequest
     response = GenericResponse
     validations: List = field(default_factory=lambda: [])
+    # Times the test request was retried before this result
+    retries: int = 0
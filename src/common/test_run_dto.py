@@ -15,6 +15,8 @@ class TestRunDto(Schema):
     passed = fields.Boolean(allow_none=True)
     test_generated_count = fields.Integer(allow_none=True)
     test_result_count = fields.Integer(allow_none=True)
+    concurrency_limit = fields.Integer(allow_none=True)
+    circuit_state = fields.String(allow_none=True)
     run_attempts = fields.Integer(allow_none=True)
     create_date = fields.DateTime()
     last_update_date = fields.DateTime()
@@ -22,6 +22,9 @@ from src.manager.services.test_run.service.test_result_service import (
     get_tests,
     get_specific_test,
 )
+from src.manager.services.test_run.service.test_run_preview_service import (
+    preview_test_run,
+)
 from src.manager.services.test_run.service.test_run_service import (
     create_test_run,
     get_test_run_external,
@@ -47,6 +50,9 @@ from src.manager.services.test_run.validation.get_test_run_result.test_result_pa
 from src.manager.services.test_run.validation.get_test_run_result.test_result_test_schema import (
     TestResultTestSchema,
 )
+from src.manager.services.test_run.validation.preview_test_run.test_run_preview_parameter_schema import (
+    TestRunPreviewParameterSchema,
+)
 
 log_file_path = (
     pathlib.Path(path.abspath(__file__)).parents[1].__str__()
@@ -142,6 +148,13 @@ def create_new_test_run_batch() -> Any:
     )
 
 
+@app.post(f"/{latest_api_version}/testruns/preview")
+@validate_request_body(CreateTestRunSchema())
+@validate_request_params(TestRunPreviewParameterSchema())
+def preview_new_test_run() -> Any:
+    return jsonify(preview_test_run(g.validated_request))
+
+
 @app.delete(f"/{latest_api_version}/testruns/<test_run_id>")
 @validate_request_path(TestRunIdSchema())
 def cancel_selected_test_run(test_run_id: int) -> Any:  # noqa
@@ -1,5 +1,5 @@
 import logging
-from typing import Union, Dict
+from typing import Union, Dict, List, Set, Iterator, Tuple
 
 from sqlalchemy import text
 from sqlalchemy.orm import Session
@@ -70,20 +70,66 @@ def get_single_test(test_data: Dict, session: Session):
     return query.first()
 
 
-def get_previous_response_hash(request_hash: str, session: Session) -> Union[str, None]:
+def get_previous_response_hash(
+    request_hash: str, test_run_ids: List[int], session: Session
+) -> Union[str, None]:
     logging.debug(f"Getting result for {request_hash} from Database.")
-    result: Result = (
-        session.query(Result)
-        .filter(Result.request_hash == request_hash)
+    # The latest response hash of the request in any of test_run_ids.
+    # Only the response hash, so the lookup is covered by the request hash index
+    row = (
+        session.query(Result.response_hash)
+        .filter(
+            Result.request_hash == request_hash, Result.test_run_id.in_(test_run_ids)
+        )
         .order_by(Result.create_date.desc())
         .first()
     )
-    if result is not None:
-        return result.response_hash
+    if row is not None:
+        return row.response_hash
     else:
         return None
 
 
+def get_response_hashes(
+    test_run_id: int, chunk_size: int, session: Session
+) -> Iterator[Tuple[str, str]]:
+    # The request hash and response hash of every result of a test run, in the order they were created,
+    # so the last response hash of a request hash is its latest. Read chunk_size rows at a time.
+    rows = (
+        session.query(Result.request_hash, Result.response_hash)
+        .filter(Result.test_run_id == test_run_id, Result.request_hash.is_not(None))
+        .order_by(Result.id)
+        .yield_per(chunk_size)
+    )
+    for row in rows:
+        yield row.request_hash, row.response_hash
+
+
+def get_elapsed_times(
+    test_run_id: int, chunk_size: int, session: Session
+) -> Iterator[float]:
+    # The elapsed time of every result of a test run, read chunk_size rows at a time
+    rows = (
+        session.query(Result.response_elapsed_time)
+        .filter(
+            Result.test_run_id == test_run_id,
+            Result.response_elapsed_time.is_not(None),
+        )
+        .yield_per(chunk_size)
+    )
+    for row in rows:
+        yield row.response_elapsed_time
+
+
+def get_request_hashes(test_run_id: int, session: Session) -> Set[str]:
+    rows = (
+        session.query(Result.request_hash)
+        .filter(Result.test_run_id == test_run_id)
+        .distinct()
+    )
+    return {row.request_hash for row in rows}
+
+
 def delete_all_tests(test_run_id: int, session: Session):
     validation_sql = "delete from validation where test_result_id in (select id from test_result where test_run_id = :test_run_id);"
     session.execute(text(validation_sql), {"test_run_id": test_run_id})
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from sqlalchemy import or_
 from sqlalchemy.orm import Session
@@ -47,6 +47,12 @@ def update_test_run(test_run_incoming: TestRun, session: Session) -> bool:
     if test_run_incoming.test_result_count is not None:
         test_run_update["test_result_count"] = test_run_incoming.test_result_count
 
+    if test_run_incoming.concurrency_limit is not None:
+        test_run_update["concurrency_limit"] = test_run_incoming.concurrency_limit
+
+    if test_run_incoming.circuit_state is not None:
+        test_run_update["circuit_state"] = test_run_incoming.circuit_state
+
     if test_run_incoming.run_attempts is not None:
         test_run_update["run_attempts"] = test_run_incoming.run_attempts
 
@@ -66,6 +72,27 @@ def get_single_test_run(test_run_id: int, session: Session) -> TestRun:
     return session.query(TestRun).filter(TestRun.id == test_run_id).first()
 
 
+def get_previous_test_run(
+    test_run: TestRun, max_test_runs: int, session: Session
+) -> Optional[TestRun]:
+    # The latest completed test run before this one to the same endpoint, out of the max_test_runs
+    # completed ones before it. Failed and cancelled test runs may only have some of their results.
+    endpoint = test_run.endpoint or {}
+    previous_test_runs = (
+        session.query(TestRun)
+        .filter(TestRun.id < test_run.id, TestRun.state == State.COMPLETED.value)
+        .order_by(TestRun.id.desc())
+        .limit(max_test_runs)
+    )
+    for previous_test_run in previous_test_runs:
+        previous_endpoint = previous_test_run.endpoint or {}
+        if previous_endpoint.get("url") == endpoint.get(
+            "url"
+        ) and previous_endpoint.get("method") == endpoint.get("method"):
+            return previous_test_run
+    return None
+
+
 def get_unprocessed_test_run(session: Session) -> [TestRun, None]:
     valid_states = [State.PENDING.value, State.GENERATING.value, State.RUNNING.value]
 
@@ -24,7 +24,9 @@ class TestResultsDto:
                 "headers": test_result.response_headers,
                 "body": test_result.response_body,
                 "status_code": test_result.response_status_code,
+                "elapsed_time": test_result.response_elapsed_time,
             },
+            "retries": test_result.retries,
             "validations": [
                 {
                     "type": validation.type,
@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Set
 
 from sqlalchemy.orm import Session
 
@@ -27,5 +27,9 @@ def get_specific_test(test_data: Dict, session: Session) -> Dict:
     return response
 
 
+def get_tested_request_hashes(test_run_id: int, session: Session) -> Set[str]:
+    return test_result_dao.get_request_hashes(test_run_id, session)
+
+
 def delete_all_tests(test_run_id: int, session: Session):
     test_result_dao.delete_all_tests(test_run_id, session)
@@ -0,0 +1,55 @@
+import logging
+import pathlib
+from os import path
+from queue import Queue
+from typing import Dict, List
+
+from src.common.database.test_run import TestRun
+from src.mutator.common.test_value_storage.test_repository import (
+    TestRepository,
+    TestRepositorySample,
+)
+from src.mutator.generator import generator
+
+# The preview uses the same test repository as the mutator workers
+test_repository_config_dir = (
+    pathlib.Path(path.abspath(__file__)).parents[4].__str__() + "/mutator/config"
+)
+test_repository = TestRepository(test_repository_config_dir, "/test_config.json")
+
+
+def preview_test_run(test_run_incoming: Dict) -> Dict:
+    test_run = TestRun()
+    test_run.endpoint = test_run_incoming.get("endpoint")
+    test_run.config = test_run_incoming.get("config")
+
+    test_count: int = generator.count(test_repository, test_run)
+    sample_size = test_run_incoming.get("sample_size")
+    tests: List[Dict] = get_sample_tests(
+        test_run, 10 if sample_size is None else sample_size
+    )
+    logging.debug(f"Previewed test run with {test_count} tests.")
+    return {"test_count": test_count, "tests": tests}
+
+
+def get_sample_tests(test_run: TestRun, sample_size: int) -> List[Dict]:
+    if sample_size == 0:
+        return []
+
+    # Only generate tests for the first test value of each test type,
+    # then pick tests spread out over all test types and test locations.
+    # Always generated in the web server's own process, never in a pool of generator processes.
+    queue = Queue()
+    generator.generate(
+        TestRepositorySample(test_repository), test_run, queue, processes=1
+    )
+    generated_tests: List[Dict] = []
+    while not queue.empty():
+        generated_tests.append(queue.get().test)
+
+    if len(generated_tests) <= sample_size:
+        return generated_tests
+    return [
+        generated_tests[i * len(generated_tests) // sample_size]
+        for i in range(sample_size)
+    ]
@@ -1,5 +1,11 @@
-from marshmallow import Schema, fields
+from marshmallow import Schema, fields, validate
 
 
 class ConfigSchema(Schema):
     validation = fields.Dict()
+    streaming = fields.Boolean(required=False, allow_none=True)
+    adaptive_concurrency = fields.Boolean(required=False, allow_none=True)
+    circuit_breaker = fields.Boolean(required=False, allow_none=True)
+    test_hash_version = fields.Integer(
+        required=False, allow_none=True, validate=validate.OneOf([1, 2])
+    )
@@ -0,0 +1,8 @@
+from marshmallow import Schema, fields
+from marshmallow.validate import Range
+
+
+class TestRunPreviewParameterSchema(Schema):
+    sample_size = fields.Integer(
+        required=False, allow_none=True, validate=Range(min=0, max=50)
+    )
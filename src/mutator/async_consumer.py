@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import os
+import pathlib
+import threading
+from configparser import ConfigParser
+from functools import partial
+from queue import Queue, Empty
+from time import monotonic
+from typing import Callable, List, Optional, Set, Tuple
+
+import aiohttp
+from sqlalchemy.orm.scoping import ScopedSession
+
+from src.common.test_result.test_result import TestResult
+from src.mutator.common.utils.persistent_queue.ack_tracker import AckTracker
+from src.mutator.consumer import build_field_matcher, process_test_result
+from src.mutator.generator.test import Test
+from src.mutator.result_processor.service import result_processor_service
+from src.mutator.result_processor.service.result_processor_service import (
+    TestRunValidators,
+)
+from src.mutator.result_processor.service.result_writer import ResultWriter
+from src.mutator.result_processor.validations.latency_outlier import LatencyBaseline
+from src.mutator.result_processor.validations.regression import RegressionBaseline
+from src.mutator.runner import async_test_runner
+from src.mutator.runner.adaptive_concurrency import AdaptiveConcurrency
+from src.mutator.runner.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    is_open,
+)
+from src.mutator.runner.retry_queue import RetryableRequestError, next_retry_delay
+
+config = ConfigParser()
+config.read(
+    pathlib.Path(os.path.abspath(__file__)).parents[0].__str__() + "/config/config.ini"
+)
+
+async_concurrency: int = config.getint("consumer", "async_concurrency")
+async_result_processors: int = config.getint("consumer", "async_result_processors")
+
+# Test, its result, and the callback that lets the event loop start another test
+ResultItem = Tuple[Test, TestResult, Callable[[], None]]
+
+
+# Runs up to async_concurrency test requests at once on one event loop.
+# Results are handed to async_result_processors threads to validate and persist,
+# so the event loop never waits on the database.
+# A test only stops counting towards async_concurrency once its result is processed.
+# A test that is waiting to be retried does not count towards it.
+def async_consumer(
+    test_queue: Queue,
+    consumer_worker_queue_blocking_seconds,
+    new_validation_config,
+    stop_threads: threading.Event,
+    db_session: ScopedSession,
+    ack_tracker: AckTracker = None,
+    concurrency: AdaptiveConcurrency = None,
+    circuit_breaker: CircuitBreaker = None,
+    result_writer: ResultWriter = None,
+    regression_baseline: RegressionBaseline = None,
+    latency_baseline: LatencyBaseline = None,
+):
+    logging.debug("Async consumer: Pulling tests from worker queue.")
+    regression_config = new_validation_config.get("Regression")
+    if regression_config:
+        field_matcher = build_field_matcher(regression_config)
+    else:
+        field_matcher = None
+    validators = result_processor_service.build_validators(
+        new_validation_config, regression_baseline, latency_baseline
+    )
+
+    result_queue: Queue = Queue()
+    result_processors: List[threading.Thread] = [
+        threading.Thread(
+            target=process_results,
+            args=(
+                result_queue,
+                validators,
+                db_session,
+                ack_tracker,
+                result_writer,
+            ),
+        )
+        for _ in range(async_result_processors)
+    ]
+    for result_processor in result_processors:
+        result_processor.start()
+
+    try:
+        test_run_counter = asyncio.run(
+            run_tests(
+                test_queue,
+                consumer_worker_queue_blocking_seconds,
+                field_matcher,
+                result_queue,
+                stop_threads,
+                concurrency,
+                circuit_breaker,
+            )
+        )
+        logging.info(f"Async Consumer Stats. Tests ran: {test_run_counter}.")
+    except Exception as e:
+        logging.exception(
+            f"General Exception in async consumer. Exiting consumer and stopping test run: {e}"
+        )
+    finally:
+        for _ in result_processors:
+            result_queue.put(None)
+        for result_processor in result_processors:
+            result_processor.join()
+        if not stop_threads.is_set():
+            stop_threads.set()
+
+
+async def run_tests(
+    test_queue: Queue,
+    consumer_worker_queue_blocking_seconds,
+    field_matcher,
+    result_queue: Queue,
+    stop_threads: threading.Event,
+    concurrency: AdaptiveConcurrency = None,
+    circuit_breaker: CircuitBreaker = None,
+) -> int:
+    loop = asyncio.get_running_loop()
+    # Tests in flight and waiting on the result processors
+    slots = asyncio.Semaphore(async_concurrency)
+    # Set whenever a test request finishes, for the adaptive concurrency limit
+    request_done = asyncio.Event()
+    tasks: Set[asyncio.Task] = set()
+    test_run_counter = 0
+
+    connector = aiohttp.TCPConnector(limit=async_concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        while not stop_threads.is_set():
+            await slots.acquire()
+            test: Optional[Test] = await loop.run_in_executor(
+                None,
+                get_test,
+                test_queue,
+                consumer_worker_queue_blocking_seconds,
+                circuit_breaker,
+            )
+            if test is None or stop_threads.is_set():
+                slots.release()
+                break
+            if concurrency is not None:
+                await acquire_concurrency(concurrency, request_done)
+            test_run_counter += 1
+            task = asyncio.create_task(
+                run_test(
+                    test,
+                    field_matcher,
+                    session,
+                    result_queue,
+                    slots,
+                    stop_threads,
+                    concurrency,
+                    request_done,
+                    circuit_breaker,
+                )
+            )
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        await asyncio.gather(*tasks)
+        # Wait for the result processors to finish with every result
+        for _ in range(async_concurrency):
+            await slots.acquire()
+    return test_run_counter
+
+
+async def run_test(
+    test: Test,
+    field_matcher,
+    session: aiohttp.ClientSession,
+    result_queue: Queue,
+    slots: asyncio.Semaphore,
+    stop_threads: threading.Event,
+    concurrency: AdaptiveConcurrency,
+    request_done: asyncio.Event,
+    circuit_breaker: CircuitBreaker = None,
+) -> None:
+    release = partial(asyncio.get_running_loop().call_soon_threadsafe, slots.release)
+    while True:
+        try:
+            logging.debug(f"Async consumer: Running test for {test.test_run_id}.")
+            test_result: TestResult = await async_test_runner.run(
+                test, field_matcher, session, concurrency, circuit_breaker
+            )
+            break
+        except Exception as e:
+            if isinstance(e, CircuitOpenError) or is_open(circuit_breaker):
+                # The target is down, the test waits for it without using up a retry
+                delay_seconds = 0
+            elif isinstance(e, RetryableRequestError):
+                delay_seconds = next_retry_delay(test, e)
+            else:
+                delay_seconds = None
+            if delay_seconds is None:
+                # Same as a consumer thread, a test that is out of retries stops the test run
+                logging.exception(f"Test request failed, stopping test run: {e}")
+                release()
+                stop_threads.set()
+                return
+        finally:
+            if concurrency is not None:
+                concurrency.release()
+            request_done.set()
+        # The retry waits on the event loop's timers without holding a slot, so other tests keep running
+        slots.release()
+        if not await sleep_unless_stopped(delay_seconds, stop_threads):
+            return
+        await slots.acquire()
+        if concurrency is not None:
+            await acquire_concurrency(concurrency, request_done)
+    result_queue.put((test, test_result, release))
+
+
+async def acquire_concurrency(
+    concurrency: AdaptiveConcurrency, request_done: asyncio.Event
+) -> None:
+    while not concurrency.try_acquire():
+        request_done.clear()
+        await request_done.wait()
+
+
+async def sleep_unless_stopped(seconds: float, stop_threads: threading.Event) -> bool:
+    # False if the test run was stopped before the time was up
+    deadline = monotonic() + seconds
+    while not stop_threads.is_set():
+        remaining_seconds = deadline - monotonic()
+        if remaining_seconds <= 0:
+            return True
+        await asyncio.sleep(min(remaining_seconds, 1))
+    return False
+
+
+def get_test(
+    test_queue: Queue,
+    consumer_worker_queue_blocking_seconds,
+    circuit_breaker: CircuitBreaker = None,
+) -> Test:
+    while True:
+        try:
+            return test_queue.get(
+                block=True, timeout=consumer_worker_queue_blocking_seconds
+            )
+        except Empty:
+            if is_open(circuit_breaker):
+                # The queue reader waits while the circuit is open
+                continue
+            logging.debug(
+                "Caught Empty Exception in worker queue. No more tests to pull."
+            )
+            return None
+
+
+def process_results(
+    result_queue: Queue,
+    validators: TestRunValidators,
+    db_session: ScopedSession,
+    ack_tracker: AckTracker = None,
+    result_writer: ResultWriter = None,
+):
+    test_persisted_counter = 0
+    while True:
+        result_item: Optional[ResultItem] = result_queue.get()
+        if result_item is None:
+            break
+        test, test_result, release = result_item
+        try:
+            # Test requests already sent when the test run is stopped are finished, and their results still persisted
+            if process_test_result(
+                test, test_result, validators, db_session, result_writer
+            ):
+                test_persisted_counter += 1
+            if ack_tracker is not None:
+                ack_tracker.finish(test.sequence)
+        finally:
+            release()
+    logging.info(f"Result Processor Stats. Tests persisted: {test_persisted_counter}")
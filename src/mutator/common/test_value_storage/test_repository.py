@@ -1,7 +1,7 @@
 import json
 import logging
 from dataclasses import dataclass
-from typing import Generator, Optional, Dict
+from typing import Generator, Optional, Dict, Tuple, List
 
 
 # The Test Repository are the flat files that are bundled with this project that contain the tests.
@@ -38,3 +38,29 @@ class TestRepository:
                     logging.exception(f"Could not read line from file {file}")
 
         return configured_test
+
+
+# Limits a Test Repository to the first few test values of each test type.
+# Used to preview a handful of generated tests without generating the whole test run.
+@dataclass
+class TestRepositorySample:
+    test_repository: TestRepository
+    values_per_type: int = 1
+
+    def get_test_value(self) -> Generator[Tuple[str, str], None, None]:
+        test_value_counts: Dict[str, int] = {}
+        for test_type, test_value in self.test_repository.get_test_value():
+            test_value_count = test_value_counts.get(test_type, 0)
+            if test_value_count < self.values_per_type:
+                test_value_counts[test_type] = test_value_count + 1
+                yield test_type, test_value
+
+
+# A fixed slice of the test values from a Test Repository.
+# Used to hand part of the test values to a generator process.
+@dataclass
+class TestValueChunk:
+    test_values: List[Tuple[str, str]]
+
+    def get_test_value(self) -> Generator[Tuple[str, str], None, None]:
+        yield from self.test_values
@@ -1,9 +1,88 @@
 import hashlib
+import json
 import logging
+import re
+from typing import List
 
 log = logging.getLogger()
 
 
+# Response hash versions. Version 1 hashes are plain hex, later versions start with "<version>:".
+# 1: SHA-1 of the str() of the object, which depends on key order and Python's repr.
+# 2: BLAKE2b of the canonical JSON of the object.
+RESPONSE_HASH_VERSIONS = [1, 2]
+
+# JSON values that canonical JSON keeps as they are
+PLAIN_TYPES = frozenset([str, int, bool, type(None)])
+# How the JSON encoder ends a float without a fraction, e.g. 1.0, below 1e+16, where it starts writing an exponent.
+# Can also be in a string, so it only tells whether the response may have to be normalized.
+INTEGRAL_FRACTION = re.compile(r"\.0(?=[,\]}]|$)")
+
+
 def hash_object(obj):
-    logging.debug(f"Creating hash for: {obj}")
+    # Formatted lazily, so large objects are only turned into text when debug logging is on
+    logging.debug("Creating hash for: %s", obj)
     return hashlib.sha1(obj.__str__().encode("UTF-8")).hexdigest()  # nosec
+
+
+def canonical_bytes(obj) -> bytes:
+    # The same bytes for equal objects: keys sorted, no whitespace, UTF-8,
+    # and numbers in their shortest round trip form, with 1.0 the same as 1.
+    # Only JSON can be hashed, anything else, or a NaN or Infinity, raises a TypeError or ValueError.
+    text = dump_canonical(obj)
+    # The encoder writes floats as they are. Most responses have no float without a fraction,
+    # so they are encoded once, and only the ones that may have one are normalized and encoded again.
+    if INTEGRAL_FRACTION.search(text) or ("+" in text and "e+" in text):
+        text = dump_canonical(normalize_numbers(obj))
+    return text.encode("UTF-8")
+
+
+def dump_canonical(obj) -> str:
+    return json.dumps(
+        obj,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        allow_nan=False,
+    )
+
+
+def normalize_numbers(obj):
+    # Floats without a fraction become ints, so a number hashes the same however it was written.
+    # Strings, ints, booleans and None are most of a response, and are kept without a call for each of them.
+    obj_type = type(obj)
+    if obj_type is dict:
+        return {
+            key: value if type(value) in PLAIN_TYPES else normalize_numbers(value)
+            for key, value in obj.items()
+        }
+    if obj_type is list or obj_type is tuple:
+        return [
+            value if type(value) in PLAIN_TYPES else normalize_numbers(value)
+            for value in obj
+        ]
+    if isinstance(obj, float) and obj.is_integer():
+        return int(obj)
+    return obj
+
+
+def hash_canonical(obj) -> str:
+    return "2:" + hashlib.blake2b(canonical_bytes(obj), digest_size=20).hexdigest()
+
+
+def hash_response(obj, version: int) -> str:
+    if version == 1:
+        return hash_object(obj)
+    return hash_canonical(obj)
+
+
+def get_hash_version(response_hash: str) -> int:
+    version, separator, _ = response_hash.partition(":")
+    return int(version) if separator else 1
+
+
+def hash_test(request_fingerprint: str, test_descriptor: List) -> str:
+    # The request is hashed once per test run, only the small test descriptor is serialized per test
+    return hashlib.sha1(  # nosec
+        (request_fingerprint + json.dumps(test_descriptor)).encode("UTF-8")
+    ).hexdigest()
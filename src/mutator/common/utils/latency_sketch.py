@@ -0,0 +1,82 @@
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Latencies are counted in buckets that grow by a factor of gamma, so any quantile is within
+# relative_accuracy of the real one, and no more than a fixed amount of buckets are ever kept,
+# however many latencies are added.
+MIN_SECONDS = 0.0001
+MAX_SECONDS = 3600
+
+
+@dataclass
+class LatencySketch:
+    relative_accuracy: float = 0.01
+    count: int = 0
+    # Amount of latencies in each bucket, from the bucket of MIN_SECONDS to the bucket of MAX_SECONDS
+    buckets: List[int] = field(default=None, repr=False)
+    # The lowest and highest bucket that has a latency, so quantiles don't walk the empty ones
+    min_bucket: int = None
+    max_bucket: int = None
+    # The bucket of each quantile that was asked for, and the amount of latencies up to and including it
+    cursors: Dict[float, Tuple[int, int]] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        self.gamma = (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.offset = math.ceil(math.log(MIN_SECONDS) / self.log_gamma)
+        if self.buckets is None:
+            self.buckets = [0] * (self.get_bucket(MAX_SECONDS) + 1)
+
+    def add(self, seconds: float) -> None:
+        bucket = self.get_bucket(seconds)
+        self.buckets[bucket] += 1
+        self.count += 1
+        for q, (cursor, seen) in self.cursors.items():
+            if bucket <= cursor:
+                self.cursors[q] = (cursor, seen + 1)
+        if self.min_bucket is None or bucket < self.min_bucket:
+            self.min_bucket = bucket
+        if self.max_bucket is None or bucket > self.max_bucket:
+            self.max_bucket = bucket
+
+    def merge(self, sketch: "LatencySketch") -> None:
+        if sketch.count == 0:
+            return
+        for bucket in range(sketch.min_bucket, sketch.max_bucket + 1):
+            self.buckets[bucket] += sketch.buckets[bucket]
+        if self.count == 0:
+            self.min_bucket, self.max_bucket = sketch.min_bucket, sketch.max_bucket
+        else:
+            self.min_bucket = min(self.min_bucket, sketch.min_bucket)
+            self.max_bucket = max(self.max_bucket, sketch.max_bucket)
+        self.count += sketch.count
+        self.cursors.clear()
+
+    def quantile(self, q: float) -> Optional[float]:
+        # None until a latency has been added.
+        # The bucket of each quantile asked for is kept, and moved from there as latencies are added,
+        # so a quantile of every latency doesn't walk the buckets again.
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        bucket, seen = self.cursors.get(
+            q, (self.min_bucket, self.buckets[self.min_bucket])
+        )
+        # seen is the amount of latencies up to and including bucket
+        while seen <= rank and bucket < self.max_bucket:
+            bucket += 1
+            seen += self.buckets[bucket]
+        while bucket > self.min_bucket and seen - self.buckets[bucket] > rank:
+            seen -= self.buckets[bucket]
+            bucket -= 1
+        self.cursors[q] = (bucket, seen)
+        return self.get_value(bucket)
+
+    def get_bucket(self, seconds: float) -> int:
+        seconds = min(max(seconds, MIN_SECONDS), MAX_SECONDS)
+        return math.ceil(math.log(seconds) / self.log_gamma) - self.offset
+
+    def get_value(self, bucket: int) -> float:
+        # The middle of the bucket, within relative_accuracy of every latency in it
+        return 2 * self.gamma ** (bucket + self.offset) / (self.gamma + 1)
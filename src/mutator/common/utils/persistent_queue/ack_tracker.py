@@ -0,0 +1,26 @@
+from collections import deque
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Deque, Set
+
+
+# Tests are handed to the consumers in sequence order, but finish in any order.
+# The checkpoint is the last sequence before the first test that has not finished,
+# everything up to it can be acked, and a resumed test run continues after it.
+@dataclass
+class AckTracker:
+    checkpoint: int = 0
+    started: Deque[int] = field(default_factory=deque)
+    finished: Set[int] = field(default_factory=set)
+    lock: Lock = field(default_factory=Lock)
+
+    def start(self, sequence: int) -> None:
+        with self.lock:
+            self.started.append(sequence)
+
+    def finish(self, sequence: int) -> None:
+        with self.lock:
+            self.finished.add(sequence)
+            while self.started and self.started[0] in self.finished:
+                self.checkpoint = self.started.popleft()
+                self.finished.remove(self.checkpoint)
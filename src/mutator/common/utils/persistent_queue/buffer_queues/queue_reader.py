@@ -2,20 +2,24 @@ import logging
 import os
 import pathlib
 from configparser import ConfigParser
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from queue import Queue, Full
 from threading import Event
 from time import sleep
-from typing import List
+from typing import Dict, List, Set
 
 from ratelimit import sleep_and_retry, limits
 from sqlalchemy.orm.scoping import ScopedSession
 
 from src.common.database.test_run import TestRun
 from src.manager.services.test_run.service import test_run_service
+from src.mutator.common.utils.persistent_queue.ack_tracker import AckTracker
 from src.mutator.common.utils.persistent_queue.dao.queue_item import QueueItem
-from src.mutator.common.utils.persistent_queue.persistent_queue import PersistentQueue
+from src.mutator.common.utils.persistent_queue.queue_backend import QueueBackend
+from src.mutator.generator import body_mutation, generator
 from src.mutator.generator.test import Test
+from src.mutator.runner.adaptive_concurrency import AdaptiveConcurrency
+from src.mutator.runner.circuit_breaker import CircuitBreaker
 
 config = ConfigParser()
 config.read(
@@ -41,15 +45,29 @@ worker_queue_batch_read_size: int = config.getint(
 
 @dataclass
 class QueueReader:
-    persistent_queue: PersistentQueue
+    persistent_queue: QueueBackend
     worker_queue: Queue
     stop_threads: Event
     test_run_id: int
     scoped_session: ScopedSession
+    endpoint: Dict = None
+    # Tests are acked once their results are processed, instead of when they are handed to the consumers
+    ack_tracker: AckTracker = None
+    # Tests that already have results, from an earlier attempt of a resumed test run
+    tested_request_hashes: Set[str] = field(default_factory=set)
+    # Shown with the progress of the test run, if concurrency is adapted to the target
+    concurrency: AdaptiveConcurrency = None
+    # Tests stay in the test queue while the circuit to the target is open
+    circuit_breaker: CircuitBreaker = None
+
+    def __post_init__(self):
+        # Shared by every test request built from a stored mutation
+        self.endpoint = body_mutation.freeze(self.endpoint)
 
     def read_queue(self):
-        total_size = self.persistent_queue.size()
-        progress_counter: int = 0
+        progress_counter: int = len(self.tested_request_hashes)
+        total_size = self.persistent_queue.size() + progress_counter
+        acked_sequence: int = 0
 
         logging.debug(
             f"Starting to populate {total_size} tests from local persisted queue into worker queue."
@@ -66,7 +84,18 @@ class QueueReader:
                     )
                     break
                 for queue_item in queue_items:
+                    if queue_item.test_hash in self.tested_request_hashes:
+                        logging.debug(
+                            f"Test {queue_item.test_hash} already has a result, skipping."
+                        )
+                        if self.ack_tracker is not None:
+                            self.ack_tracker.start(queue_item.sequence)
+                            self.ack_tracker.finish(queue_item.sequence)
+                        continue
+                    progress_counter += 1
                     test = self.create_test(queue_item)
+                    if self.ack_tracker is not None:
+                        self.ack_tracker.start(queue_item.sequence)
                     logging.debug(
                         f"Fetched from persistent queue: {test.__dict__}. Pushing to worker queue."
                     )
@@ -74,6 +103,7 @@ class QueueReader:
                     for i in range(throttle_timeout_max_retries):
                         try:
                             if not self.stop_threads.is_set():
+                                self.wait_for_circuit(progress_counter, total_size)
                                 self.push_to_consumer_queue(test, throttle_test_run)
                                 break
                         except Full:
@@ -89,16 +119,23 @@ class QueueReader:
                                 f"Sleeping {throttle_timeout_retry_sleep_interval_seconds} seconds then retrying."
                             )
                             sleep(throttle_timeout_retry_sleep_interval_seconds)
-                progress_counter += len(queue_items)
                 self.update_progress(progress_counter, total_size)
-                if not self.persistent_queue.ack(queue_items):
-                    logging.error("INVESTIGATE THIS: Did not ack queue items.")
+                if self.ack_tracker is None:
+                    if not self.persistent_queue.ack(queue_items):
+                        logging.error("INVESTIGATE THIS: Did not ack queue items.")
+                elif self.ack_tracker.checkpoint > acked_sequence:
+                    acked_sequence = self.ack_tracker.checkpoint
+                    self.persistent_queue.ack_up_to(acked_sequence)
             except Exception as e:
                 logging.exception(f"Error while populating worker queue: {e}")
                 self.stop_threads.set()
 
     def create_test(self, queue_item):
         test_data: dict = queue_item.test
+        if "mutation" in test_data:
+            test: Test = generator.build_test_request(test_data, self.endpoint)
+            test.sequence = queue_item.sequence
+            return test
         test: Test = Test()
         test.test_run_id = test_data.get("test_run_id")
         test.test_value = test_data.get("test_value")
@@ -108,8 +145,16 @@ class QueueReader:
         test.headers = test_data.get("headers")
         test.url = test_data.get("url")
         test.body = test_data.get("body")
+        test.sequence = queue_item.sequence
         return test
 
+    def wait_for_circuit(self, progress_counter, total_size):
+        if self.circuit_breaker is None or not self.circuit_breaker.is_open():
+            return
+        # Show the open circuit on the test run while waiting for it
+        self.update_progress(progress_counter, total_size)
+        self.circuit_breaker.wait_while_open()
+
     def push_to_consumer_queue(self, queue_item, throttle):
         if throttle:
             self.push_to_queue_throttled(queue_item)
@@ -124,6 +169,10 @@ class QueueReader:
             test_run = TestRun()
             test_run.id = self.test_run_id
             test_run.test_result_count = progress_counter
+            if self.concurrency is not None:
+                test_run.concurrency_limit = self.concurrency.get_limit()
+            if self.circuit_breaker is not None:
+                test_run.circuit_state = self.circuit_breaker.get_state()
             test_run_service.update_test_run(test_run, session)
 
     @sleep_and_retry
@@ -1,69 +1,127 @@
 import logging
+import os
+import pathlib
+from configparser import ConfigParser
 from dataclasses import dataclass
-from queue import Queue
-from random import randint
+from queue import Queue, Empty, Full
 from threading import Event
-from time import sleep
-from typing import List
+from time import monotonic, sleep
+from typing import List, Optional
 
 from src.mutator.common.utils.persistent_queue.dao.queue_item import QueueItem
-from src.mutator.common.utils.persistent_queue.persistent_queue import PersistentQueue
+from src.mutator.common.utils.persistent_queue.queue_backend import QueueBackend
+
+config = ConfigParser()
+config.read(
+    pathlib.Path(os.path.abspath(__file__)).parents[4].__str__() + "/config/config.ini"
+)
+
+worker_queue_batch_write_size: int = config.getint(
+    "worker_queue", "worker_queue_batch_write_size"
+)
+worker_queue_batch_write_interval_seconds: float = (
+    config.getint("worker_queue", "worker_queue_batch_write_interval_ms") / 1000
+)
+
+# Times a batch is pushed to the test queue before the test run is failed
+PUSH_BATCH_ATTEMPTS = 3
 
 
 @dataclass
 class QueueWriter:
     buffer_queue: Queue
-    persistent_queue: PersistentQueue
+    persistent_queue: QueueBackend
     stop_threads: Event
     test_run_id: int
+    progress_counter: int = 0
+    # Set once a batch could not be written, the test queue is missing tests and the test run must not run
+    failed: bool = False
 
     def write_queue(self):
-        progress_counter: int = 0
-        # if max_empty_counter is reached exit the thread,
-        # all generated tests have been pushed to persistent queue
-        queue_empty_counter_max = 10
-        queue_empty_counter_current = 0
-        last_queue_size = 0
-
+        # Tests are written in batches of worker_queue_batch_write_size,
+        # or whatever has been generated once the oldest unwritten test has waited
+        # worker_queue_batch_write_interval_seconds. A None in the buffer queue is the end of the tests.
+        # Once a batch could not be written the rest of the tests are dropped, but still taken from the buffer queue
+        # until the end, so the generator doesn't wait on it forever.
         logging.debug(
             "Starting to write generated tests from buffer queue into persistent queue."
         )
-        logging.debug("Starting buffered writer.")
-        sleep(1)
-        while not self.stop_threads.is_set():
+        queue_items: List[QueueItem] = []
+        flush_deadline: float = 0
+        end_of_queue = False
+        while not end_of_queue and not self.stop_threads.is_set():
+            timeout = (
+                max(flush_deadline - monotonic(), 0)
+                if queue_items
+                else worker_queue_batch_write_interval_seconds
+            )
             try:
-                logging.debug(f"Queue size: {self.buffer_queue.qsize()}")
-                if queue_empty_counter_current >= queue_empty_counter_max:
-                    logging.debug("Buffer is empty, exiting buffered writer.")
-                    break
-                if self.buffer_queue.empty() or self.buffer_queue.qsize() == 0:
-                    logging.debug(
-                        "Buffered queue is empty, incrementing empty counter."
-                    )
-                    queue_empty_counter_current += 1
-                    continue
-
-                buffer_full: bool = (
-                    self.buffer_queue.qsize() >= self.buffer_queue.maxsize
-                )
-                # flush last few items in queue
-                end_of_queue: bool = self.buffer_queue.qsize() == last_queue_size
-                if buffer_full or end_of_queue:
-                    logging.debug("Fetching items from buffer queue.")
-                    queue_items: List[QueueItem] = []
-                    for _ in range(self.buffer_queue.qsize()):
-                        queue_items.append(self.buffer_queue.get())
-                    queue_item_count = len(queue_items)
-                    logging.debug(
-                        f"Pushing {queue_item_count} tests to persistent queue."
-                    )
-                    self.persistent_queue.push_batch(queue_items)
-                    progress_counter += queue_item_count
-                    if randint(1, 3) == 2 or end_of_queue:  # nosec
-                        logging.info(
-                            f"Generated {progress_counter} tests for test run id {self.test_run_id}."
+                queue_item: Optional[QueueItem] = self.buffer_queue.get(timeout=timeout)
+                if queue_item is None:
+                    end_of_queue = True
+                else:
+                    if not queue_items:
+                        flush_deadline = (
+                            monotonic() + worker_queue_batch_write_interval_seconds
                         )
-                last_queue_size = self.buffer_queue.qsize()
+                    queue_items.append(self.compact_queue_item(queue_item))
+            except Empty:
+                pass
+
+            if queue_items and (
+                end_of_queue
+                or len(queue_items) >= worker_queue_batch_write_size
+                or monotonic() >= flush_deadline
+            ):
+                if not self.failed:
+                    self.write_batch(queue_items)
+                queue_items = []
+
+        logging.info(
+            f"Persisted {self.progress_counter} tests to queue for test run id {self.test_run_id}."
+        )
+
+    def write_batch(self, queue_items: List[QueueItem]) -> None:
+        for attempt in range(1, PUSH_BATCH_ATTEMPTS + 1):
+            try:
+                logging.debug(f"Pushing {len(queue_items)} tests to persistent queue.")
+                self.persistent_queue.push_batch(queue_items)
+                self.progress_counter += len(queue_items)
+                return
             except Exception as e:
-                logging.exception(f"Error while populating persistent queue: {e}")
-        logging.debug(f"Persisted {progress_counter} tests to queue.")
+                logging.exception(
+                    f"Error while populating persistent queue, attempt {attempt} of {PUSH_BATCH_ATTEMPTS}: {e}"
+                )
+                if attempt < PUSH_BATCH_ATTEMPTS:
+                    sleep(worker_queue_batch_write_interval_seconds)
+        logging.error(
+            f"Could not write a batch of {len(queue_items)} tests to the test queue of test run id {self.test_run_id}. "
+            f"The test run will be failed."
+        )
+        self.failed = True
+
+    def close(self) -> None:
+        # Let the writer know there are no more tests coming, so it writes the last batch and exits
+        while not self.stop_threads.is_set():
+            try:
+                self.buffer_queue.put(
+                    None, timeout=worker_queue_batch_write_interval_seconds
+                )
+                break
+            except Full:
+                logging.debug("Buffer queue is full, waiting for queue writer.")
+
+    def compact_queue_item(self, queue_item: QueueItem) -> QueueItem:
+        # Method, headers and body are the same as the test run request, except for the body field
+        # the test changes. Only the mutation is stored, the queue reader builds the test request again.
+        if queue_item.mutation is not None:
+            test: dict = queue_item.test
+            queue_item.test = {
+                "test_run_id": test.get("test_run_id"),
+                "test_type": test.get("test_type"),
+                "test_value": test.get("test_value"),
+                "test_hash": test.get("test_hash"),
+                "url": test.get("url"),
+                "mutation": queue_item.mutation,
+            }
+        return queue_item
@@ -0,0 +1,106 @@
+import logging
+from dataclasses import dataclass
+from queue import Queue, Full
+from threading import Event
+
+from ratelimit import sleep_and_retry, limits
+from sqlalchemy.orm.scoping import ScopedSession
+
+from src.common.database.test_run import TestRun
+from src.manager.services.test_run.service import test_run_service
+from src.mutator.common.utils.persistent_queue.buffer_queues.queue_reader import (
+    throttle_test_run,
+    throttle_tests_per_interval,
+    throttle_interval_seconds,
+    throttle_timeout,
+    worker_queue_batch_read_size,
+)
+from src.mutator.common.utils.persistent_queue.dao.queue_item import QueueItem
+from src.mutator.generator.test import Test
+from src.mutator.runner.adaptive_concurrency import AdaptiveConcurrency
+from src.mutator.runner.circuit_breaker import CircuitBreaker
+
+
+# Used in place of the buffer queue when a test run is streamed.
+# The generator puts tests straight onto the bounded worker queue, so it blocks while
+# the consumers are busy and the test_queue table is never used.
+@dataclass
+class StreamWriter:
+    worker_queue: Queue
+    stop_threads: Event
+    test_run_id: int
+    scoped_session: ScopedSession
+    progress_counter: int = 0
+    concurrency: AdaptiveConcurrency = None
+    # The generator waits while the circuit to the target is open
+    circuit_breaker: CircuitBreaker = None
+
+    def put(self, queue_item: QueueItem) -> None:
+        test = self.create_test(queue_item)
+        while not self.stop_threads.is_set():
+            self.wait_for_circuit()
+            try:
+                self.push_to_consumer_queue(test, throttle_test_run)
+                self.progress_counter += 1
+                if self.progress_counter % worker_queue_batch_read_size == 0:
+                    self.update_progress()
+                return
+            except Full:
+                logging.debug("Worker queue is full, waiting for consumers.")
+        logging.debug("Test run stopped, dropping streamed test.")
+
+    def close(self, consumer_count: int) -> None:
+        self.update_progress()
+        # Let every consumer know that there are no more tests coming
+        for _ in range(consumer_count):
+            while not self.stop_threads.is_set():
+                try:
+                    self.worker_queue.put(None, timeout=throttle_timeout)
+                    break
+                except Full:
+                    logging.debug("Worker queue is full, waiting for consumers.")
+
+    def wait_for_circuit(self) -> None:
+        if self.circuit_breaker is None or not self.circuit_breaker.is_open():
+            return
+        # Show the open circuit on the test run while waiting for it
+        self.update_progress()
+        self.circuit_breaker.wait_while_open()
+
+    def create_test(self, queue_item: QueueItem) -> Test:
+        test_data: dict = queue_item.test
+        test: Test = Test()
+        test.test_run_id = test_data.get("test_run_id")
+        test.test_value = test_data.get("test_value")
+        test.test_type = test_data.get("test_type")
+        test.test_hash = test_data.get("test_hash")
+        test.method = test_data.get("method")
+        test.headers = test_data.get("headers")
+        test.url = test_data.get("url")
+        test.body = test_data.get("body")
+        return test
+
+    def push_to_consumer_queue(self, test: Test, throttle: bool) -> None:
+        if throttle:
+            self.push_to_queue_throttled(test)
+        else:
+            self.worker_queue.put(test, timeout=throttle_timeout)
+
+    def update_progress(self) -> None:
+        logging.info(
+            f"Test run id {self.test_run_id} progress: {self.progress_counter} tests streamed"
+        )
+        with self.scoped_session() as session:
+            test_run = TestRun()
+            test_run.id = self.test_run_id
+            test_run.test_result_count = self.progress_counter
+            if self.concurrency is not None:
+                test_run.concurrency_limit = self.concurrency.get_limit()
+            if self.circuit_breaker is not None:
+                test_run.circuit_state = self.circuit_breaker.get_state()
+            test_run_service.update_test_run(test_run, session)
+
+    @sleep_and_retry
+    @limits(calls=throttle_tests_per_interval, period=throttle_interval_seconds)
+    def push_to_queue_throttled(self, test: Test) -> None:
+        self.worker_queue.put(test, timeout=throttle_timeout)
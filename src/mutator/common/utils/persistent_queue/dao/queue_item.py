@@ -5,8 +5,13 @@ from src.common.database.database_base import Base
 
 class QueueItem(Base):
     __tablename__ = "test_queue"
-    id = Column("id", String(45), primary_key=True)
     test_run_id = Column("test_run_id", Integer, primary_key=True)
-    test_hash = Column("test_hash", String(255), primary_key=True)
+    # Order of the test in the test run, set when the test is pushed to the persistent queue
+    sequence = Column("sequence", Integer, primary_key=True)
+    test_hash = Column("test_hash", String(255))
     test = Column("test", JSON)
     create_date = Column("create_date", TIMESTAMP)
+
+    # Not persisted. How the test changes the test run request, see generator.create_mutation.
+    # Stored in place of the complete test request when the test is written to the test queue.
+    mutation = None
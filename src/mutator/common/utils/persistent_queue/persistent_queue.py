@@ -1,25 +1,33 @@
 from dataclasses import dataclass
 from datetime import timedelta, datetime
-from typing import List
+from typing import List, Optional
 
 from sqlalchemy import func, asc
 from sqlalchemy.orm.scoping import ScopedSession
 
 from src.mutator.common.utils.persistent_queue.dao.queue_item import QueueItem
+from src.mutator.common.utils.persistent_queue.queue_backend import QueueBackend
 
 
+# Default queue backend, the test_queue table.
+# Tests are numbered in the order they are pushed, and read with a cursor on that number.
+# Reads and acks only touch the primary key range they need, no matter how many tests are queued.
 @dataclass
-class PersistentQueue:
+class PersistentQueue(QueueBackend):
     test_run_id: int
     scoped_session: ScopedSession
-
-    def push(self, queue_item: QueueItem) -> None:
-        with self.scoped_session() as session:
-            session.add(queue_item)
-            session.commit()
+    # Sequence of the last test pushed, loaded from the database on the first push
+    tail_sequence: Optional[int] = None
+    # Sequence of the last test popped
+    head_sequence: int = 0
 
     def push_batch(self, queue_items: List[QueueItem]) -> None:
         with self.scoped_session() as session:
+            if self.tail_sequence is None:
+                self.tail_sequence = self.get_max_sequence(session)
+            for queue_item in queue_items:
+                self.tail_sequence += 1
+                queue_item.sequence = self.tail_sequence
             session.bulk_save_objects(queue_items)
             session.commit()
 
@@ -28,27 +36,22 @@ class PersistentQueue:
             queue_items: List[QueueItem] = (
                 session.query(QueueItem)
                 .filter(QueueItem.test_run_id == self.test_run_id)
-                .order_by(asc(QueueItem.create_date))
+                .filter(QueueItem.sequence > self.head_sequence)
+                .order_by(asc(QueueItem.sequence))
                 .limit(batch_size)
             ).all()
+        if queue_items:
+            self.head_sequence = queue_items[-1].sequence
         return queue_items
 
-    def ack(self, queue_items: List[QueueItem]) -> bool:
+    def ack_up_to(self, last_sequence: int) -> bool:
         with self.scoped_session() as session:
-            ids: List[str] = []
-            test_hashes: List[str] = []
-
-            for queue_item in queue_items:
-                ids.append(queue_item.id)
-                test_hashes.append(queue_item.test_hash)
-
             query = (
                 session.query(QueueItem)
-                .filter(QueueItem.id.in_(ids))
                 .filter(QueueItem.test_run_id == self.test_run_id)
-                .filter(QueueItem.test_hash.in_(test_hashes))
+                .filter(QueueItem.sequence <= last_sequence)
             )
-            query.delete()
+            query.delete(synchronize_session=False)
             session.commit()
         return True
 
@@ -65,6 +68,8 @@ class PersistentQueue:
             )
             trim_query.delete()
             session.commit()
+        self.tail_sequence = 0
+        self.head_sequence = 0
         return True
 
     def size(self) -> int:
@@ -75,3 +80,11 @@ class PersistentQueue:
                 .first()[0]
             )
         return size
+
+    def get_max_sequence(self, session) -> int:
+        max_sequence = (
+            session.query(func.max(QueueItem.sequence))
+            .filter(QueueItem.test_run_id == self.test_run_id)
+            .scalar()
+        )
+        return max_sequence or 0
@@ -0,0 +1,38 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+from src.mutator.common.utils.persistent_queue.dao.queue_item import QueueItem
+
+
+# Storage for the generated tests of a single test run.
+# Tests are numbered from 1 in the order they are pushed and popped in that order.
+# Acking a sequence removes every test up to and including it.
+class QueueBackend(ABC):
+    @abstractmethod
+    def push_batch(self, queue_items: List[QueueItem]) -> None:
+        pass
+
+    @abstractmethod
+    def pop(self, batch_size=10) -> List[QueueItem]:
+        pass
+
+    @abstractmethod
+    def ack_up_to(self, last_sequence: int) -> bool:
+        pass
+
+    @abstractmethod
+    def remove_all(self) -> bool:
+        pass
+
+    @abstractmethod
+    def size(self) -> int:
+        pass
+
+    def push(self, queue_item: QueueItem) -> None:
+        self.push_batch([queue_item])
+
+    def ack(self, queue_items: List[QueueItem]) -> bool:
+        # Tests are popped and acked in order, so everything up to the last acked test is done
+        if not queue_items:
+            return True
+        return self.ack_up_to(max(queue_item.sequence for queue_item in queue_items))
@@ -0,0 +1,290 @@
+import json
+import logging
+import os
+import pathlib
+import shutil
+import struct
+import zlib
+from configparser import ConfigParser
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from src.mutator.common.utils.persistent_queue.dao.queue_item import QueueItem
+from src.mutator.common.utils.persistent_queue.queue_backend import QueueBackend
+
+config = ConfigParser()
+config.read(
+    pathlib.Path(os.path.abspath(__file__)).parents[3].__str__() + "/config/config.ini"
+)
+
+worker_queue_segment_directory: str = config.get(
+    "worker_queue", "worker_queue_segment_directory"
+)
+worker_queue_segment_max_bytes: int = config.getint(
+    "worker_queue", "worker_queue_segment_max_bytes"
+)
+worker_queue_segment_fsync: str = config.get(
+    "worker_queue", "worker_queue_segment_fsync"
+)
+segment_fsync_policies = ["batch", "segment", "none"]
+
+# Every record is the length and crc32 of its payload, followed by the payload
+record_header = struct.Struct(">II")
+segment_suffix = ".segment"
+checkpoint_file_name = "checkpoint.json"
+
+
+# Queue backend that appends tests to local segment files instead of the test_queue table,
+# so test generation never waits on, or holds, the database write lock.
+# Every test run has its own directory of segment files, named after the sequence of their first test.
+# Acked tests are recorded in a checkpoint file with the read offset of the next test,
+# and segments that only hold acked tests are deleted.
+@dataclass
+class SegmentFileQueue(QueueBackend):
+    test_run_id: int
+    directory: str = worker_queue_segment_directory
+    max_segment_bytes: int = worker_queue_segment_max_bytes
+    fsync: str = worker_queue_segment_fsync
+    # Sequence of the last test pushed, loaded from the segment files on first use
+    tail_sequence: Optional[int] = None
+    acked_sequence: int = 0
+    # Read cursor, the sequence of the last test popped and where the next test starts
+    head_sequence: int = 0
+    read_segment: Optional[int] = None
+    read_offset: int = 0
+    # Where every popped test that is not acked yet ends, to checkpoint the read offset on ack
+    popped_offsets: Dict[int, Tuple[int, int]] = field(default_factory=dict)
+    lock: Lock = field(default_factory=Lock)
+
+    def push_batch(self, queue_items: List[QueueItem]) -> None:
+        with self.lock:
+            self.load()
+            os.makedirs(self.get_run_directory(), exist_ok=True)
+            segments = self.list_segments()
+            segment = segments[-1] if segments else self.tail_sequence + 1
+            segment_file = open(self.get_segment_path(segment), "ab")
+            try:
+                for queue_item in queue_items:
+                    if segment_file.tell() >= self.max_segment_bytes:
+                        sync(segment_file, self.fsync != "none")
+                        segment_file.close()
+                        segment_file = open(
+                            self.get_segment_path(self.tail_sequence + 1), "ab"
+                        )
+                    self.tail_sequence += 1
+                    queue_item.sequence = self.tail_sequence
+                    segment_file.write(encode_record(queue_item))
+                sync(segment_file, self.fsync == "batch")
+            finally:
+                segment_file.close()
+
+    def pop(self, batch_size=10) -> List[QueueItem]:
+        with self.lock:
+            self.load()
+            queue_items: List[QueueItem] = []
+            segments = self.list_segments()
+            while len(queue_items) < batch_size:
+                if self.read_segment not in segments and not self.read_next_segment(
+                    segments
+                ):
+                    break
+                limit = batch_size - len(queue_items)
+                with open(self.get_segment_path(self.read_segment), "rb") as file:
+                    file.seek(self.read_offset)
+                    records = read_records(file, limit)
+                    end_of_segment = len(records) < limit
+                    position = file.tell()
+                    if end_of_segment and file.seek(0, os.SEEK_END) > position:
+                        logging.error(
+                            f"INVESTIGATE THIS: Skipping unreadable tests in test queue segment "
+                            f"{self.get_segment_path(self.read_segment)}."
+                        )
+                for payload, offset in records:
+                    self.head_sequence += 1
+                    self.read_offset = offset
+                    # Tests acked before the queue was loaded again
+                    if self.head_sequence <= self.acked_sequence:
+                        continue
+                    self.popped_offsets[self.head_sequence] = (
+                        self.read_segment,
+                        offset,
+                    )
+                    queue_items.append(self.decode_record(payload))
+                if end_of_segment and not self.read_next_segment(segments):
+                    break
+            return queue_items
+
+    def ack_up_to(self, last_sequence: int) -> bool:
+        with self.lock:
+            self.load()
+            if last_sequence <= self.acked_sequence:
+                return True
+            if last_sequence >= self.tail_sequence:
+                # Every test is acked, nothing is left to resume from
+                shutil.rmtree(self.get_run_directory(), ignore_errors=True)
+                self.acked_sequence = last_sequence
+                self.read_segment = None
+                self.popped_offsets = {}
+                return True
+            checkpoint = {"sequence": last_sequence}
+            if last_sequence in self.popped_offsets:
+                segment, offset = self.popped_offsets[last_sequence]
+                checkpoint.update({"segment": segment, "offset": offset})
+            self.write_checkpoint(checkpoint)
+            self.acked_sequence = last_sequence
+            self.popped_offsets = {
+                sequence: offset
+                for sequence, offset in self.popped_offsets.items()
+                if sequence > last_sequence
+            }
+
+            # Only once the checkpoint is written, a segment is done when the next one starts after the checkpoint
+            segments = self.list_segments()
+            for segment, next_segment in zip(segments, segments[1:]):
+                if next_segment - 1 <= last_sequence:
+                    os.remove(self.get_segment_path(segment))
+        return True
+
+    def remove_all(self) -> bool:
+        with self.lock:
+            shutil.rmtree(self.get_run_directory(), ignore_errors=True)
+            self.trim_old_test_runs()
+            self.tail_sequence = 0
+            self.acked_sequence = 0
+            self.head_sequence = 0
+            self.read_segment = None
+            self.read_offset = 0
+            self.popped_offsets = {}
+        return True
+
+    def size(self) -> int:
+        with self.lock:
+            self.load()
+            return self.tail_sequence - self.acked_sequence
+
+    def load(self) -> None:
+        # Picks up where an earlier worker stopped, a partly written last test is removed
+        if self.tail_sequence is not None:
+            return
+        checkpoint = self.read_checkpoint()
+        self.acked_sequence = checkpoint.get("sequence", 0)
+        segments = self.list_segments()
+        if not segments:
+            self.tail_sequence = self.acked_sequence
+            self.head_sequence = self.acked_sequence
+            return
+
+        last_segment_path = self.get_segment_path(segments[-1])
+        with open(last_segment_path, "r+b") as file:
+            records = read_records(file)
+            end = records[-1][1] if records else 0
+            if file.seek(0, os.SEEK_END) > end:
+                logging.warning(
+                    f"Removing partly written test from test queue segment {last_segment_path}."
+                )
+                file.truncate(end)
+        self.tail_sequence = segments[-1] - 1 + len(records)
+
+        if checkpoint.get("segment") in segments:
+            self.read_segment = checkpoint.get("segment")
+            self.read_offset = checkpoint.get("offset")
+            self.head_sequence = self.acked_sequence
+        else:
+            self.read_next_segment(segments)
+
+    def read_next_segment(self, segments: List[int]) -> bool:
+        next_segments = [
+            segment
+            for segment in segments
+            if self.read_segment is None or segment > self.read_segment
+        ]
+        if not next_segments:
+            return False
+        self.read_segment = next_segments[0]
+        self.read_offset = 0
+        self.head_sequence = self.read_segment - 1
+        return True
+
+    def read_checkpoint(self) -> Dict:
+        try:
+            with open(self.get_checkpoint_path()) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def write_checkpoint(self, checkpoint: Dict) -> None:
+        # Replaced in one step, so there is always a complete checkpoint
+        temporary_path = self.get_checkpoint_path() + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(checkpoint, file)
+            sync(file, self.fsync != "none")
+        os.replace(temporary_path, self.get_checkpoint_path())
+
+    def trim_old_test_runs(self) -> None:
+        # Remove any old test runs that somehow were not deleted
+        if not os.path.isdir(self.directory):
+            return
+        trim_before = (datetime.utcnow() - timedelta(days=7)).timestamp()
+        for entry in os.scandir(self.directory):
+            if entry.is_dir() and entry.stat().st_mtime < trim_before:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def decode_record(self, payload: bytes) -> QueueItem:
+        record: Dict = json.loads(payload)
+        queue_item = QueueItem()
+        queue_item.test_run_id = self.test_run_id
+        queue_item.sequence = self.head_sequence
+        queue_item.test_hash = record.get("test_hash")
+        queue_item.test = record.get("test")
+        return queue_item
+
+    def list_segments(self) -> List[int]:
+        try:
+            file_names = os.listdir(self.get_run_directory())
+        except FileNotFoundError:
+            return []
+        return sorted(
+            int(file_name[: -len(segment_suffix)])
+            for file_name in file_names
+            if file_name.endswith(segment_suffix)
+        )
+
+    def get_run_directory(self) -> str:
+        return os.path.join(self.directory, str(self.test_run_id))
+
+    def get_segment_path(self, segment: int) -> str:
+        return os.path.join(self.get_run_directory(), f"{segment:020d}{segment_suffix}")
+
+    def get_checkpoint_path(self) -> str:
+        return os.path.join(self.get_run_directory(), checkpoint_file_name)
+
+
+def encode_record(queue_item: QueueItem) -> bytes:
+    payload = json.dumps(
+        {"test_hash": queue_item.test_hash, "test": queue_item.test},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return record_header.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(file: BinaryIO, limit: int = None) -> List[Tuple[bytes, int]]:
+    # Payload of every complete record from the current position, with the offset where it ends
+    records: List[Tuple[bytes, int]] = []
+    while limit is None or len(records) < limit:
+        header = file.read(record_header.size)
+        if len(header) < record_header.size:
+            break
+        length, checksum = record_header.unpack(header)
+        payload = file.read(length)
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            break
+        records.append((payload, file.tell()))
+    return records
+
+
+def sync(file, fsync: bool) -> None:
+    file.flush()
+    if fsync:
+        os.fsync(file.fileno())
@@ -0,0 +1,14 @@
+import multiprocessing
+from multiprocessing.context import BaseContext
+
+
+def get_process_context() -> BaseContext:
+    # Generator processes are never forked from a worker, which already runs threads
+    # (the queue reader, lock refresher, canceller, result writer) and holds database connections,
+    # that a forked process would inherit in whatever state they were in.
+    # A forkserver forks them from a clean, single threaded server process instead, or else they are spawned.
+    # Either way they import what they run again, so only picklable arguments can be handed to them,
+    # and module settings patched in the worker don't apply to them.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
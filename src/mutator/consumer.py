@@ -1,16 +1,30 @@
 import logging
 import threading
 from queue import Queue, Empty
-from typing import Dict
+from typing import Optional
 
 from requests import Session
 from sqlalchemy.orm.scoping import ScopedSession
 
 from src.common.test_result.test_result import TestResult
+from src.mutator.common.utils.persistent_queue.ack_tracker import AckTracker
 from src.mutator.generator.test import Test
 from src.mutator.result_processor.service import result_processor_service
+from src.mutator.result_processor.service.result_processor_service import (
+    TestRunValidators,
+)
+from src.mutator.result_processor.service.result_writer import ResultWriter
+from src.mutator.result_processor.validations.latency_outlier import LatencyBaseline
+from src.mutator.result_processor.validations.regression import RegressionBaseline
 from src.mutator.runner import test_runner
-from src.mutator.runner.hash_strategy import HashStrategy
+from src.mutator.runner.adaptive_concurrency import AdaptiveConcurrency
+from src.mutator.runner.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    is_open,
+)
+from src.mutator.runner.field_matcher import build_field_matcher
+from src.mutator.runner.retry_queue import RetryableRequestError, RetryQueue
 
 
 def consumer(
@@ -19,9 +33,22 @@ def consumer(
     new_validation_config,
     stop_threads: threading.Event,
     db_session: ScopedSession,
+    ack_tracker: AckTracker = None,
+    concurrency: AdaptiveConcurrency = None,
+    circuit_breaker: CircuitBreaker = None,
+    retry_queue: RetryQueue = None,
+    result_writer: ResultWriter = None,
+    regression_baseline: RegressionBaseline = None,
+    latency_baseline: LatencyBaseline = None,
 ):
     test_run_counter = 0
     test_persisted_counter = 0
+    test_retry_counter = 0
+    # Shared with the other consumers of the worker, so any of them can run a retry once it is due
+    if retry_queue is None:
+        retry_queue = RetryQueue()
+    # Once the worker queue has no more tests, the consumer keeps running the retries that are left
+    worker_queue_ended = False
     logging.debug("Consumer: Pulling tests from worker queue.")
     request_session = Session()
     regression_config = new_validation_config.get("Regression")
@@ -29,87 +56,173 @@ def consumer(
         field_matcher = build_field_matcher(regression_config)
     else:
         field_matcher = None
+    validators = result_processor_service.build_validators(
+        new_validation_config, regression_baseline, latency_baseline
+    )
 
     while not stop_threads.is_set():
         try:
-            logging.debug("Pulling message from worker queue.")
-            logging.debug(
-                f"Worker queue size before consumer pulled item: {test_queue.qsize()}"
-            )
-            test: Test = test_queue.get(
-                block=True, timeout=consumer_worker_queue_blocking_seconds
+            test: Test = get_test(
+                test_queue,
+                retry_queue,
+                consumer_worker_queue_blocking_seconds,
+                worker_queue_ended,
             )
             if test is None:
-                logging.warning("Worker queue empty, no more tests to pull. ")
-                break
+                if not worker_queue_ended:
+                    logging.warning("Worker queue empty, no more tests to pull. ")
+                    worker_queue_ended = True
+                if not retry_queue.has_pending():
+                    break
+                continue
 
-            logging.debug(
-                f"Worker queue size after consumer pulled item: {test_queue.qsize()} "
-            )
             logging.debug(f"Consumer pulled raw message from queue: {test.__dict__} ")
             test_run_id = test.test_run_id
             logging.debug(f"Consumer: Running test for {test_run_id}.")
-            test_result: TestResult = test_runner.run(
-                test, field_matcher, request_session
-            )
-            test_run_counter += 1
-            if test_result is not None:
-                test_result.test_run_id = test_run_id
-                test_result.test_type = test.test_type
-                test_result.test_value = test.test_value
-                try:
-                    logging.debug(
-                        f"Attempting to process test result: {test_result.__dict__}"
-                    )
-
-                    with db_session() as session:
-                        result_processor_service.process_test_result(
-                            test_result, new_validation_config, session
-                        )
-                    test_persisted_counter += 1
-                except Exception as e:
-                    logging.exception(
-                        f"Issue while validating and persisting test result: {e}"
-                    )
-            else:
-                logging.warning(
-                    f"INVESTIGATE THIS: There is no test result for test: {test}. This should not happen."
+            if concurrency is not None and not concurrency.acquire_unless_stopped(
+                stop_threads
+            ):
+                break
+            try:
+                test_result: TestResult = test_runner.run(
+                    test, field_matcher, request_session, concurrency, circuit_breaker
                 )
+            except RetryableRequestError as e:
+                if isinstance(e, CircuitOpenError) or is_open(circuit_breaker):
+                    # The target is down, the test waits for it without using up a retry
+                    retry_queue.schedule(test, 0)
+                    continue
+                # A test that is out of retries stops the test run
+                if not retry_queue.schedule_retry(test, e):
+                    raise
+                test_retry_counter += 1
+                continue
+            finally:
+                if concurrency is not None:
+                    concurrency.release()
+            test_run_counter += 1
+            if process_test_result(
+                test, test_result, validators, db_session, result_writer
+            ):
+                test_persisted_counter += 1
+            if ack_tracker is not None:
+                ack_tracker.finish(test.sequence)
+            retry_queue.finish()
             logging.debug(f"Consumer: Finished running test for {test_run_id}")
         except Empty:
+            if retry_queue.has_pending() or is_open(circuit_breaker):
+                # Waited until a retry was due, or for the queue reader while the circuit is open.
+                # Tests that other consumers are still running could need a retry as well.
+                continue
             logging.debug(
                 "Caught Empty Exception in worker queue. No more tests to pull."
             )
             break
         except Exception as e:
             logging.exception(
-                "General Exception in consumer. Exiting consumer and stopping test run.",
-                e,
+                f"General Exception in consumer. Exiting consumer and stopping test run: {e}"
             )
             stop_threads.set()
 
     # End Consumer
     logging.info(
-        f"Consumer Stats. Tests ran: {test_run_counter}. Tests persisted: {test_persisted_counter}"
+        f"Consumer Stats. Tests ran: {test_run_counter}. Tests persisted: {test_persisted_counter}. "
+        f"Test requests retried: {test_retry_counter}"
     )
     request_session.close()
     if not stop_threads.is_set():
         stop_threads.set()
 
 
-def build_field_matcher(hash_generation: Dict):
-    field_names = hash_generation.get("field_names")
-    hash_strategy = hash_generation.get("strategy")
+def get_test(
+    test_queue: Queue,
+    retry_queue: RetryQueue,
+    consumer_worker_queue_blocking_seconds,
+    worker_queue_ended: bool,
+) -> Optional[Test]:
+    # A retry that is due comes before the next test from the worker queue.
+    # Once the worker queue has ended, waits for the next retry instead, None if none was due.
+    test: Test = retry_queue.pop_due()
+    if test is not None:
+        return test
+    if worker_queue_ended:
+        retry_queue.wait(consumer_worker_queue_blocking_seconds)
+        return retry_queue.pop_due()
+    logging.debug("Pulling message from worker queue.")
+    logging.debug(
+        f"Worker queue size before consumer pulled item: {test_queue.qsize()}"
+    )
+    # Stops waiting for the worker queue once a retry is due
+    test = test_queue.get(
+        block=True,
+        timeout=retry_queue.seconds_until_due(consumer_worker_queue_blocking_seconds),
+    )
+    logging.debug(
+        f"Worker queue size after consumer pulled item: {test_queue.qsize()} "
+    )
+    if test is not None:
+        retry_queue.start()
+    return test
+
 
-    if hash_strategy == HashStrategy.INCLUDE_EXACT_MATCH.name:
-        field_names_set = set(field_names)
-        return lambda p, k, v: k in field_names_set
-    elif hash_strategy == HashStrategy.EXCLUDE_EXACT_MATCH.name:
-        field_names_set = set(field_names)
-        return lambda p, k, v: k not in field_names_set
-    elif hash_strategy == HashStrategy.EXCLUDE_PARTIAL_MATCH.name:
-        return lambda p, k, v: not any(
-            field_name in str(k) for field_name in field_names
+def process_test_result(
+    test: Test,
+    test_result: TestResult,
+    validators: TestRunValidators,
+    db_session: ScopedSession,
+    result_writer: ResultWriter = None,
+) -> bool:
+    # Validates and persists the result, returns True if it was persisted.
+    # With a result writer, returns True once the validated result is handed to it to persist,
+    # and a result that is not handed to it is skipped, so its test is acked all the same.
+    if test_result is None:
+        logging.warning(
+            f"INVESTIGATE THIS: There is no test result for test: {test}. This should not happen."
         )
-    else:
-        return None
+        if result_writer is not None:
+            result_writer.skip(test.sequence)
+        return False
+    add_test_details(test, test_result)
+    if result_writer is not None:
+        return write_test_result(
+            test, test_result, validators, db_session, result_writer
+        )
+    try:
+        logging.debug(f"Attempting to process test result: {test_result.__dict__}")
+
+        with db_session() as session:
+            result_processor_service.process_test_result(
+                test_result, validators, session
+            )
+        return True
+    except Exception as e:
+        logging.exception(f"Issue while validating and persisting test result: {e}")
+        return False
+
+
+def write_test_result(
+    test: Test,
+    test_result: TestResult,
+    validators: TestRunValidators,
+    db_session: ScopedSession,
+    result_writer: ResultWriter,
+) -> bool:
+    try:
+        result_processor_service.validate_test_result(test_result, validators)
+        with db_session() as session:
+            result_processor_service.validate_regression(
+                test_result, validators, session
+            )
+    except Exception as e:
+        logging.exception(f"Issue while validating test result: {e}")
+        result_writer.skip(test.sequence)
+        return False
+    result_writer.put(test_result, test.sequence)
+    return True
+
+
+def add_test_details(test: Test, test_result: TestResult) -> None:
+    test_result.test_run_id = test.test_run_id
+    test_result.test_type = test.test_type
+    test_result.test_value = test.test_value
+    test_result.retries = test.retries
@@ -0,0 +1,151 @@
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+# Path indexed body mutations.
+# Every node in a request body is addressed by the path of its parent and its own key,
+# the same (path, key) pair that boltons remap hands to visit().
+# A mutation only rebuilds the containers on the spine from the root to the parent of
+# the addressed node, every other subtree is shared with the original body.
+# The original body is never altered.
+# The base request body is frozen once per test run, so that any accidental in place
+# change to a shared subtree raises instead of leaking into other tests.
+
+Body = Union[Dict, List]
+
+
+class FrozenDict(dict):
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Request body is shared between tests and cannot be altered.")
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+
+class FrozenList(list):
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Request body is shared between tests and cannot be altered.")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+    append = extend = insert = pop = remove = clear = sort = reverse = _immutable
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return self.__class__, (list(self),)
+
+
+def freeze(value: Any) -> Any:
+    # Serializes exactly like the original value, json.dumps treats these as dict and list
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+def index_body(body: Body) -> List[Dict]:
+    # Same order as remap: children are listed before the container holding them
+    items: List[Dict] = []
+    if is_container(body):
+        _index_container((), body, items)
+    return items
+
+
+def _index_container(path: Tuple, container: Body, items: List[Dict]) -> None:
+    for key, value in get_children(container):
+        if is_container(value):
+            _index_container(path + (key,), value, items)
+        items.append({"path": path, "key": key, "value": value})
+
+
+def replace_value(body: Body, path: Tuple, key: Any, new_value: Any) -> Body:
+    def mutate(parent):
+        if not has_child(parent, key):
+            return parent
+        new_parent = shallow_copy(parent)
+        new_parent[key] = new_value
+        return new_parent
+
+    return rebuild_spine(body, path, mutate)
+
+
+def replace_key(body: Body, path: Tuple, key: Any, new_key: Any) -> Body:
+    def mutate(parent):
+        # List indexes can't be renamed, remap also ignores new keys for sequences
+        if not isinstance(parent, dict) or key not in parent:
+            return parent
+        # Keep the field in its original position.
+        # If the new key already exists, the last value wins, same as dict.update()
+        return {(new_key if k == key else k): v for k, v in parent.items()}
+
+    return rebuild_spine(body, path, mutate)
+
+
+def remove_key(body: Body, path: Tuple, key: Any) -> Body:
+    def mutate(parent):
+        if not has_child(parent, key):
+            return parent
+        new_parent = shallow_copy(parent)
+        del new_parent[key]
+        return new_parent
+
+    return rebuild_spine(body, path, mutate)
+
+
+def rebuild_spine(body: Body, path: Tuple, mutate: Callable[[Body], Body]) -> Body:
+    # Walk down to the parent of the addressed node, keeping track of the spine
+    spine: List[Tuple[Body, Any]] = []
+    current = body
+    for key in path:
+        if not has_child(current, key) or not is_container(current[key]):
+            # Path does not exist in this body, nothing to mutate
+            return body
+        spine.append((current, key))
+        current = current[key]
+
+    new_node = mutate(current)
+    if new_node is current:
+        return body
+
+    # Copy only the containers on the way back up to the root
+    for parent, key in reversed(spine):
+        new_parent = shallow_copy(parent)
+        new_parent[key] = new_node
+        new_node = new_parent
+    return new_node
+
+
+def get_children(container: Body):
+    if isinstance(container, dict):
+        return container.items()
+    return enumerate(container)
+
+
+def has_child(container: Body, key: Any) -> bool:
+    if isinstance(container, dict):
+        return key in container
+    if isinstance(container, list):
+        return isinstance(key, int) and 0 <= key < len(container)
+    return False
+
+
+def is_container(value: Any) -> bool:
+    return isinstance(value, (dict, list))
+
+
+def shallow_copy(container: Body) -> Body:
+    if isinstance(container, dict):
+        return dict(container)
+    return list(container)
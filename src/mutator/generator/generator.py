@@ -2,11 +2,16 @@ import copy
 import json
 import logging
 import os
-import uuid
+import pathlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from configparser import ConfigParser
+from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import islice
 from numbers import Number
 from queue import Queue
-from typing import Any, Dict, Union, Tuple, List
+from typing import Any, Deque, Dict, Iterator, Union, Tuple, List
 from urllib.parse import (
     parse_qs,
     unquote_plus,
@@ -17,20 +22,36 @@ from urllib.parse import (
     parse_qsl,
 )
 
-from boltons.iterutils import remap
-
 from src.common.database.test_run import TestRun
 from src.common.test_configuration import TestConfiguration
-from src.mutator.common.test_value_storage.test_repository import TestRepository
-from src.mutator.common.utils.hash import hash_object
+from src.mutator.common.test_value_storage.test_repository import (
+    TestRepository,
+    TestValueChunk,
+)
+from src.mutator.common.utils.hash import hash_object, hash_test
 from src.mutator.common.utils.persistent_queue.dao.queue_item import QueueItem
+from src.mutator.common.utils.process_context import get_process_context
+from src.mutator.generator import body_mutation
+from src.mutator.generator.mutation_location import MutationLocation
+from src.mutator.generator.mutation_operation import MutationOperation
 from src.mutator.generator.test import Test
 from src.mutator.generator.test_types import TestType
 
 log = logging.getLogger()
 
+config = ConfigParser()
+config.read(
+    pathlib.Path(os.path.abspath(__file__)).parents[1].__str__() + "/config/config.ini"
+)
+generator_processes: int = config.getint("generator", "generator_processes")
+generator_chunk_size: int = config.getint("generator", "generator_chunk_size")
+test_hash_version: int = config.getint("generator", "test_hash_version")
+
 
-def generate(test_repository: TestRepository, test: TestRun, queue: Queue) -> int:
+def generate(
+    test_repository: TestRepository, test: TestRun, queue: Queue, processes: int = None
+) -> int:
+    # processes overrides generator_processes, 1 generates in the calling process
     logging.debug(
         f"Running generator for test run id: {test.id} for test: {test.__dict__}"
     )
@@ -42,13 +63,22 @@ def generate(test_repository: TestRepository, test: TestRun, queue: Queue) -> in
     try:
         base_test_configuration = TestConfiguration()
         base_test_configuration.method = incoming_endpoint.get("method", None)
-        base_test_configuration.headers = incoming_endpoint.get("headers", None)
+        # Headers and body are shared by every generated test, so freeze them once
+        base_test_configuration.headers = body_mutation.freeze(
+            incoming_endpoint.get("headers", None)
+        )
         base_test_configuration.url = incoming_endpoint.get("url", None)
-        base_test_configuration.body = incoming_endpoint.get("body", None)
+        base_test_configuration.body = body_mutation.freeze(
+            incoming_endpoint.get("body", None)
+        )
         base_test_configuration.test_run_id = test_run_id
         base_test_configuration.test_repository = test_repository
+        base_test_configuration.test_hash_version = get_test_hash_version(test)
+        base_test_configuration.request_fingerprint = create_request_fingerprint(
+            base_test_configuration
+        )
 
-        test_count: int = process_test(base_test_configuration, queue)
+        test_count: int = process_test_values(base_test_configuration, queue, processes)
     except Exception as e:
         logging.exception(f"Error with configured endpoint {incoming_endpoint}: {e}")
     end_time = datetime.utcnow()
@@ -61,6 +91,184 @@ def generate(test_repository: TestRepository, test: TestRun, queue: Queue) -> in
     return test_count
 
 
+def count(test_repository: TestRepository, test: TestRun) -> int:
+    # Counts the tests that generate() creates for a test run, without building them.
+    # Must follow the same rules as process_test.
+    incoming_endpoint = test.endpoint
+    test_count = 0
+    try:
+        parsed_url = urlparse(incoming_endpoint.get("url", None))
+        body = incoming_endpoint.get("body", None)
+        keysets: list = get_keyset(body) if body else []
+
+        # Test values of the same type always create the same amount of tests
+        test_counts_per_type: Dict[str, int] = {}
+        for test_type, test_value in test_repository.get_test_value():  # type: ignore
+            if body:
+                # Fails for the same test values that process_body fails for
+                get_as_type(test_type, test_value)
+            if test_type not in test_counts_per_type:
+                test_counts_per_type[test_type] = count_url_tests(
+                    parsed_url, test_type
+                ) + count_body_tests(keysets, test_type)
+            test_count += test_counts_per_type[test_type]
+    except Exception as e:
+        logging.exception(f"Error with configured endpoint {incoming_endpoint}: {e}")
+        return 0
+    logging.debug(f"Counted {test_count} tests for test run id {test.id}.")
+    return test_count
+
+
+def count_url_tests(parsed_url: ParseResult, test_type: str) -> int:
+    url_test_count = 0
+    parsed_resources = parsed_url.path.split("/")
+    if should_process_resources(parsed_resources):
+        # First item is the empty string in front of the leading slash
+        url_test_count += len(parsed_resources) - 1
+
+    for values in get_query_parameters(parsed_url).values():
+        for value in values:
+            if should_remove_entity(test_type):
+                url_test_count += 1
+            elif is_comma_separated_parameter_array(value):
+                # Key test, and a value test for every item in the array
+                url_test_count += 1 + len(value.split(","))
+            else:
+                # Key test and value test
+                url_test_count += 2
+    return url_test_count
+
+
+def count_body_tests(keysets: list, test_type: str) -> int:
+    if should_remove_entity(test_type):
+        return len(keysets)
+
+    body_test_count = len(keysets)
+    if test_type == "STRING":
+        # Key tests, list indexes are skipped
+        body_test_count += sum(
+            1 for keyset in keysets if not isinstance(keyset.get("key"), Number)
+        )
+    return body_test_count
+
+
+# Collects the tests generated in a generator process, to be sent back to the worker process
+@dataclass
+class GeneratedTests:
+    tests: List[Tuple[Dict, Dict]] = field(default_factory=list)
+
+    def put(self, queue_item: QueueItem) -> None:
+        self.tests.append((queue_item.test, queue_item.mutation))
+
+
+def process_test_values(
+    base_test_configuration: TestConfiguration, queue: Queue, processes: int = None
+) -> int:
+    if processes is None:
+        processes = get_generator_processes()
+    if processes <= 1:
+        return process_test(base_test_configuration, queue)
+
+    chunks = get_test_value_chunks(
+        base_test_configuration.test_repository, generator_chunk_size
+    )
+    first_chunk = next(chunks, [])
+    second_chunk = next(chunks, None)
+    if second_chunk is None:
+        # Not worth starting processes for a single chunk
+        test_configuration: TestConfiguration = copy.copy(base_test_configuration)
+        test_configuration.test_repository = TestValueChunk(first_chunk)
+        return process_test(test_configuration, queue)
+
+    return process_test_parallel(
+        base_test_configuration,
+        queue,
+        processes,
+        [first_chunk, second_chunk],
+        chunks,
+    )
+
+
+def process_test_parallel(
+    base_test_configuration: TestConfiguration,
+    queue: Queue,
+    processes: int,
+    first_chunks: List[List[Tuple[str, str]]],
+    chunks: Iterator[List[Tuple[str, str]]],
+) -> int:
+    logging.debug(f"Generating tests with {processes} processes.")
+    generated_test_count = 0
+    with ProcessPoolExecutor(
+        max_workers=processes, mp_context=get_process_context()
+    ) as executor:
+        pending: Deque[Future] = deque()
+        try:
+            for chunk in first_chunks:
+                pending.append(
+                    executor.submit(process_chunk, base_test_configuration, chunk)
+                )
+            for chunk in chunks:
+                pending.append(
+                    executor.submit(process_chunk, base_test_configuration, chunk)
+                )
+                # Only keep a few chunks in flight, so generated tests don't pile up in memory
+                # while the queue is blocked
+                if len(pending) >= processes * 2:
+                    generated_test_count += queue_generated_tests(
+                        pending.popleft().result(), queue
+                    )
+            # Results are queued in the order the chunks were read,
+            # so tests end up in the same order as when generating in one process
+            while pending:
+                generated_test_count += queue_generated_tests(
+                    pending.popleft().result(), queue
+                )
+        except Exception:
+            for future in pending:
+                future.cancel()
+            raise
+    return generated_test_count
+
+
+def process_chunk(
+    base_test_configuration: TestConfiguration, test_values: List[Tuple[str, str]]
+) -> Tuple[int, List[Tuple[Dict, Dict]]]:
+    # Runs in a generator process
+    test_configuration: TestConfiguration = copy.copy(base_test_configuration)
+    test_configuration.test_repository = TestValueChunk(test_values)
+    generated_tests = GeneratedTests()
+    generated_test_count = process_test(test_configuration, generated_tests)
+    return generated_test_count, generated_tests.tests
+
+
+def queue_generated_tests(
+    generated: Tuple[int, List[Tuple[Dict, Dict]]], queue: Queue
+) -> int:
+    generated_test_count, tests = generated
+    for test_data, mutation in tests:
+        test = Test()
+        test.__dict__.update(test_data)
+        persist_test(test, queue, mutation)
+    return generated_test_count
+
+
+def get_test_value_chunks(
+    test_repository: TestRepository, chunk_size: int
+) -> Iterator[List[Tuple[str, str]]]:
+    test_values = test_repository.get_test_value()
+    while True:
+        chunk = list(islice(test_values, chunk_size))  # type: ignore
+        if not chunk:
+            return
+        yield chunk
+
+
+def get_generator_processes() -> int:
+    if generator_processes == 0:
+        return os.cpu_count() or 1
+    return generator_processes
+
+
 def process_test(base_test_configuration: TestConfiguration, queue: Queue) -> int:
     url = base_test_configuration.url
     parsed_url = urlparse(url)
@@ -72,7 +280,8 @@ def process_test(base_test_configuration: TestConfiguration, queue: Queue) -> in
     # use test value as substituted for each field and value in test
     # If test type is REMOVE then a field will be removed as part of the test
     for test_type, test_value in test_repository.get_test_value():  # type: ignore
-        test_configuration: TestConfiguration = copy.deepcopy(base_test_configuration)
+        # Shallow copy, the frozen base request is shared and never altered in place
+        test_configuration: TestConfiguration = copy.copy(base_test_configuration)
         test_configuration.test_type = test_type
         test_configuration.test_value = test_value
         logging.debug(f"Generating test using value {test_value}, of type {test_type}.")
@@ -94,8 +303,15 @@ def process_test(base_test_configuration: TestConfiguration, queue: Queue) -> in
                             parsed_url, query_param
                         )
                         test_context = json.dumps(query_param)
-                        test: Test = build_test(test_configuration, test_context)
-                        if persist_test(test, queue):
+                        mutation = create_mutation(
+                            MutationLocation.QUERY,
+                            MutationOperation.REMOVE,
+                            parameter=query_param,
+                        )
+                        test: Test = build_test(
+                            test_configuration, test_context, mutation
+                        )
+                        if persist_test(test, queue, mutation):
                             generated_test_count += 1
                 else:
                     # Route normal query parameters and different forms of query parameter array's
@@ -154,14 +370,17 @@ def process_resources(test_configuration: TestConfiguration, queue: Queue) -> in
 
         if should_remove_entity(test_configuration.test_type):
             test_configuration.url = remove_resource(parsed_url, new_resource, i)
+            operation = MutationOperation.REMOVE
         else:
             test_configuration.url = replace_resource(
                 parsed_url, new_resource, i, test_configuration.test_value
             )
+            operation = MutationOperation.REPLACE_VALUE
 
         test_context = str(i) + resource_section
-        test: Test = build_test(test_configuration, test_context)
-        if persist_test(test, queue):
+        mutation = create_mutation(MutationLocation.RESOURCE, operation, index=i)
+        test: Test = build_test(test_configuration, test_context, mutation)
+        if persist_test(test, queue, mutation):
             generated_tests += 1
         # Reset original value
         test_configuration.url = original_url
@@ -208,9 +427,14 @@ def process_query_parameter(
         test_configuration.test_value, query_parameter, url
     )
     test_context = "key" + json.dumps(query_parameter)
-    test: Test = build_test(test_configuration, test_context)
+    mutation = create_mutation(
+        MutationLocation.QUERY,
+        MutationOperation.REPLACE_KEY,
+        parameter=query_parameter,
+    )
+    test: Test = build_test(test_configuration, test_context, mutation)
 
-    if persist_test(test, queue):
+    if persist_test(test, queue, mutation):
         generated_tests += 1
 
     # Reset URL
@@ -221,9 +445,14 @@ def process_query_parameter(
         test_configuration.test_value, query_parameter, url
     )
     test_context = "value" + json.dumps(query_parameter)
-    test: Test = build_test(test_configuration, test_context)
+    mutation = create_mutation(
+        MutationLocation.QUERY,
+        MutationOperation.REPLACE_VALUE,
+        parameter=query_parameter,
+    )
+    test: Test = build_test(test_configuration, test_context, mutation)
 
-    if persist_test(test, queue):
+    if persist_test(test, queue, mutation):
         generated_tests += 1
 
     # Reset URL
@@ -251,9 +480,14 @@ def process_query_parameter_array(
             test_configuration.test_value, query_parameter, original_url
         )
         test_context = k + json.dumps(query_parameter)
-        test: Test = build_test(test_configuration, test_context)
+        mutation = create_mutation(
+            MutationLocation.QUERY_ARRAY,
+            MutationOperation.REPLACE_KEY,
+            parameter=query_parameter,
+        )
+        test: Test = build_test(test_configuration, test_context, mutation)
 
-        if persist_test(test, queue):
+        if persist_test(test, queue, mutation):
             generated_tests += 1
 
         # Reset Url
@@ -269,9 +503,15 @@ def process_query_parameter_array(
                     original_url,
                 )
                 test_context = key + str(parameter_value_index) + current_value
-                test: Test = build_test(test_configuration, test_context)
+                mutation = create_mutation(
+                    MutationLocation.QUERY_ARRAY,
+                    MutationOperation.REPLACE_VALUE,
+                    parameter=query_parameter,
+                    index=parameter_value_index,
+                )
+                test: Test = build_test(test_configuration, test_context, mutation)
 
-                if persist_test(test, queue):
+                if persist_test(test, queue, mutation):
                     generated_tests += 1
 
                 # Reset Url
@@ -392,9 +632,10 @@ def process_body(
     test_configuration: TestConfiguration,
     queue: Queue,
 ):
+    # Mutations only copy the path to the mutated field,
+    # the rest of the test body is shared with the original body
     body = test_configuration.body
-
-    original_body = copy.deepcopy(body)
+    original_body = body
     generated_tests = 0
     test_type = test_configuration.test_type
     test_value = test_configuration.test_value
@@ -403,14 +644,14 @@ def process_body(
     keysets: list = get_keyset(body)
     for keyset in keysets:
         if should_remove_entity(test_type):
-            body_to_update = copy.deepcopy(original_body)
-            test_configuration.body = remove_body_key(body_to_update, keyset)
+            test_configuration.body = remove_body_key(original_body, keyset)
             test_context = json.dumps(keyset)
-            test: Test = build_test(test_configuration, test_context)
-            if persist_test(test, queue):
+            mutation = create_body_mutation(MutationOperation.REMOVE, keyset)
+            test: Test = build_test(test_configuration, test_context, mutation)
+            if persist_test(test, queue, mutation):
                 generated_tests += 1
             # Reset body
-            test_configuration.body = copy.deepcopy(original_body)
+            test_configuration.body = original_body
         else:
             # Need to check if item is actually index of list.
             # Don't want "key test" for every item in list, but only once for the whole list.
@@ -418,105 +659,58 @@ def process_body(
             keyset_key = keyset.get("key")
             # Limit to test type of STRING as JSON keys must be strings
             if not isinstance(keyset_key, Number) and test_type == "STRING":
-                body_to_update = copy.deepcopy(original_body)
                 test_configuration.body = replace_body_key(
-                    body_to_update, keyset, converted_test_value
+                    original_body, keyset, converted_test_value
                 )
                 test_context = json.dumps(keyset)
-                test: Test = build_test(test_configuration, test_context)
-                if persist_test(test, queue):
+                mutation = create_body_mutation(MutationOperation.REPLACE_KEY, keyset)
+                test: Test = build_test(test_configuration, test_context, mutation)
+                if persist_test(test, queue, mutation):
                     generated_tests += 1
                 # Reset body
-                test_configuration.body = copy.deepcopy(original_body)
+                test_configuration.body = original_body
 
-            body_to_update = copy.deepcopy(original_body)
             test_configuration.body = replace_body_value(
-                body_to_update, keyset, converted_test_value
+                original_body, keyset, converted_test_value
             )
             test_context = json.dumps(keyset)
-            test: Test = build_test(test_configuration, test_context)
-            if persist_test(test, queue):
+            mutation = create_body_mutation(MutationOperation.REPLACE_VALUE, keyset)
+            test: Test = build_test(test_configuration, test_context, mutation)
+            if persist_test(test, queue, mutation):
                 generated_tests += 1
             # Reset body
-            test_configuration.body = copy.deepcopy(original_body)
+            test_configuration.body = original_body
     logging.debug(f"Generated {generated_tests} body tests.")
     return generated_tests
 
 
 def get_keyset(d):
-    items = []
-
-    def visit(path, key, value):
-        items.append({"path": path, "key": key, "value": value})
-        return key, value
-
-    remap(d, visit=visit)
-    return items
+    return body_mutation.index_body(d)
 
 
 def remove_body_key(d, keyset):
-    # Will remap everything except matching key. Similar to:
-    # https://sedimental.org/remap.html#drop-empty-values
-    # return remap(d, visit=lambda p, k, v: k != keyset.get("key"))
-    def visit(path, key, value):
-        if (
-            path == keyset.get("path")
-            and key == keyset.get("key")
-            and value == keyset.get("value")
-        ):
-            return False
-        else:
-            return True
-
-    return remap(d, visit=visit, reraise_visit=False)
+    return body_mutation.remove_key(d, keyset.get("path"), keyset.get("key"))
 
 
 def replace_body_key(d, keyset, test_value):
-    def visit(path, key, value):
-        if (
-            path == keyset.get("path")
-            and key == keyset.get("key")
-            and value == keyset.get("value")
-        ):
-            return test_value, value
-        return key, value
-
-    return remap(d, visit=visit)
+    return body_mutation.replace_key(
+        d, keyset.get("path"), keyset.get("key"), test_value
+    )
 
 
 def replace_body_value(d, keyset, test_value):
-    def visit(path, key, value):
-        if (
-            path == keyset.get("path")
-            and key == keyset.get("key")
-            and value == keyset.get("value")
-        ):
-            return key, test_value
-        return key, value
-
-    return remap(d, visit=visit)
+    return body_mutation.replace_value(
+        d, keyset.get("path"), keyset.get("key"), test_value
+    )
 
 
-def build_test(test_configuration, test_context: str) -> Test:
+def build_test(test_configuration, test_context: str, mutation: Dict) -> Test:
     test = Test()
     test.test_run_id = test_configuration.test_run_id
     test.test_type = test_configuration.test_type
     test.test_value = test_configuration.test_value
-    # should only use values that are constant between test runs to fingerprint a request
-    # hash can be used to track responses between test runs
-    test.test_hash = hash_object(
-        json.dumps(
-            {
-                "test_type": test_configuration.test_type,
-                "test_value": test_configuration.test_value,
-                "test_context": test_context,
-                "request": {
-                    "method": test_configuration.method,
-                    "url": test_configuration.url,
-                    "body": test_configuration.body,
-                },
-            }
-        )
+    test.test_hash = create_test_hash(
+        test_configuration, test_context, mutation.get("operation")
     )
     test.method = test_configuration.method
     test.url = test_configuration.url
@@ -531,13 +725,111 @@ def build_test(test_configuration, test_context: str) -> Test:
     return test
 
 
-def persist_test(test: Test, queue: Queue) -> bool:
+def create_test_hash(test_configuration, test_context: str, operation: str) -> str:
+    # should only use values that are constant between test runs to fingerprint a request
+    # hash can be used to track responses between test runs
+    if test_configuration.test_hash_version == 1:
+        return hash_object(
+            json.dumps(
+                {
+                    "test_type": test_configuration.test_type,
+                    "test_value": test_configuration.test_value,
+                    "test_context": test_context,
+                    "request": {
+                        "method": test_configuration.method,
+                        "url": test_configuration.url,
+                        "body": test_configuration.body,
+                    },
+                }
+            )
+        )
+    # The test context locates the mutation in the request, the operation tells key and value tests
+    # for the same body field apart. Together with the original request they identify the test request.
+    return hash_test(
+        test_configuration.request_fingerprint,
+        [
+            test_configuration.test_type,
+            test_configuration.test_value,
+            test_context,
+            operation,
+        ],
+    )
+
+
+def create_request_fingerprint(base_test_configuration) -> Union[str, None]:
+    if base_test_configuration.test_hash_version == 1:
+        return None
+    return hash_object(
+        json.dumps(
+            {
+                "method": base_test_configuration.method,
+                "url": base_test_configuration.url,
+                "body": base_test_configuration.body,
+            }
+        )
+    )
+
+
+def get_test_hash_version(test: TestRun) -> int:
+    version = (test.config or {}).get("test_hash_version")
+    return test_hash_version if version is None else version
+
+
+def create_mutation(
+    location: MutationLocation, operation: MutationOperation, **target
+) -> Dict:
+    # Describes how a test changes the test run request, so the test request can be built again later.
+    # See build_test_request.
+    return {"location": location.value, "operation": operation.value, **target}
+
+
+def create_body_mutation(operation: MutationOperation, keyset: Dict) -> Dict:
+    return create_mutation(
+        MutationLocation.BODY,
+        operation,
+        path=list(keyset.get("path")),
+        key=keyset.get("key"),
+    )
+
+
+def build_test_request(test_data: Dict, endpoint: Dict) -> Test:
+    # Builds a test stored without its request body, from the test run request and the stored mutation.
+    # The url is small and stored with the test, so only the body has to be built again.
+    mutation: Dict = test_data.get("mutation")
+    body = endpoint.get("body")
+    if mutation.get("location") == MutationLocation.BODY.value:
+        operation = MutationOperation(mutation.get("operation"))
+        keyset = {"path": tuple(mutation.get("path")), "key": mutation.get("key")}
+        if operation == MutationOperation.REMOVE:
+            body = remove_body_key(body, keyset)
+        else:
+            converted_test_value = get_as_type(
+                test_data.get("test_type"), test_data.get("test_value")
+            )
+            if operation == MutationOperation.REPLACE_KEY:
+                body = replace_body_key(body, keyset, converted_test_value)
+            else:
+                body = replace_body_value(body, keyset, converted_test_value)
+
+    test = Test()
+    test.test_run_id = test_data.get("test_run_id")
+    test.test_type = test_data.get("test_type")
+    test.test_value = test_data.get("test_value")
+    test.test_hash = test_data.get("test_hash")
+    test.method = endpoint.get("method")
+    test.headers = endpoint.get("headers")
+    test.url = test_data.get("url")
+    test.body = body
+    return test
+
+
+def persist_test(test: Test, queue: Queue, mutation: Dict = None) -> bool:
     try:
         queue_item = QueueItem()
-        queue_item.id = uuid.uuid4().hex
         queue_item.test_run_id = test.test_run_id
         queue_item.test_hash = test.test_hash
         queue_item.test = test.__dict__
+        queue_item.mutation = mutation
         queue_item.create_date = datetime.utcnow()
         if os.getenv("DRY_RUN"):
             logging.info(f"DRY_RUN: {json.dumps(test.__dict__)}")
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class MutationLocation(Enum):
+    RESOURCE = "RESOURCE"
+    QUERY = "QUERY"
+    QUERY_ARRAY = "QUERY_ARRAY"
+    BODY = "BODY"
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class MutationOperation(Enum):
+    REMOVE = "REMOVE"
+    REPLACE_KEY = "REPLACE_KEY"
+    REPLACE_VALUE = "REPLACE_VALUE"
@@ -11,3 +11,7 @@ class Test:
     headers: str
     url: str
     body: str
+    # Position in the persistent test queue, not set for streamed tests
+    sequence: int = None
+    # Times the test request has been retried, kept with its result
+    retries: int = 0
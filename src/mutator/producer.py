@@ -1,9 +1,11 @@
 import logging
 from queue import Queue
-from time import sleep
 
 from src.common.database.test_run import TestRun
 from src.mutator.common.test_value_storage.test_repository import TestRepository
+from src.mutator.common.utils.persistent_queue.buffer_queues.stream_writer import (
+    StreamWriter,
+)
 from src.mutator.generator import generator
 
 
@@ -17,9 +19,19 @@ def produce_tests(
     except Exception as e:
         logging.exception(f"Exception occurred when generating tests: {e}")
         raise e
-
-    # Give buffered writer time to finish, it flushes tests every 1 second
-    while buffer_queue.qsize() > 0:
-        sleep(2)
     logging.debug("Finished producing tests")
     return total_generated_tests
+
+
+def stream_tests(
+    test_config: TestRepository, test: TestRun, stream_writer: StreamWriter
+) -> int:
+    logging.debug("Starting to stream tests")
+    try:
+        # Blocks on the bounded worker queue while the consumers are busy
+        total_generated_tests = generator.generate(test_config, test, stream_writer)
+    except Exception as e:
+        logging.exception(f"Exception occurred when streaming tests: {e}")
+        raise e
+    logging.debug("Finished streaming tests")
+    return total_generated_tests
@@ -1,6 +1,7 @@
 import logging
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 
 from sqlalchemy.orm import Session
 from werkzeug.exceptions import InternalServerError
@@ -11,35 +12,72 @@ from src.common.test_result.test_result import TestResult
 
 # If import all validations is removed, validators will not be automatically loaded from validations folder
 from src.mutator.result_processor.validations import *  # noqa
-from src.mutator.result_processor.validations.regression import Regression
+from src.mutator.result_processor.validations.latency_outlier import (
+    LatencyBaseline,
+    LatencyOutlier,
+)
+from src.mutator.result_processor.validations.regression import (
+    Regression,
+    RegressionBaseline,
+)
 from src.mutator.result_processor.validations.validator import Validator
 
 
+@dataclass
+class TestRunValidators:
+    # The enabled validators of a test run, built once from its validation config
+    validators: List[Validator]
+    regression: Optional[Regression] = None
+
+
+def build_validators(
+    validation_config: Dict,
+    regression_baseline: RegressionBaseline = None,
+    latency_baseline: LatencyBaseline = None,
+) -> TestRunValidators:
+    validators: List[Validator] = get_enabled_validators(
+        validation_config, {LatencyOutlier.__name__: latency_baseline}
+    )
+    logging.debug(f"FOUND ENABLED VALIDATORS: {validators}")
+    # Special case for Regression Validator for now as it needs Session for DB Interaction,
+    # unless the previous response hashes of the test run are loaded in its baseline
+    regression_config = validation_config.get("Regression")
+    regression = (
+        Regression(regression_config, regression_baseline)
+        if regression_config is not None and regression_config.get("enabled")
+        else None
+    )
+    return TestRunValidators(validators, regression)
+
+
 def process_test_result(
-    test_result: TestResult, validation_config: Dict, session: Session
+    test_result: TestResult, validators: TestRunValidators, session: Session
 ) -> Dict:
     logging.debug("PROCESSING TEST RESULT")
     logging.debug(f"Received test result: {test_result.__dict__}")
 
     test_run_id = test_result.test_run_id
     logging.debug(f"Processing test result for test run id {test_run_id}.")
-    logging.debug(f"Fetching test run info from DB if not cached: {test_run_id}")
 
-    # Fetch and run enabled validations
-    validations: List[Validator] = get_enabled_validators(
-        test_result, validation_config
-    )
+    validate_test_result(test_result, validators)
+    return process_validated_test_result(test_result, validators, session)
 
-    # Special case for Regression Validator for now as it needs Session for DB Interaction
-    regression_config = validation_config.get("Regression")
-    if regression_config.get("enabled"):
-        regression_validator = Regression(test_result, regression_config, session)
-        validations.append(regression_validator)
-    logging.debug(f"FOUND ENABLED VALIDATORS: {validations}")
 
-    validation_responses = perform_validations(validations)
-    logging.debug(f"Validation Responses: {validation_responses}")
-    test_result.validations = validation_responses
+def validate_test_result(
+    test_result: TestResult, validators: TestRunValidators
+) -> None:
+    # Runs the validators that only need the test result
+    test_result.validations = perform_validations(validators.validators, test_result)
+    # Not persisted, so it isn't kept while the result waits to be written
+    test_result.response.raw_body = None
+
+
+def process_validated_test_result(
+    test_result: TestResult, validators: TestRunValidators, session: Session
+) -> Dict:
+    test_run_id = test_result.test_run_id
+    validate_regression(test_result, validators, session)
+    logging.debug(f"Validation Responses: {test_result.validations}")
 
     try:
         persist_test_result(test_result, session)
@@ -55,7 +93,20 @@ def process_test_result(
     return {"message_persisted": True}
 
 
-def get_enabled_validators(test_result: TestResult, validation_config: Dict):
+def validate_regression(
+    test_result: TestResult, validators: TestRunValidators, session: Session
+) -> None:
+    if validators.regression is not None:
+        test_result.validations = test_result.validations + perform_validations(
+            [validators.regression], test_result, session
+        )
+
+
+def get_enabled_validators(
+    validation_config: Dict, test_run_state: Dict[str, Any] = None
+) -> List[Validator]:
+    # test_run_state is passed to the validators that keep state for the whole test run, by validator name
+    test_run_state = test_run_state or {}
     validators = Validator.__subclasses__()
     logging.debug(f"Validator subclasses: {validators}")
 
@@ -75,22 +126,32 @@ def get_enabled_validators(test_result: TestResult, validation_config: Dict):
             logging.debug(
                 f"Creating validator: {validator} and inject validator config: {validator_config}"
             )
-            new_validator = validator(test_result, validator_config)  # noqa
+            state = test_run_state.get(validator.__name__)
+            new_validator = (
+                validator(validator_config or {})  # noqa
+                if state is None
+                else validator(validator_config or {}, state)  # noqa
+            )
             enabled_validators.append(new_validator)
     return enabled_validators
 
 
-def perform_validations(validations: List) -> List[ValidationResult]:
+def perform_validations(
+    validators: List[Validator], test_result: TestResult, session: Session = None
+) -> List[ValidationResult]:
     validation_responses: List[ValidationResult] = []
 
-    for validation in validations:
-        logging.debug(f"Performing validation: {validation}")
+    for validator in validators:
+        logging.debug(f"Performing validation: {validator}")
         try:
-            validation_response: ValidationResult = validation.__validate__()
+            if session is None:
+                validation_response: ValidationResult = validator.validate(test_result)
+            else:
+                validation_response = validator.validate(test_result, session)
             validation_responses.append(validation_response)
         except Exception as e:
             logging.exception(
-                f"INVESTIGATE THIS: Could not perform validation {validation}. Skipping for now. Exception {e}"
+                f"INVESTIGATE THIS: Could not perform validation {validator}. Skipping for now. Exception {e}"
             )
 
     logging.debug("Done with validations.")
@@ -135,6 +196,32 @@ def persist_test_result(test_result: TestResult, session: Session):
     )
 
 
+def persist_test_results(test_results: List[TestResult], session: Session):
+    # A batch of results is inserted at once, their ids come back with the insert,
+    # and their validations are saved in bulk, with one commit for the whole batch.
+    logging.debug(f"Persisting a batch of {len(test_results)} test results.")
+    results: List[Result] = []
+    for test_result in test_results:
+        result: Result = build_result(test_result)
+        if not validations_passed(test_result.validations):
+            result.passed = False
+        results.append(result)
+    session.add_all(results)
+    session.flush()
+
+    create_date = datetime.utcnow()
+    validations: List[ValidationResult] = []
+    for test_result, result in zip(test_results, results):
+        for validation in test_result.validations:
+            validation.test_result_id = result.id
+            validation.create_date = create_date
+            validations.append(validation)
+    session.bulk_save_objects(validations)
+
+    session.commit()
+    logging.debug(f"Finished persisting a batch of {len(test_results)} test results.")
+
+
 def validations_passed(validations: List[ValidationResult]) -> bool:
     valid = True
     if validations is not None:
@@ -161,6 +248,8 @@ def build_result(test_result: TestResult) -> Result:
     result.response_headers = test_result.response.headers
     result.response_body = test_result.response.body
     result.response_status_code = test_result.response.status_code
+    result.response_elapsed_time = test_result.response.elapsed_time
+    result.retries = test_result.retries
     result.create_date = datetime.utcnow()
     logging.debug(f"Built result: {result.__dict__}")
     return result
@@ -0,0 +1,128 @@
+import logging
+import os
+import pathlib
+from configparser import ConfigParser
+from dataclasses import dataclass, field
+from queue import Queue, Empty
+from time import monotonic
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm.scoping import ScopedSession
+
+from src.common.test_result.test_result import TestResult
+from src.mutator.common.utils.persistent_queue.ack_tracker import AckTracker
+from src.mutator.result_processor.service import result_processor_service
+
+config = ConfigParser()
+config.read(
+    pathlib.Path(os.path.abspath(__file__)).parents[2].__str__() + "/config/config.ini"
+)
+
+result_writer_batch_size: int = config.getint(
+    "result_writer", "result_writer_batch_size"
+)
+result_writer_batch_interval_seconds: float = (
+    config.getint("result_writer", "result_writer_batch_interval_ms") / 1000
+)
+result_writer_queue_size: int = config.getint(
+    "result_writer", "result_writer_queue_size"
+)
+
+# A validated test result, and the sequence of its test in the test queue
+ResultItem = Tuple[TestResult, Optional[int]]
+
+
+# Persists the validated results of the consumers of a test run, so consumers never wait on the database write lock.
+# Results are committed in batches of result_writer_batch_size, or whatever has been handed over once the oldest
+# unwritten result has waited result_writer_batch_interval_seconds. Tests are only acked once their result is committed,
+# and the writer keeps writing until it is closed, also when the test run is stopped, so no result handed to it is lost.
+@dataclass
+class ResultWriter:
+    db_session: ScopedSession
+    ack_tracker: AckTracker = None
+    result_queue: Queue = field(
+        default_factory=lambda: Queue(maxsize=result_writer_queue_size)
+    )
+    written_counter: int = 0
+
+    def put(self, test_result: TestResult, sequence: int = None) -> None:
+        # Waits for the writer while result_writer_queue_size results are waiting to be written
+        self.result_queue.put((test_result, sequence))
+
+    def skip(self, sequence: int = None) -> None:
+        # Acks a test whose result is deliberately not persisted, so it doesn't hold back the checkpoint
+        if self.ack_tracker is not None and sequence is not None:
+            self.ack_tracker.finish(sequence)
+
+    def write_results(self):
+        # A None in the result queue is the end of the results
+        result_items: List[ResultItem] = []
+        flush_deadline: float = 0
+        end_of_queue = False
+        while not end_of_queue:
+            timeout = (
+                max(flush_deadline - monotonic(), 0)
+                if result_items
+                else result_writer_batch_interval_seconds
+            )
+            try:
+                result_item: Optional[ResultItem] = self.result_queue.get(
+                    timeout=timeout
+                )
+                if result_item is None:
+                    end_of_queue = True
+                else:
+                    if not result_items:
+                        flush_deadline = (
+                            monotonic() + result_writer_batch_interval_seconds
+                        )
+                    result_items.append(result_item)
+            except Empty:
+                pass
+
+            if result_items and (
+                end_of_queue
+                or len(result_items) >= result_writer_batch_size
+                or monotonic() >= flush_deadline
+            ):
+                self.write_batch(result_items)
+                result_items = []
+
+        logging.info(f"Result Writer Stats. Tests persisted: {self.written_counter}")
+
+    def write_batch(self, result_items: List[ResultItem]) -> None:
+        test_results = [test_result for test_result, _ in result_items]
+        try:
+            with self.db_session() as session:
+                result_processor_service.persist_test_results(test_results, session)
+            self.written_counter += len(test_results)
+            written_items = result_items
+        except Exception as e:
+            logging.exception(
+                f"Could not persist a batch of {len(test_results)} test results, persisting them one by one: {e}"
+            )
+            # A single result that can't be persisted doesn't take the rest of the batch with it
+            written_items = [
+                result_item
+                for result_item in result_items
+                if self.write_test_result(result_item[0])
+            ]
+        # A test whose result could not be persisted is not acked, so a resumed test run runs it again
+        if self.ack_tracker is not None:
+            for _, sequence in written_items:
+                if sequence is not None:
+                    self.ack_tracker.finish(sequence)
+
+    def write_test_result(self, test_result: TestResult) -> bool:
+        try:
+            with self.db_session() as session:
+                result_processor_service.persist_test_result(test_result, session)
+            self.written_counter += 1
+            return True
+        except Exception as e:
+            logging.exception(f"Issue while persisting test result: {e}")
+            return False
+
+    def close(self) -> None:
+        # Let the writer know there are no more results coming, so it writes the last batch and exits
+        self.result_queue.put(None)
@@ -1,5 +1,5 @@
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict
 
 from src.common.database.validation_result import ValidationResult
@@ -9,18 +9,21 @@ from src.mutator.result_processor.validations.validator import Validator
 
 @dataclass
 class ElapsedTime(Validator):
-    test_item: TestResult
     config: Dict
+    max_elapsed_time: float = field(init=False)
 
-    def __validate__(self) -> ValidationResult:
+    def __post_init__(self):
+        self.max_elapsed_time = self.config.get("max_elapsed_time")
+
+    def validate(self, test_result: TestResult) -> ValidationResult:
         try:
-            elapsed_time: float = self.test_item.response.elapsed_time
+            elapsed_time: float = test_result.response.elapsed_time
             logging.debug(f"Validating response elapsed time {elapsed_time}.")
 
             result = ValidationResult()
             result.type = self.__class__.__name__
 
-            max_elapsed_time = self.config.get("max_elapsed_time")
+            max_elapsed_time = self.max_elapsed_time
             if elapsed_time >= max_elapsed_time:
                 logging.debug(f"elapsed time failed, value: {elapsed_time}")
                 result.passed = False
@@ -0,0 +1,143 @@
+import logging
+import os
+import pathlib
+import threading
+from configparser import ConfigParser
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from src.common.database.test_run import TestRun
+from src.common.database.validation_result import ValidationResult
+from src.common.test_result.test_result import TestResult
+from src.manager.services.test_run.dao import test_result_dao, test_run_dao
+from src.mutator.common.utils.latency_sketch import LatencySketch
+from src.mutator.result_processor.validations.validator import Validator
+
+config = ConfigParser()
+config.read(
+    pathlib.Path(os.path.abspath(__file__)).parents[2].__str__() + "/config/config.ini"
+)
+
+latency_baseline_chunk_size: int = config.getint(
+    "latency_baseline", "latency_baseline_chunk_size"
+)
+latency_baseline_max_test_runs: int = config.getint(
+    "latency_baseline", "latency_baseline_max_test_runs"
+)
+
+
+@dataclass
+class LatencyBaseline:
+    # The latencies of the target of a test run so far, and of the previous test run to the same endpoint.
+    # Shared by the consumers of the test run.
+    previous: Optional[LatencySketch] = None
+    live: LatencySketch = field(default_factory=LatencySketch)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+
+def load_latency_baseline(test_run: TestRun, session: Session) -> LatencyBaseline:
+    # The previous test run's latencies are read once, latency_baseline_chunk_size results at a time
+    previous_test_run = test_run_dao.get_previous_test_run(
+        test_run, latency_baseline_max_test_runs, session
+    )
+    if previous_test_run is None:
+        return LatencyBaseline()
+    previous = LatencySketch()
+    for elapsed_time in test_result_dao.get_elapsed_times(
+        previous_test_run.id, latency_baseline_chunk_size, session
+    ):
+        previous.add(elapsed_time)
+    logging.info(
+        f"Loaded the latency baseline of {previous.count} results of test run {previous_test_run.id}."
+    )
+    return LatencyBaseline(previous)
+
+
+# Fails responses that are slower than factor times the quantile of the latency of the target,
+# of the previous test run to the same endpoint, or of the test run so far.
+# Only judged once a baseline has min_samples latencies, and never for responses faster than min_elapsed_time.
+@dataclass
+class LatencyOutlier(Validator):
+    config: Dict
+    baseline: LatencyBaseline = None
+    quantile: float = field(init=False)
+    factor: float = field(init=False)
+    min_samples: int = field(init=False)
+    min_elapsed_time: float = field(init=False)
+    previous_threshold: Optional[float] = field(init=False)
+
+    def __post_init__(self):
+        self.quantile = self.config.get("quantile", 0.99)
+        self.factor = self.config.get("factor", 3)
+        self.min_samples = self.config.get("min_samples", 100)
+        self.min_elapsed_time = self.config.get("min_elapsed_time", 0.05)
+        if self.baseline is None:
+            self.baseline = LatencyBaseline()
+        # The previous test run doesn't change, so its threshold is only worked out once
+        self.previous_threshold = self.get_threshold(self.baseline.previous)
+
+    def validate(self, test_result: TestResult) -> ValidationResult:
+        try:
+            elapsed_time: float = test_result.response.elapsed_time
+            logging.debug(f"Validating response latency {elapsed_time}.")
+
+            result = ValidationResult()
+            result.type = self.__class__.__name__
+
+            if elapsed_time is None:
+                result.passed = True
+                result.message = "No elapsed time to validate"
+                return result
+
+            with self.baseline.lock:
+                live_threshold = self.get_threshold(self.baseline.live)
+                self.baseline.live.add(elapsed_time)
+
+            if (
+                self.previous_threshold is not None
+                and elapsed_time > self.previous_threshold
+            ):
+                result.passed = False
+                result.message = self.get_message(
+                    elapsed_time, self.baseline.previous, "the previous test run"
+                )
+            elif live_threshold is not None and elapsed_time > live_threshold:
+                result.passed = False
+                with self.baseline.lock:
+                    result.message = self.get_message(
+                        elapsed_time, self.baseline.live, "this test run"
+                    )
+            else:
+                result.passed = True
+                result.message = "Passed"
+
+            return result
+        except Exception as e:
+            logging.exception(f"Could not validate response latency: {e}")
+
+    def get_threshold(self, sketch: Optional[LatencySketch]) -> Optional[float]:
+        # None until the baseline has enough latencies to judge by
+        if sketch is None or sketch.count < self.min_samples:
+            return None
+        return max(self.min_elapsed_time, self.factor * sketch.quantile(self.quantile))
+
+    def get_message(
+        self, elapsed_time: float, sketch: LatencySketch, baseline_name: str
+    ) -> str:
+        return (
+            f"Elapsed time of {elapsed_time:.3f}s is more than {self.factor} times "
+            f"the p{self.quantile * 100:g} of {sketch.quantile(self.quantile):.3f}s of {baseline_name}. "
+            f"p50 {sketch.quantile(0.5):.3f}s, p95 {sketch.quantile(0.95):.3f}s, "
+            f"p99 {sketch.quantile(0.99):.3f}s of {sketch.count} responses."
+        )
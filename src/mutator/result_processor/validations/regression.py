@@ -1,34 +1,121 @@
 import logging
-from dataclasses import dataclass
-from typing import Dict
+import os
+import pathlib
+from configparser import ConfigParser
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 
 from sqlalchemy.orm import Session
 
+from src.common.database.test_run import TestRun
 from src.common.database.validation_result import ValidationResult
 from src.common.test_result.test_result import TestResult
-from src.manager.services.test_run.dao import test_result_dao
+from src.manager.services.test_run.dao import test_result_dao, test_run_dao
+from src.mutator.common.utils.hash import get_hash_version, hash_response
 from src.mutator.result_processor.validations.validator import Validator
 
+config = ConfigParser()
+config.read(
+    pathlib.Path(os.path.abspath(__file__)).parents[2].__str__() + "/config/config.ini"
+)
+
+regression_baseline: bool = config.getboolean("regression", "regression_baseline")
+regression_baseline_chunk_size: int = config.getint(
+    "regression", "regression_baseline_chunk_size"
+)
+regression_baseline_max_hashes: int = config.getint(
+    "regression", "regression_baseline_max_hashes"
+)
+regression_baseline_max_test_runs: int = config.getint(
+    "regression", "regression_baseline_max_test_runs"
+)
+
+
+@dataclass
+class RegressionBaseline:
+    # The latest response hash of every request hash of the previous test run to the same endpoint,
+    # replaced by the response hashes of this test run as its results are validated.
+    response_hashes: Dict[str, str]
+
+    def get_previous_response_hash(self, request_hash: str) -> Optional[str]:
+        return self.response_hashes.get(request_hash)
+
+    def add(self, request_hash: str, response_hash: str) -> None:
+        self.response_hashes[request_hash] = response_hash
+
+
+def load_regression_baseline(
+    test_run: TestRun, session: Session
+) -> Optional[RegressionBaseline]:
+    # Loaded once per test run, regression_baseline_chunk_size rows at a time, from the previous completed
+    # test run to the same endpoint, out of the regression_baseline_max_test_runs completed test runs before it,
+    # and from the results this test run already has if it is resumed.
+    # None past regression_baseline_max_hashes request hashes, results are then looked up one at a time.
+    test_run_ids = get_baseline_test_run_ids(test_run, session)
+    response_hashes: Dict[str, str] = {}
+    # Responses often share a hash, e.g. the same error for many tests, so each hash is only kept once
+    distinct_response_hashes: Dict[str, str] = {}
+    for test_run_id in test_run_ids:
+        for request_hash, response_hash in test_result_dao.get_response_hashes(
+            test_run_id, regression_baseline_chunk_size, session
+        ):
+            if response_hash is not None:
+                response_hash = distinct_response_hashes.setdefault(
+                    response_hash, response_hash
+                )
+            response_hashes[request_hash] = response_hash
+            if len(response_hashes) > regression_baseline_max_hashes:
+                logging.info(
+                    f"More than {regression_baseline_max_hashes} request hashes in test run {test_run_id}, "
+                    f"looking up previous response hashes per result instead."
+                )
+                return None
+    logging.info(
+        f"Loaded the previous response hashes of {len(response_hashes)} request hashes."
+    )
+    return RegressionBaseline(response_hashes)
+
+
+def get_baseline_test_run_ids(test_run: TestRun, session: Session) -> List[int]:
+    # The previous test run to the same endpoint, if there is one, and this test run
+    previous_test_run = test_run_dao.get_previous_test_run(
+        test_run, regression_baseline_max_test_runs, session
+    )
+    if previous_test_run is None:
+        return [test_run.id]
+    return [previous_test_run.id, test_run.id]
+
 
 @dataclass
 class Regression(Validator):
-    test_item: TestResult
     config: Dict
-    session: Session = None
-    current_response_hash = None
-    previous_response_hash = None
+    baseline: RegressionBaseline = None
+    # Without a baseline, the test runs each result is looked up in, found once per test run
+    baseline_test_run_ids: Dict[int, List[int]] = field(
+        default_factory=dict, init=False
+    )
 
-    def __validate__(self) -> ValidationResult:
+    # Needs a session to look up the previous result of the request
+    def validate(
+        self, test_result: TestResult, session: Session = None
+    ) -> ValidationResult:
         logging.debug("Validating previous response.")
         validation_result = ValidationResult()
-        current_request_hash = self.test_item.request.hash
-        self.current_response_hash = self.test_item.response.hash
+        current_request_hash = test_result.request.hash
+        current_response_hash = test_result.response.hash
 
-        self.previous_response_hash: str = test_result_dao.get_previous_response_hash(
-            current_request_hash, self.session
+        previous_response_hash: str = self.get_previous_response_hash(
+            test_result, session
         )
+        # Later results of the same request in this test run are compared to this one
+        if self.baseline is not None:
+            self.baseline.add(current_request_hash, current_response_hash)
+        if previous_response_hash is not None:
+            current_response_hash = self.get_comparable_response_hash(
+                test_result, previous_response_hash
+            )
 
-        if self.previous_response_hash is None:
+        if previous_response_hash is None:
             logging.debug(
                 f"There is no previous test result for request {current_request_hash}, so it is a new request."
             )
@@ -38,38 +125,89 @@ class Regression(Validator):
             validation_result.message = "Passed"
             return validation_result
         else:
-            validation_result = self.process_previous_response_hash()
+            validation_result = self.process_previous_response_hash(
+                test_result, current_response_hash, previous_response_hash
+            )
         return validation_result
 
-    def process_previous_response_hash(self):
+    def get_previous_response_hash(
+        self, test_result: TestResult, session: Session
+    ) -> Optional[str]:
+        # The same test runs are searched with and without a baseline
+        request_hash = test_result.request.hash
+        if self.baseline is not None:
+            return self.baseline.get_previous_response_hash(request_hash)
+        return test_result_dao.get_previous_response_hash(
+            request_hash, self.get_baseline_test_run_ids(test_result, session), session
+        )
+
+    def get_baseline_test_run_ids(
+        self, test_result: TestResult, session: Session
+    ) -> List[int]:
+        test_run_id = test_result.test_run_id
+        if test_run_id not in self.baseline_test_run_ids:
+            test_run = test_run_dao.get_single_test_run(test_run_id, session)
+            self.baseline_test_run_ids[test_run_id] = (
+                get_baseline_test_run_ids(test_run, session)
+                if test_run is not None
+                else [test_run_id]
+            )
+        return self.baseline_test_run_ids[test_run_id]
+
+    def get_comparable_response_hash(
+        self, test_result: TestResult, previous_response_hash: str
+    ) -> str:
+        # Hashes the response again if the previous result was hashed with another version
+        previous_version = get_hash_version(previous_response_hash)
+        response = test_result.response
+        if (
+            response.hash is None
+            or response.hash_fields is None
+            or get_hash_version(response.hash) == previous_version
+        ):
+            return response.hash
+        logging.debug(
+            f"Previous response hash is version {previous_version}, hashing the response again."
+        )
+        return hash_response(response.hash_fields, previous_version)
+
+    def process_previous_response_hash(
+        self,
+        test_result: TestResult,
+        current_response_hash: str,
+        previous_response_hash: str,
+    ):
         validation_result = ValidationResult()
         validation_result.type = self.__class__.__name__
         if self.response_hashes_match(
-            self.current_response_hash, self.previous_response_hash
+            test_result, current_response_hash, previous_response_hash
         ):
             validation_result.passed = True
             validation_result.message = "Passed"
         else:
             validation_result.passed = False
             validation_result.message = (
-                f"Regression occurred. Current response hash {self.current_response_hash}"
-                f" is different from previous response hash {self.previous_response_hash}."
+                f"Regression occurred. Current response hash {current_response_hash}"
+                f" is different from previous response hash {previous_response_hash}."
             )
         return validation_result
 
     def response_hashes_match(
-        self, current_response_hash: str, previous_response_hash: str
+        self,
+        test_result: TestResult,
+        current_response_hash: str,
+        previous_response_hash: str,
     ) -> bool:
         if current_response_hash == previous_response_hash:
             logging.debug(
-                f"For request hash {self.test_item.request.hash}"
+                f"For request hash {test_result.request.hash}"
                 f"Current response hash {current_response_hash} "
                 f"matches previous response hash {previous_response_hash}."
             )
             return True
         else:
             logging.debug(
-                f"For request hash {self.test_item.request.hash} "
+                f"For request hash {test_result.request.hash} "
                 f"current response hash {current_response_hash} "
                 f"does not match previous response hash {previous_response_hash}. Regression Occurred."
             )
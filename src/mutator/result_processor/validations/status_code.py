@@ -1,6 +1,6 @@
 import logging
-from dataclasses import dataclass
-from typing import List, Dict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet
 
 from src.common.database.validation_result import ValidationResult
 from src.common.test_result.test_result import TestResult
@@ -9,16 +9,19 @@ from src.mutator.result_processor.validations.validator import Validator
 
 @dataclass
 class StatusCode(Validator):
-    test_item: TestResult
     config: Dict
+    invalid_status_codes: FrozenSet[int] = field(init=False)
 
-    def __validate__(self) -> ValidationResult:
+    def __post_init__(self):
+        self.invalid_status_codes = frozenset(
+            self.config.get("invalid_status_codes") or []
+        )
+
+    def validate(self, test_result: TestResult) -> ValidationResult:
         try:
-            response_status_code: int = self.test_item.response.status_code
+            response_status_code: int = test_result.response.status_code
             logging.debug(f"Validating response status code {response_status_code}.")
 
-            invalid_status_code: List = self.config.get("invalid_status_codes")
-
             result = ValidationResult()
             result.type = self.__class__.__name__
 
@@ -26,10 +29,7 @@ class StatusCode(Validator):
                 result.passed = True
             elif response_status_code >= 500:
                 result.passed = False
-            elif (
-                invalid_status_code is not None
-                and response_status_code in invalid_status_code
-            ):
+            elif response_status_code in self.invalid_status_codes:
                 result.passed = False
             else:
                 result.passed = True
@@ -38,7 +38,6 @@ class StatusCode(Validator):
                 logging.debug("Response status code is valid.")
                 result.message = "Passed"
             else:
-                f"Invalid response status code found: {response_status_code}"
                 result.message = f"Found invalid response code: {response_status_code}"
             return result
         except Exception as e:
@@ -1,33 +1,204 @@
 import logging
-from dataclasses import dataclass
-from typing import Dict
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Match, Optional, Pattern, Set
 
 from src.common.database.validation_result import ValidationResult
 from src.common.test_result.test_result import TestResult
 from src.mutator.result_processor.validations.validator import Validator
 
+# Up to this many match strings, searching the body for each of them is faster than the trie.
+# Past it the trie is faster, and takes about as long for thousands of match strings as for hundreds.
+# See benchmarks/string_match.py
+trie_min_match_strings = 256
+# The length of validation.message in the database
+message_max_length = 255
 
+
+# Fails if any of match_strings, or match_patterns regular expressions, is found in the response body.
+# Compiled once per test run: the match strings into a trie, and the match patterns into one regular expression,
+# so the raw bytes of each response body are scanned once for all of them.
 @dataclass
 class StringMatch(Validator):
-    test_item: TestResult
     config: Dict
+    ignore_case: bool = field(init=False)
+    match_strings: List[str] = field(init=False)
+    match_patterns: List[str] = field(init=False)
+    # The match string of each literal, lower case when ignoring case
+    literals: Dict[bytes, str] = field(init=False)
+    # The match strings found with each literal, the ones inside it are hidden by it in the trie
+    found_strings: Dict[bytes, List[str]] = field(init=False)
+    strings_matcher: Optional[Pattern[bytes]] = field(init=False)
+    # A group for each match pattern
+    pattern_matchers: Dict[str, Pattern[bytes]] = field(init=False)
+    patterns_matcher: Optional[Pattern[bytes]] = field(init=False)
+    group_patterns: Dict[int, str] = field(init=False)
+
+    def __post_init__(self):
+        self.ignore_case = bool(self.config.get("ignore_case"))
+        flags = re.IGNORECASE if self.ignore_case else 0
+        match_string = self.config.get("match_string")
+        self.match_strings = [
+            s
+            for s in dict.fromkeys(
+                [match_string] + (self.config.get("match_strings") or [])
+            )
+            if s
+        ]
+        self.literals = {self.get_literal(s.encode()): s for s in self.match_strings}
+        self.found_strings = {
+            literal: [s for other, s in self.literals.items() if other in literal]
+            for literal in self.literals
+        }
+        self.strings_matcher = (
+            re.compile(build_trie_pattern(list(self.literals)), flags)
+            if len(self.literals) > trie_min_match_strings
+            else None
+        )
+
+        self.pattern_matchers = {}
+        for match_pattern in self.config.get("match_patterns") or []:
+            try:
+                self.pattern_matchers[match_pattern] = re.compile(
+                    match_pattern.encode(), flags
+                )
+            except re.error as e:
+                logging.error(f"Skipping invalid match pattern {match_pattern}: {e}")
+        self.match_patterns = list(self.pattern_matchers)
+        alternatives: List[bytes] = []
+        self.group_patterns = {}
+        group = 0
+        for match_pattern, pattern_matcher in self.pattern_matchers.items():
+            group += 1
+            self.group_patterns[group] = match_pattern
+            alternatives.append(b"(" + pattern_matcher.pattern + b")")
+            group += pattern_matcher.groups
+        self.patterns_matcher = (
+            re.compile(b"|".join(alternatives), flags) if alternatives else None
+        )
 
-    def __validate__(self) -> ValidationResult:
-        # If string is found in response, fail validator
+    def validate(self, test_result: TestResult) -> ValidationResult:
+        # If any string is found in response, fail validator
         try:
             result = ValidationResult()
             result.type = self.__class__.__name__
 
-            match_string = self.config.get("match_string")
-            if match_string in str(self.test_item.response.body):
-                logging.debug(f"String found in response body: {match_string}")
+            found = self.find(get_raw_body(test_result))
+            if found:
+                logging.debug(f"Strings found in response body: {found}")
                 result.passed = False
-                result.message = f"String found in response body: {match_string}"
+                result.message = build_found_message(found)
             else:
-                logging.debug(f"String not found in response body: {match_string}")
+                logging.debug("No match strings found in response body.")
                 result.passed = True
-                result.message = f"String not found in response body: {match_string}"
+                result.message = (
+                    f"None of {len(self.match_strings) + len(self.match_patterns)} "
+                    f"match strings found in response body."
+                )
 
             return result
         except Exception as e:
             logging.exception(f"Could not check if string is in response body: {e}")
+
+    def find(self, body: bytes) -> List[str]:
+        # The match strings and patterns found, in the order they are configured
+        found: Set[str] = set()
+        self.find_strings(body, found)
+        self.find_patterns(body, found)
+        return [s for s in self.match_strings + self.match_patterns if s in found]
+
+    def find_strings(self, body: bytes, found: Set[str]) -> None:
+        if self.strings_matcher is None:
+            searched = self.get_literal(body) if self.literals else body
+            found.update(
+                s for literal, s in self.literals.items() if literal in searched
+            )
+            return
+        for match in find_overlapping(self.strings_matcher, body):
+            found.update(self.found_strings[self.get_literal(match.group())])
+            if len(found) == len(self.literals):
+                return
+
+    def find_patterns(self, body: bytes, found: Set[str]) -> None:
+        if self.patterns_matcher is None:
+            return
+        for match in find_overlapping(self.patterns_matcher, body):
+            found.add(self.group_patterns[match.lastindex])
+            # Only the first match pattern that matches at a position is reported,
+            # so the others are tried there as well, only where something was found
+            for match_pattern, pattern_matcher in self.pattern_matchers.items():
+                if match_pattern not in found and pattern_matcher.match(
+                    body, match.start()
+                ):
+                    found.add(match_pattern)
+            if all(match_pattern in found for match_pattern in self.match_patterns):
+                return
+
+    def get_literal(self, text: bytes) -> bytes:
+        return text.lower() if self.ignore_case else text
+
+
+def build_found_message(found: List[str]) -> str:
+    # As many of the match strings found as fit in message_max_length, and how many more were found
+    message = "String found in response body: "
+    more = f", and {len(found)} more"
+    shown = 0
+    for found_string in found:
+        separator = ", " if shown else ""
+        reserved = len(more) if shown + 1 < len(found) else 0
+        if (
+            len(message) + len(separator) + len(found_string) + reserved
+            > message_max_length
+        ):
+            break
+        message += separator + found_string
+        shown += 1
+    if shown < len(found):
+        message += f"{', ' if shown else ''}and {len(found) - shown} more"
+    return message
+
+
+def find_overlapping(matcher: Pattern[bytes], body: bytes) -> Iterator[Match[bytes]]:
+    # Unlike finditer, the search goes on right after the start of each match,
+    # so a match inside or overlapping the one before is found as well, e.g. bcd in abcd after abc
+    match = matcher.search(body)
+    while match:
+        yield match
+        match = matcher.search(body, match.start() + 1)
+
+
+def get_raw_body(test_result: TestResult) -> bytes:
+    response = test_result.response
+    if response.raw_body is not None:
+        return response.raw_body
+    return str(response.body).encode("utf-8", errors="replace")
+
+
+def build_trie_pattern(literals: List[bytes]) -> bytes:
+    # Literals that start the same way share a branch, so at every position of the body
+    # the regular expression engine only follows the literals that can still match
+    trie: Dict = {}
+    for literal in literals:
+        node = trie
+        for byte in literal:
+            node = node.setdefault(byte, {})
+        node[None] = {}
+    return trie_to_pattern(trie)
+
+
+def trie_to_pattern(node: Dict) -> bytes:
+    branches: List[bytes] = []
+    for byte in sorted(key for key in node if key is not None):
+        run = bytearray([byte])
+        child = node[byte]
+        # Bytes without a branch are one literal, so nesting only grows with the branches
+        while len(child) == 1 and None not in child:
+            (next_byte,) = child
+            run.append(next_byte)
+            child = child[next_byte]
+        branches.append(re.escape(bytes(run)) + trie_to_pattern(child))
+    if not branches:
+        return b""
+    pattern = branches[0] if len(branches) == 1 else b"(?:" + b"|".join(branches) + b")"
+    # A literal ends here, and longer ones go on, the longest is tried first
+    return b"(?:" + pattern + b")?" if None in node else pattern
@@ -1,11 +1,14 @@
 from abc import ABC, abstractmethod
 
 from src.common.database.validation_result import ValidationResult
+from src.common.test_result.test_result import TestResult
 
 
+# Validators are built from their config by build_validators once per consumer thread of a test run,
+# and once per async consumer, whose result processor threads share them.
+# They may keep state for the whole test run, like the baselines of Regression and LatencyOutlier,
+# that is shared by every consumer of the test run, so it must be thread-safe.
 class Validator(ABC):
-    pass
-
     @abstractmethod
-    def __validate__(self) -> ValidationResult:
+    def validate(self, test_result: TestResult) -> ValidationResult:
         pass
@@ -0,0 +1,168 @@
+import logging
+import math
+import os
+import pathlib
+import threading
+from configparser import ConfigParser
+from dataclasses import dataclass, field
+from enum import Enum
+from time import monotonic
+from typing import List
+
+config = ConfigParser()
+config.read(
+    pathlib.Path(os.path.abspath(__file__)).parents[1].__str__() + "/config/config.ini"
+)
+
+adaptive_concurrency: bool = config.getboolean("consumer", "adaptive_concurrency")
+adaptive_concurrency_initial: int = config.getint(
+    "consumer", "adaptive_concurrency_initial"
+)
+adaptive_concurrency_min: int = config.getint("consumer", "adaptive_concurrency_min")
+adaptive_concurrency_target_latency_seconds: float = (
+    config.getint("consumer", "adaptive_concurrency_target_latency_ms") / 1000
+)
+adaptive_concurrency_max_error_rate: float = config.getfloat(
+    "consumer", "adaptive_concurrency_max_error_rate"
+)
+adaptive_concurrency_backoff: float = config.getfloat(
+    "consumer", "adaptive_concurrency_backoff"
+)
+
+
+class Outcome(Enum):
+    SUCCESS = "SUCCESS"
+    # 5xx response
+    ERROR = "ERROR"
+    # 429 response
+    THROTTLED = "THROTTLED"
+    TIMEOUT = "TIMEOUT"
+
+
+# Additive increase, multiplicative decrease of the test requests in flight for a test run.
+# The limit doubles until the target first pushes back, then grows by 1 for every limit's worth of responses
+# while the p95 latency and error rate of those responses stay within bounds.
+# A 429 or timeout, or a window over the bounds, multiplies the limit by the backoff.
+# Responses to requests that were sent before the last decrease don't decrease it again,
+# so a burst of 429s for the same requests only backs off once.
+@dataclass
+class AdaptiveConcurrency:
+    max_limit: int
+    limit: float = adaptive_concurrency_initial
+    min_limit: int = adaptive_concurrency_min
+    target_latency_seconds: float = adaptive_concurrency_target_latency_seconds
+    max_error_rate: float = adaptive_concurrency_max_error_rate
+    backoff: float = adaptive_concurrency_backoff
+    slow_start: bool = True
+    in_flight: int = 0
+    last_decrease: float = 0
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    condition: threading.Condition = field(default_factory=threading.Condition)
+
+    def __post_init__(self):
+        self.limit = max(self.min_limit, min(self.limit, self.max_limit))
+
+    def get_limit(self) -> int:
+        return int(self.limit)
+
+    def acquire(self, timeout: float = None) -> bool:
+        # Waits for a free slot, returns False if there was none before the timeout
+        with self.condition:
+            if not self.condition.wait_for(
+                lambda: self.in_flight < self.get_limit(), timeout
+            ):
+                return False
+            self.in_flight += 1
+            return True
+
+    def try_acquire(self) -> bool:
+        return self.acquire(0)
+
+    def acquire_unless_stopped(self, stop_threads: threading.Event) -> bool:
+        while not stop_threads.is_set():
+            if self.acquire(1):
+                return True
+        return False
+
+    def release(self) -> None:
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def record(self, started: float, latency_seconds: float, outcome: Outcome) -> None:
+        # started is the monotonic time the request was sent
+        with self.condition:
+            if outcome in [Outcome.THROTTLED, Outcome.TIMEOUT]:
+                self.decrease(started, outcome.value)
+                return
+            self.latencies.append(latency_seconds)
+            if outcome == Outcome.ERROR:
+                self.errors += 1
+            if len(self.latencies) < self.get_limit():
+                return
+
+            latencies = sorted(self.latencies)
+            p95_latency = latencies[math.ceil(len(latencies) * 0.95) - 1]
+            error_rate = self.errors / len(latencies)
+            if p95_latency > self.target_latency_seconds:
+                self.decrease(started, f"p95 latency {p95_latency:.3f}s")
+            elif error_rate > self.max_error_rate:
+                self.decrease(started, f"error rate {error_rate:.2f}")
+            else:
+                self.increase()
+
+    def increase(self) -> None:
+        self.reset_window()
+        if self.limit >= self.max_limit:
+            return
+        self.limit = min(
+            self.max_limit, self.limit * 2 if self.slow_start else self.limit + 1
+        )
+        logging.debug(f"Increased concurrency limit to {self.get_limit()}.")
+        self.condition.notify_all()
+
+    def decrease(self, started: float, reason: str) -> None:
+        if started < self.last_decrease:
+            return
+        self.reset_window()
+        self.slow_start = False
+        self.last_decrease = monotonic()
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        logging.info(
+            f"Decreased concurrency limit to {self.get_limit()} because of {reason}."
+        )
+
+    def reset_window(self) -> None:
+        self.latencies = []
+        self.errors = 0
+
+
+def create_adaptive_concurrency(test_run_config, max_limit: int) -> AdaptiveConcurrency:
+    # None if concurrency is not adapted for the test run
+    enabled = (test_run_config or {}).get("adaptive_concurrency")
+    if not (adaptive_concurrency if enabled is None else enabled):
+        return None
+    return AdaptiveConcurrency(max_limit)
+
+
+def record_response(
+    concurrency: AdaptiveConcurrency,
+    started: float,
+    latency_seconds: float,
+    status_code: int,
+) -> None:
+    if concurrency is None:
+        return
+    if status_code == 429:
+        outcome = Outcome.THROTTLED
+    elif status_code >= 500:
+        outcome = Outcome.ERROR
+    else:
+        outcome = Outcome.SUCCESS
+    concurrency.record(started, latency_seconds, outcome)
+
+
+def record_timeout(concurrency: AdaptiveConcurrency, started: float) -> None:
+    if concurrency is not None:
+        concurrency.record(started, monotonic() - started, Outcome.TIMEOUT)
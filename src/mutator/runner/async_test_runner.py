@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import os
+import pathlib
+from configparser import ConfigParser
+from time import monotonic
+
+import aiohttp
+
+from src.common.test_result.test_result import TestResult
+from src.mutator.generator.test import Test
+from src.mutator.runner.adaptive_concurrency import (
+    AdaptiveConcurrency,
+    record_response,
+    record_timeout,
+)
+from src.mutator.runner.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    POLL_SECONDS,
+    record_failure,
+    record_success,
+)
+from src.mutator.runner.host_rate_limiter import reserve_request
+from src.mutator.runner.retry_queue import RetryableRequestError, parse_retry_after
+from src.mutator.runner.request.generic_request import GenericRequest
+from src.mutator.runner.response.generic_response import GenericResponse
+from src.mutator.runner.response.response_body import (
+    ResponseBody,
+    response_chunk_bytes,
+)
+from src.mutator.runner.test_runner import build_request, build_response_hash
+
+config_file_path = (
+    pathlib.Path(os.path.abspath(__file__)).parents[1].__str__() + "/config/config.ini"
+)
+config = ConfigParser()
+
+config.read(config_file_path)
+
+request_timeout: int = config.getint("consumer", "request_timeout")
+
+
+# Same as test_runner.run, for many test requests at once on an event loop.
+async def run(
+    test: Test,
+    field_matcher,
+    session: aiohttp.ClientSession,
+    concurrency: AdaptiveConcurrency = None,
+    circuit_breaker: CircuitBreaker = None,
+) -> TestResult:
+    logging.debug(f"Building request from test {test}")
+    request: GenericRequest = build_request(test)
+
+    logging.debug(f"Performing Request: {request.__dict__}")
+    response: GenericResponse = await perform_request(
+        request, session, concurrency, circuit_breaker
+    )
+    logging.debug(f"Finished performing Request: {request.__dict__}")
+
+    test_result = TestResult()
+    test_result.request = request
+    test_result.request.hash = test.test_hash
+    if field_matcher:
+        response.hash = build_response_hash(response, field_matcher)
+    test_result.response = response
+    test_result.validations = []
+    return test_result
+
+
+async def perform_request(
+    request: GenericRequest,
+    session: aiohttp.ClientSession,
+    concurrency: AdaptiveConcurrency = None,
+    circuit_breaker: CircuitBreaker = None,
+) -> GenericResponse:
+    url = request.url
+    logging.debug(f"Performing request {request.method} to url: {url}.")
+
+    content = request.body
+    if content is None:
+        logging.debug(f"performing request without content to url: {url}")
+    else:
+        logging.debug(f"performing request to url '{url}' with content: {request.body}")
+
+    while circuit_breaker is not None:
+        wait_seconds = circuit_breaker.before_request()
+        if wait_seconds <= 0:
+            break
+        if circuit_breaker.stop_threads.is_set():
+            raise CircuitOpenError(
+                f"Test run stopped while the circuit to {url} was open"
+            )
+        await asyncio.sleep(min(wait_seconds, POLL_SECONDS))
+    wait_seconds = reserve_request(url)
+    if wait_seconds > 0:
+        await asyncio.sleep(wait_seconds)
+
+    started = monotonic()
+    try:
+        async with session.request(
+            headers=request.headers,
+            method=request.method,
+            url=url,
+            json=content if content is not None else None,
+            timeout=aiohttp.ClientTimeout(total=request_timeout),
+        ) as response:
+            record_success(circuit_breaker)
+            generic_response = await read_response(response, url, started, concurrency)
+    except asyncio.TimeoutError as e:
+        record_timeout(concurrency, started)
+        record_failure(circuit_breaker)
+        raise RetryableRequestError(f"Request timed out: {e}") from e
+    except aiohttp.ClientError as e:
+        record_failure(circuit_breaker)
+        raise RetryableRequestError(f"Request failed: {e}") from e
+    logging.debug(f"Current response: {generic_response.__dict__}")
+    return generic_response
+
+
+async def read_response(
+    response: aiohttp.ClientResponse,
+    url: str,
+    started: float,
+    concurrency: AdaptiveConcurrency,
+) -> GenericResponse:
+    # Time until the response headers are received, same as requests' Response.elapsed
+    elapsed_time = monotonic() - started
+    logging.debug(f"Finished performing request to url: {url}")
+    status = response.status
+    record_response(concurrency, started, elapsed_time, status)
+    if status == 429:
+        raise RetryableRequestError(
+            f"Response code {status} received",
+            parse_retry_after(response.headers.get("Retry-After")),
+        )
+    headers = dict(response.headers)
+
+    generic_response = GenericResponse()
+    generic_response.status_code = status
+    generic_response.headers = dict(**headers)
+    generic_response.url = str(url)
+
+    # Read in chunks, so a large response never has to fit in memory
+    response_body = ResponseBody()
+    async for chunk in response.content.iter_chunked(response_chunk_bytes):
+        response_body.feed(chunk)
+    generic_response.raw_body = response_body.get_content()
+    generic_response.body = response_body.build_body(
+        headers.get("Content-Type"), response.charset
+    )
+    generic_response.body_hash = response_body.get_hash()
+    generic_response.body_truncated = response_body.truncated
+    generic_response.elapsed_time = elapsed_time
+    return generic_response
@@ -0,0 +1,199 @@
+import logging
+import os
+import pathlib
+import threading
+from configparser import ConfigParser
+from dataclasses import dataclass, field
+from enum import Enum
+from time import monotonic
+
+from src.mutator.runner.host_rate_limiter import get_host
+from src.mutator.runner.retry_queue import RetryableRequestError
+
+config = ConfigParser()
+config.read(
+    pathlib.Path(os.path.abspath(__file__)).parents[1].__str__() + "/config/config.ini"
+)
+
+circuit_breaker: bool = config.getboolean("consumer", "circuit_breaker")
+circuit_breaker_failure_threshold: int = config.getint(
+    "consumer", "circuit_breaker_failure_threshold"
+)
+circuit_breaker_open_seconds: float = config.getfloat(
+    "consumer", "circuit_breaker_open_seconds"
+)
+circuit_breaker_max_open_seconds: float = config.getfloat(
+    "consumer", "circuit_breaker_max_open_seconds"
+)
+circuit_breaker_max_outage_seconds: float = config.getfloat(
+    "consumer", "circuit_breaker_max_outage_seconds"
+)
+
+# How often a test request that waits on an open circuit checks it again
+POLL_SECONDS = 1
+
+
+# A test request that was waiting on an open circuit when the test run was stopped
+class CircuitOpenError(RetryableRequestError):
+    pass
+
+
+class CircuitState(Enum):
+    # Test requests are sent to the target
+    CLOSED = "CLOSED"
+    # The target is down, test requests wait
+    OPEN = "OPEN"
+    # A single probe request is sent to see if the target is back
+    HALF_OPEN = "HALF_OPEN"
+
+
+# Circuit breaker for the target host of a test run.
+# Opens after failure_threshold test requests in a row failed to connect or timed out,
+# so test requests wait instead of each one waiting out the request timeout and using up its retries.
+# After open_seconds a single probe request is let through, if it gets a response the circuit closes
+# and the test run carries on, otherwise it opens again for twice as long, up to max_open_seconds.
+# Any response from the target counts as a success, only the target being unreachable opens the circuit.
+# A target that stays down for max_outage_seconds stops the test run.
+@dataclass
+class CircuitBreaker:
+    host: str
+    # Waiting test requests stop waiting once the test run is stopped
+    stop_threads: threading.Event = field(default_factory=threading.Event)
+    failure_threshold: int = circuit_breaker_failure_threshold
+    open_seconds: float = circuit_breaker_open_seconds
+    max_open_seconds: float = circuit_breaker_max_open_seconds
+    max_outage_seconds: float = circuit_breaker_max_outage_seconds
+    state: CircuitState = CircuitState.CLOSED
+    failures: int = 0
+    # Times the circuit opened since it was last closed, and when it first opened
+    opened: int = 0
+    outage_started: float = 0
+    open_until: float = 0
+    probe_started: float = None
+    condition: threading.Condition = field(default_factory=threading.Condition)
+
+    def before_request(self) -> float:
+        # 0 if a test request can be sent now, else the seconds to wait before asking again
+        with self.condition:
+            if self.state == CircuitState.CLOSED:
+                return 0
+            now = monotonic()
+            if self.state == CircuitState.OPEN:
+                if now < self.open_until:
+                    return self.open_until - now
+                self.state = CircuitState.HALF_OPEN
+                logging.info(f"Circuit to {self.host} is half open, sending a probe.")
+            elif self.probe_started is not None and (
+                now - self.probe_started < self.get_open_seconds()
+            ):
+                return POLL_SECONDS
+            # The probe of a test request that never finished is given up on after as long as the circuit was open
+            self.probe_started = now
+            return 0
+
+    def wait(self) -> bool:
+        # Blocks until a test request can be sent, False if the test run was stopped first
+        while not self.stop_threads.is_set():
+            wait_seconds = self.before_request()
+            if wait_seconds <= 0:
+                return True
+            with self.condition:
+                self.condition.wait(min(wait_seconds, POLL_SECONDS))
+        return False
+
+    def wait_while_open(self) -> bool:
+        # For the queue reader, blocks until a probe is due or the circuit closed.
+        # Tests are handed to the consumers again once a probe is due, so there is a test to probe with.
+        # False if the test run was stopped first.
+        with self.condition:
+            while self.state == CircuitState.OPEN and monotonic() < self.open_until:
+                if self.stop_threads.is_set():
+                    return False
+                self.condition.wait(min(self.open_until - monotonic(), POLL_SECONDS))
+            return not self.stop_threads.is_set()
+
+    def is_open(self) -> bool:
+        # Open or half open
+        with self.condition:
+            return self.state != CircuitState.CLOSED
+
+    def record_success(self) -> None:
+        with self.condition:
+            self.failures = 0
+            if self.state == CircuitState.HALF_OPEN:
+                logging.info(f"Circuit to {self.host} closed, the target is back.")
+                self.state = CircuitState.CLOSED
+                self.opened = 0
+                self.probe_started = None
+                self.condition.notify_all()
+
+    def record_failure(self) -> None:
+        with self.condition:
+            if self.state == CircuitState.HALF_OPEN:
+                self.open("the probe failed")
+            elif self.state == CircuitState.CLOSED:
+                self.failures += 1
+                if self.failures >= self.failure_threshold:
+                    self.open(f"{self.failures} failed test requests in a row")
+            # Requests sent before the circuit opened keep it open for as long as it was
+
+    def open(self, reason: str) -> None:
+        now = monotonic()
+        if self.opened == 0:
+            self.outage_started = now
+        elif now - self.outage_started >= self.max_outage_seconds:
+            logging.error(
+                f"Target {self.host} has been down for {now - self.outage_started:.0f}s, stopping test run."
+            )
+            self.stop_threads.set()
+        self.opened += 1
+        self.state = CircuitState.OPEN
+        self.failures = 0
+        self.probe_started = None
+        self.open_until = now + self.get_open_seconds()
+        logging.warning(
+            f"Circuit to {self.host} opened because {reason}, "
+            f"pausing test requests for {self.get_open_seconds():.0f}s."
+        )
+
+    def get_open_seconds(self) -> float:
+        return min(
+            self.max_open_seconds, self.open_seconds * 2 ** max(0, self.opened - 1)
+        )
+
+    def get_state(self) -> str:
+        with self.condition:
+            return self.state.value
+
+
+def create_circuit_breaker(
+    test_run_config, url: str, stop_threads: threading.Event
+) -> CircuitBreaker:
+    # None if the circuit breaker is off for the test run
+    enabled = (test_run_config or {}).get("circuit_breaker")
+    if not (circuit_breaker if enabled is None else enabled):
+        return None
+    return CircuitBreaker(get_host(url), stop_threads)
+
+
+def allow_request(circuit_breaker: CircuitBreaker) -> bool:
+    if circuit_breaker is None:
+        return True
+    return circuit_breaker.wait()
+
+
+def is_open(circuit_breaker: CircuitBreaker) -> bool:
+    # Test requests are paused, and the test run has not been stopped
+    if circuit_breaker is None:
+        return False
+    return circuit_breaker.is_open() and not circuit_breaker.stop_threads.is_set()
+
+
+def record_success(circuit_breaker: CircuitBreaker) -> None:
+    if circuit_breaker is not None:
+        circuit_breaker.record_success()
+
+
+def record_failure(circuit_breaker: CircuitBreaker) -> None:
+    if circuit_breaker is not None:
+        circuit_breaker.record_failure()
@@ -0,0 +1,74 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from src.mutator.runner.hash_strategy import HashStrategy
+
+# Keys whose match is remembered per field matcher, responses with ever new keys don't grow it further
+MAX_MATCHED_KEYS = 10000
+CONTAINERS = (dict, list)
+
+
+# Response fields used for the response hash, compiled once per test run from the Regression config.
+# Extracts the same fields as boltons remap with a visit(path, key, value) of the hash strategy:
+# a field is kept if its key matches, with its value filtered the same way,
+# and list items are matched by their index, as remap does.
+# Whether a key matches is worked out once per key, as responses repeat the same keys,
+# and fields that are dropped are never traversed.
+@dataclass
+class FieldMatcher:
+    match_key: Callable[[Hashable], bool]
+    matched_keys: Dict[Hashable, bool] = field(default_factory=dict)
+
+    def keep(self, key: Hashable) -> bool:
+        keep = self.matched_keys.get(key)
+        if keep is None:
+            keep = self.match_key(key)
+            if len(self.matched_keys) < MAX_MATCHED_KEYS:
+                self.matched_keys[key] = keep
+        return keep
+
+    def extract(self, value: Any) -> Any:
+        keep = self.keep
+        extract = self.extract
+        # Only containers are traversed, other values are used as they are
+        if isinstance(value, dict):
+            return {
+                k: extract(v) if isinstance(v, CONTAINERS) else v
+                for k, v in value.items()
+                if keep(k)
+            }
+        if isinstance(value, list):
+            return [
+                extract(v) if isinstance(v, CONTAINERS) else v
+                for i, v in enumerate(value)
+                if keep(i)
+            ]
+        return value
+
+
+def compile_field_names(field_names: List[str]) -> "re.Pattern":
+    # One pattern for every field name, instead of a substring check per field name
+    return re.compile(
+        "|".join(re.escape(str(field_name)) for field_name in field_names)
+    )
+
+
+def build_field_matcher(hash_generation: Dict) -> Optional[FieldMatcher]:
+    # None if every field is used
+    field_names = hash_generation.get("field_names") or []
+    hash_strategy = hash_generation.get("strategy")
+
+    if hash_strategy == HashStrategy.INCLUDE_EXACT_MATCH.name:
+        field_names_set = frozenset(field_names)
+        return FieldMatcher(lambda k: k in field_names_set)
+    elif hash_strategy == HashStrategy.EXCLUDE_EXACT_MATCH.name:
+        field_names_set = frozenset(field_names)
+        return FieldMatcher(lambda k: k not in field_names_set)
+    elif hash_strategy == HashStrategy.EXCLUDE_PARTIAL_MATCH.name:
+        if not field_names:
+            return FieldMatcher(lambda k: True)
+        search = compile_field_names(field_names).search
+        return FieldMatcher(lambda k: search(str(k)) is None)
+    else:
+        return None
@@ -0,0 +1,129 @@
+import logging
+import multiprocessing
+import os
+import pathlib
+import zlib
+from configparser import ConfigParser
+from dataclasses import dataclass, field
+from multiprocessing.sharedctypes import RawArray
+from multiprocessing.synchronize import Lock
+from time import monotonic
+from typing import Dict
+from urllib.parse import urlsplit
+
+config = ConfigParser()
+config.read(
+    pathlib.Path(os.path.abspath(__file__)).parents[1].__str__() + "/config/config.ini"
+)
+
+throttle_host: bool = config.getboolean("throttle", "throttle_host")
+throttle_host_requests_per_second: float = config.getfloat(
+    "throttle", "throttle_host_requests_per_second"
+)
+throttle_host_burst: int = config.getint("throttle", "throttle_host_burst")
+throttle_host_overrides: str = config.get("throttle", "throttle_host_overrides")
+throttle_host_slots: int = config.getint("throttle", "throttle_host_slots")
+
+# Every slot of the bucket table is a host key, its tokens, and when they were last refilled
+SLOT_SIZE = 3
+
+
+def parse_host_overrides(host_overrides: str) -> Dict[str, float]:
+    # "http://localhost:8080=50,https://api.example.com=2.5"
+    requests_per_second = {}
+    for host_override in filter(None, map(str.strip, host_overrides.split(","))):
+        url, rate = host_override.rsplit("=", 1)
+        requests_per_second[get_host(url.strip())] = float(rate)
+    return requests_per_second
+
+
+def get_host(url: str) -> str:
+    url_parts = urlsplit(url)
+    return f"{url_parts.scheme}://{url_parts.netloc}".lower()
+
+
+# Token bucket per target host, shared by every consumer of every worker.
+# The buckets live in shared memory, so workers started as processes share them as well,
+# as long as the limiter is created before the processes and handed to them.
+# A request that finds no token reserves the next one and gets how long to wait for it,
+# so callers wait outside of the lock, and an event loop can keep running other requests.
+@dataclass
+class HostRateLimiter:
+    requests_per_second: float = throttle_host_requests_per_second
+    burst: int = throttle_host_burst
+    host_requests_per_second: Dict[str, float] = field(default_factory=dict)
+    slots: int = throttle_host_slots
+    lock: Lock = None
+    buckets: RawArray = None
+
+    def __post_init__(self):
+        if self.lock is None:
+            self.lock = multiprocessing.Lock()
+        if self.buckets is None:
+            self.buckets = multiprocessing.RawArray("d", self.slots * SLOT_SIZE)
+
+    def get_requests_per_second(self, host: str) -> float:
+        return self.host_requests_per_second.get(host, self.requests_per_second)
+
+    def reserve(self, url: str) -> float:
+        # Takes a token for the host of the url, returns the seconds to wait before sending the request
+        host = get_host(url)
+        requests_per_second = self.get_requests_per_second(host)
+        if requests_per_second <= 0:
+            return 0
+        # Same key in every process, unlike hash()
+        host_key = zlib.crc32(host.encode()) + 1
+        with self.lock:
+            now = monotonic()
+            slot = self.find_slot(host_key)
+            if self.buckets[slot] == 0:
+                self.buckets[slot] = host_key
+                self.buckets[slot + 1] = self.burst
+                self.buckets[slot + 2] = now
+            tokens = min(
+                self.burst,
+                self.buckets[slot + 1]
+                + (now - self.buckets[slot + 2]) * requests_per_second,
+            )
+            self.buckets[slot + 1] = tokens - 1
+            self.buckets[slot + 2] = now
+        if tokens >= 1:
+            return 0
+        wait_seconds = (1 - tokens) / requests_per_second
+        logging.debug(f"Waiting {wait_seconds:.3f}s to send a request to {host}.")
+        return wait_seconds
+
+    def find_slot(self, host_key: int) -> int:
+        # Open addressing, hosts are never removed.
+        # Once every slot is taken, a new host shares the limit of the host in its first slot.
+        first_slot = host_key % self.slots
+        for probe in range(self.slots):
+            slot = ((first_slot + probe) % self.slots) * SLOT_SIZE
+            if self.buckets[slot] in [0, host_key]:
+                return slot
+        return first_slot * SLOT_SIZE
+
+
+def create_host_rate_limiter() -> HostRateLimiter:
+    # None if requests to hosts are not throttled
+    if not throttle_host:
+        return None
+    return HostRateLimiter(
+        host_requests_per_second=parse_host_overrides(throttle_host_overrides)
+    )
+
+
+# The limiter of this process, shared by all of its consumers
+host_rate_limiter: HostRateLimiter = create_host_rate_limiter()
+
+
+def use_host_rate_limiter(shared_host_rate_limiter: HostRateLimiter) -> None:
+    # Worker processes use the limiter of the process that started them, instead of their own
+    global host_rate_limiter
+    host_rate_limiter = shared_host_rate_limiter
+
+
+def reserve_request(url: str) -> float:
+    if host_rate_limiter is None:
+        return 0
+    return host_rate_limiter.reserve(url)
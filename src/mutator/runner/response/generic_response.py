@@ -9,4 +9,12 @@ class GenericResponse:
     headers: Dict
     body: Dict
     status_code: int
-    elapsed_time: float
+    elapsed_time: float = None
+    # Hash of the whole body as it was read, and if only the start of the body was kept
+    body_hash: str = None
+    body_truncated: bool = False
+    # What the response hash was created from
+    hash_fields: Dict = None
+    # The body as it was read, up to response_body_max_bytes, for validators that scan it.
+    # Dropped once the response is validated.
+    raw_body: bytes = None
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import pathlib
+from configparser import ConfigParser
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+config = ConfigParser()
+config.read(
+    pathlib.Path(os.path.abspath(__file__)).parents[2].__str__() + "/config/config.ini"
+)
+
+response_body_max_bytes: int = config.getint("consumer", "response_body_max_bytes")
+response_chunk_bytes: int = config.getint("consumer", "response_chunk_bytes")
+
+TRUNCATED_MARKER = "...[truncated, {size} bytes]"
+
+
+# Reads a response body chunk by chunk, hashing all of it while keeping only the first max_bytes.
+# A test request never holds more than max_bytes and a chunk of its response in memory,
+# no matter how large the response is. A max_bytes of 0 keeps the whole body.
+@dataclass
+class ResponseBody:
+    max_bytes: int = response_body_max_bytes
+    # Bytes read, and bytes kept
+    size: int = 0
+    kept: int = 0
+    truncated: bool = False
+    chunks: List[bytes] = field(default_factory=list)
+    digest: Any = field(default_factory=hashlib.sha1)  # nosec
+
+    def feed(self, chunk: bytes) -> None:
+        self.digest.update(chunk)
+        self.size += len(chunk)
+        room = self.max_bytes - self.kept if self.max_bytes else len(chunk)
+        if room < len(chunk):
+            self.truncated = True
+            chunk = chunk[:room]
+        if chunk:
+            self.chunks.append(chunk)
+            self.kept += len(chunk)
+
+    def get_hash(self) -> str:
+        # Of the whole body, also when it was truncated
+        return self.digest.hexdigest()
+
+    def get_content(self) -> bytes:
+        # The bytes that were kept, joined once
+        if len(self.chunks) != 1:
+            self.chunks = [b"".join(self.chunks)]
+        return self.chunks[0]
+
+    def build_body(self, content_type: str, encoding: str = None) -> Dict:
+        content = self.get_content()
+        if content_type == "application/json" and not self.truncated:
+            try:
+                return json.loads(
+                    content, parse_constant=reject_constant, parse_float=parse_float
+                )
+            except ValueError as e:
+                # Still validated and persisted, as the text that was received
+                logging.debug(
+                    f"Response body is not valid JSON, keeping it as text: {e}"
+                )
+        text = content.decode(encoding or "utf-8", errors="replace")
+        if self.truncated:
+            text += TRUNCATED_MARKER.format(size=self.size)
+        return {"raw_response": text}
+
+
+def reject_constant(constant: str):
+    # NaN and Infinity aren't JSON, and can't be hashed as canonical JSON
+    raise ValueError(f"{constant} is not a JSON number")
+
+
+def parse_float(number: str) -> float:
+    value = float(number)
+    if not math.isfinite(value):
+        raise ValueError(f"{number} is out of range of a JSON number")
+    return value
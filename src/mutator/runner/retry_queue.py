@@ -0,0 +1,143 @@
+import heapq
+import itertools
+import logging
+import os
+import pathlib
+import random
+import threading
+from configparser import ConfigParser
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from time import monotonic
+from typing import Iterator, List, Optional, Tuple
+
+from src.mutator.generator.test import Test
+
+config = ConfigParser()
+config.read(
+    pathlib.Path(os.path.abspath(__file__)).parents[1].__str__() + "/config/config.ini"
+)
+
+retry_max_retries: int = config.getint("consumer", "retry_max_retries")
+retry_backoff_max_seconds: float = config.getfloat(
+    "consumer", "retry_backoff_max_seconds"
+)
+retry_after_max_seconds: float = config.getfloat("consumer", "retry_after_max_seconds")
+
+
+# A test request that failed in a way that is worth trying again: a 429 response, a timeout, or a connection error
+class RetryableRequestError(Exception):
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        # Seconds from the Retry-After header of the response, if it had one
+        self.retry_after = retry_after
+
+
+def parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
+    # Retry-After is either seconds or an HTTP date
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        logging.debug(f"Ignoring invalid Retry-After header: {retry_after}")
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def get_retry_delay(retries: int, retry_after: float = None) -> float:
+    # Seconds to wait before the given retry of a test.
+    # The target's Retry-After if it sent one, else a random exponential backoff, same as tenacity's
+    # wait_random_exponential(multiplier=1, max=retry_backoff_max_seconds).
+    if retry_after is not None:
+        return min(retry_after, retry_after_max_seconds)
+    return random.uniform(0, min(retry_backoff_max_seconds, 2**retries))  # nosec
+
+
+def next_retry_delay(test: Test, error: RetryableRequestError) -> Optional[float]:
+    # Counts the retry on the test, None once the test is out of retries
+    if test.retries >= retry_max_retries:
+        logging.warning(
+            f"Test request to {test.url} failed after {test.retries} retries: {error}"
+        )
+        return None
+    test.retries += 1
+    delay_seconds = get_retry_delay(test.retries, error.retry_after)
+    logging.info(
+        f"Test request to {test.url} failed, retry {test.retries} of {retry_max_retries} "
+        f"in {delay_seconds:.2f}s: {error}"
+    )
+    return delay_seconds
+
+
+# Tests waiting to be retried by the consumer threads of a worker, ordered by when they are due.
+# A consumer schedules a failed test and moves on to the next one, instead of sleeping until it can retry.
+# Consumers that run out of tests keep running retries until no test of the worker is pending,
+# as any test that is still running could need a retry.
+@dataclass
+class RetryQueue:
+    # Due time, insertion order to keep the heap from comparing tests, and the test
+    heap: List[Tuple[float, int, Test]] = field(default_factory=list)
+    counter: Iterator[int] = field(default_factory=itertools.count)
+    # Tests taken from the worker queue without a result yet, running or waiting to be retried
+    pending: int = 0
+    condition: threading.Condition = field(default_factory=threading.Condition)
+
+    def __len__(self) -> int:
+        with self.condition:
+            return len(self.heap)
+
+    def start(self) -> None:
+        with self.condition:
+            self.pending += 1
+
+    def finish(self) -> None:
+        with self.condition:
+            self.pending -= 1
+            self.condition.notify_all()
+
+    def has_pending(self) -> bool:
+        with self.condition:
+            return self.pending > 0
+
+    def schedule(self, test: Test, delay_seconds: float) -> None:
+        with self.condition:
+            heapq.heappush(
+                self.heap, (monotonic() + delay_seconds, next(self.counter), test)
+            )
+            self.condition.notify_all()
+
+    def schedule_retry(self, test: Test, error: RetryableRequestError) -> bool:
+        # False once the test is out of retries
+        delay_seconds = next_retry_delay(test, error)
+        if delay_seconds is None:
+            return False
+        self.schedule(test, delay_seconds)
+        return True
+
+    def pop_due(self) -> Optional[Test]:
+        with self.condition:
+            if not self.heap or self.heap[0][0] > monotonic():
+                return None
+            return heapq.heappop(self.heap)[2]
+
+    def seconds_until_due(self, max_seconds: float) -> float:
+        # Up to max_seconds until the next test is due
+        with self.condition:
+            if not self.heap:
+                return max_seconds
+            return max(0.0, min(max_seconds, self.heap[0][0] - monotonic()))
+
+    def wait(self, max_seconds: float) -> None:
+        # Until the next test is due, a test is scheduled or finished, or max_seconds have passed.
+        # Returns straight away if no test is pending.
+        with self.condition:
+            if self.pending > 0 or self.heap:
+                self.condition.wait(self.seconds_until_due(max_seconds))
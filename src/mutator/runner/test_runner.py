@@ -2,26 +2,36 @@ import logging
 import os
 import pathlib
 from configparser import ConfigParser
+from time import monotonic, sleep
 from typing import Dict
 
 import requests
-from boltons.iterutils import remap
 from requests import Response, Session
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_random_exponential,
-    stop_after_delay,
-    retry_if_exception_type,
-    after_log,
-    before_sleep_log,
-)
 
 from src.common.test_result.test_result import TestResult
-from src.mutator.common.utils.hash import hash_object
+from src.mutator.common.utils.hash import hash_response
 from src.mutator.generator.test import Test
+from src.mutator.runner.adaptive_concurrency import (
+    AdaptiveConcurrency,
+    record_response,
+    record_timeout,
+)
+from src.mutator.runner.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    allow_request,
+    record_failure,
+    record_success,
+)
+from src.mutator.runner.field_matcher import FieldMatcher
+from src.mutator.runner.host_rate_limiter import reserve_request
+from src.mutator.runner.retry_queue import RetryableRequestError, parse_retry_after
 from src.mutator.runner.request.generic_request import GenericRequest
 from src.mutator.runner.response.generic_response import GenericResponse
+from src.mutator.runner.response.response_body import (
+    ResponseBody,
+    response_chunk_bytes,
+)
 
 log = logging.getLogger()
 
@@ -33,21 +43,24 @@ config = ConfigParser()
 config.read(config_file_path)
 
 request_timeout: int = config.getint("consumer", "request_timeout")
+response_hash_version: int = config.getint("consumer", "response_hash_version")
 
 
-@retry(
-    wait=wait_random_exponential(multiplier=1, max=60),
-    stop=(stop_after_delay(60) | stop_after_attempt(3)),
-    retry=retry_if_exception_type(requests.exceptions.RequestException),
-    before_sleep=before_sleep_log(logging.getLogger(), logging.WARNING),
-    after=after_log(logging.getLogger(), logging.WARNING),
-)
-def run(test: Test, field_matcher, session: Session) -> TestResult:
+# Raises RetryableRequestError for requests that can be retried, the consumer schedules the retry
+def run(
+    test: Test,
+    field_matcher,
+    session: Session,
+    concurrency: AdaptiveConcurrency = None,
+    circuit_breaker: CircuitBreaker = None,
+) -> TestResult:
     logging.debug(f"Building request from test {test}")
     request: GenericRequest = build_request(test)
 
     logging.debug(f"Performing Request: {request.__dict__}")
-    response: GenericResponse = perform_request(request, session)
+    response: GenericResponse = perform_request(
+        request, session, concurrency, circuit_breaker
+    )
     logging.debug(f"Finished performing Request: {request.__dict__}")
 
     test_result = TestResult()
@@ -73,32 +86,45 @@ def build_request(test: Test) -> GenericRequest:
     return request
 
 
-def build_response_hash(test: GenericResponse, field_matcher) -> GenericResponse:
-    logging.debug(f"creating response hash for response_json:{test.__dict__}")
+def build_response_hash(
+    test: GenericResponse, field_matcher, version: int = None
+) -> str:
+    logging.debug("creating response hash for response_json: %s", test.__dict__)
     # Add field matching strategies to select which fields to use to create response hash
     # Response might include changing values like create_date or id
+    # A truncated body is compared by the hash of all of it, as its fields can't be read
     response = {
         "url": test.url,
-        "body": extract_response_fields(test.body, field_matcher),
+        "body": test.body_hash
+        if test.body_truncated
+        else extract_response_fields(test.body, field_matcher),
         "status_code": test.status_code,
     }
-    response_hash = hash_object(response)
+    # Kept so the response can be compared to hashes of other versions
+    test.hash_fields = response
+    response_hash = hash_response(
+        response, response_hash_version if version is None else version
+    )
     logging.debug(f"created hash {response_hash}")
 
     return response_hash
 
 
-def extract_response_fields(body: Dict, field_matcher):
+def extract_response_fields(body: Dict, field_matcher: FieldMatcher):
     if body is None or not isinstance(body, Dict):
         return None
     if field_matcher is None:
         # Using all fields, so don't alter
         return body
-    new_body = remap(body, visit=field_matcher)
-    return new_body
+    return field_matcher.extract(body)
 
 
-def perform_request(request: GenericRequest, session: Session) -> GenericResponse:
+def perform_request(
+    request: GenericRequest,
+    session: Session,
+    concurrency: AdaptiveConcurrency = None,
+    circuit_breaker: CircuitBreaker = None,
+) -> GenericResponse:
     url = request.url
     logging.debug(f"Performing request {request.method} to url: {url}.")
 
@@ -108,18 +134,49 @@ def perform_request(request: GenericRequest, session: Session) -> GenericRespons
     else:
         logging.debug(f"performing request to url '{url}' with content: {request.body}")
 
-    response: Response = session.request(
-        headers=request.headers,
-        method=request.method,
-        url=url,
-        json=content if content is not None else None,
-        timeout=request_timeout,
-    )
+    if not allow_request(circuit_breaker):
+        raise CircuitOpenError(f"Test run stopped while the circuit to {url} was open")
+    wait_seconds = reserve_request(url)
+    if wait_seconds > 0:
+        sleep(wait_seconds)
+
+    started = monotonic()
+    try:
+        response: Response = session.request(
+            headers=request.headers,
+            method=request.method,
+            url=url,
+            json=content if content is not None else None,
+            timeout=request_timeout,
+            stream=True,
+        )
+    except requests.exceptions.Timeout as e:
+        record_timeout(concurrency, started)
+        record_failure(circuit_breaker)
+        raise RetryableRequestError(f"Request timed out: {e}") from e
+    except requests.exceptions.RequestException as e:
+        record_failure(circuit_breaker)
+        raise RetryableRequestError(f"Request failed: {e}") from e
 
     logging.debug(f"Finished performing request to url: {url}")
+    record_success(circuit_breaker)
+    with response:
+        return read_response(response, url, started, concurrency)
+
+
+def read_response(
+    response: Response,
+    url: str,
+    started: float,
+    concurrency: AdaptiveConcurrency,
+) -> GenericResponse:
     status = response.status_code
+    record_response(concurrency, started, response.elapsed.total_seconds(), status)
     if status == 429:
-        raise requests.exceptions.RequestException(f"Response code {status} received")
+        raise RetryableRequestError(
+            f"Response code {status} received",
+            parse_retry_after(response.headers.get("Retry-After")),
+        )
     headers = dict(response.headers)
 
     generic_response = GenericResponse()
@@ -127,11 +184,19 @@ def perform_request(request: GenericRequest, session: Session) -> GenericRespons
     generic_response.headers = dict(**headers)
     generic_response.url = str(url)
 
-    content_type = headers.get("Content-Type")
-    if content_type == "application/json":
-        generic_response.body = response.json()
-    else:
-        generic_response.body = {"raw_response": str(response.text)}
+    # Read in chunks, so a large response never has to fit in memory
+    response_body = ResponseBody()
+    try:
+        for chunk in response.iter_content(response_chunk_bytes):
+            response_body.feed(chunk)
+    except requests.exceptions.RequestException as e:
+        raise RetryableRequestError(f"Reading response failed: {e}") from e
+    generic_response.raw_body = response_body.get_content()
+    generic_response.body = response_body.build_body(
+        headers.get("Content-Type"), response.encoding
+    )
+    generic_response.body_hash = response_body.get_hash()
+    generic_response.body_truncated = response_body.truncated
 
     generic_response.elapsed_time = response.elapsed.total_seconds()
     logging.debug(f"Current response: {generic_response.__dict__}")
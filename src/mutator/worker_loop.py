@@ -8,7 +8,7 @@ import uuid
 from configparser import ConfigParser
 from queue import Queue
 from time import sleep
-from typing import Dict, List, Union
+from typing import Callable, Dict, List, Set, Union
 
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, scoped_session
@@ -29,9 +29,43 @@ from src.mutator.common.utils.persistent_queue.buffer_queues.queue_reader import
 from src.mutator.common.utils.persistent_queue.buffer_queues.queue_writer import (
     QueueWriter,
 )
+from src.mutator.common.utils.persistent_queue.buffer_queues.stream_writer import (
+    StreamWriter,
+)
+from src.mutator.common.utils.persistent_queue.ack_tracker import AckTracker
 from src.mutator.common.utils.persistent_queue.persistent_queue import PersistentQueue
+from src.mutator.common.utils.persistent_queue.queue_backend import QueueBackend
+from src.mutator.common.utils.persistent_queue.segment_file_queue import (
+    SegmentFileQueue,
+    segment_fsync_policies,
+    worker_queue_segment_fsync,
+)
 from src.mutator.consumer import consumer
-from src.mutator.producer import produce_tests
+from src.mutator.generator import generator
+from src.mutator.producer import produce_tests, stream_tests
+from src.mutator.result_processor.service.result_writer import ResultWriter
+from src.mutator.result_processor.validations import regression
+from src.mutator.result_processor.validations.latency_outlier import (
+    LatencyBaseline,
+    load_latency_baseline,
+)
+from src.mutator.result_processor.validations.regression import (
+    RegressionBaseline,
+    load_regression_baseline,
+)
+from src.mutator.runner.adaptive_concurrency import (
+    AdaptiveConcurrency,
+    create_adaptive_concurrency,
+)
+from src.mutator.runner.circuit_breaker import (
+    CircuitBreaker,
+    create_circuit_breaker,
+)
+from src.mutator.runner.host_rate_limiter import (
+    HostRateLimiter,
+    use_host_rate_limiter,
+)
+from src.mutator.runner.retry_queue import RetryQueue
 
 base_config_dir = (
     pathlib.Path(os.path.abspath(__file__)).parents[0].__str__() + "/config"
@@ -46,12 +80,17 @@ worker_queue_blocking_size: int = config.getint(
 max_test_run_attempts: int = config.getint("worker_loop", "max_test_run_attempts")
 consumer_count: int = os.getenv("CONSUMERS", config.getint("consumer", "count"))
 consumer_request_timeout: int = config.getint("consumer", "request_timeout")
+consumer_mode: str = config.get("consumer", "mode")
 consumer_worker_queue_blocking_seconds: int = config.getint(
     "worker_queue", "worker_queue_blocking_seconds"
 )
 worker_queue_batch_write_size: int = config.getint(
     "worker_queue", "worker_queue_batch_write_size"
 )
+worker_queue_streaming: bool = config.getboolean(
+    "worker_queue", "worker_queue_streaming"
+)
+worker_queue_backend: str = config.get("worker_queue", "worker_queue_backend")
 cancellation_listener_interval_seconds: int = config.getint(
     "background_jobs", "cancellation_listener_interval_seconds"
 )
@@ -80,6 +119,25 @@ if throttle_interval_seconds > consumer_worker_queue_blocking_seconds:
     )
     exit(1)
 
+if consumer_mode not in ["thread", "async"]:
+    logging.error(
+        f"Config for consumer mode must be thread or async, not {consumer_mode}."
+    )
+    exit(1)
+
+if worker_queue_backend not in ["sql", "segment_file"]:
+    logging.error(
+        f"Config for worker_queue_backend must be sql or segment_file, not {worker_queue_backend}."
+    )
+    exit(1)
+
+if worker_queue_segment_fsync not in segment_fsync_policies:
+    logging.error(
+        f"Config for worker_queue_segment_fsync must be one of {segment_fsync_policies}, "
+        f"not {worker_queue_segment_fsync}."
+    )
+    exit(1)
+
 test_repository = TestRepository(base_config_dir, "/test_config.json")
 database_url_env = os.environ.get("DATABASE")
 if database_url_env is None:
@@ -126,7 +184,12 @@ use_polling = os.getenv("USE_POLLING", False)
 
 
 # Need to pull some of this out into its own classes
-def start_worker_loop(test_run_notification_queue: Queue):
+def start_worker_loop(
+    test_run_notification_queue: Queue, host_rate_limiter: HostRateLimiter = None
+):
+    # Requests to a host are throttled across every worker, not only the test runs of this worker
+    if host_rate_limiter is not None:
+        use_host_rate_limiter(host_rate_limiter)
     mutator_db_session = scoped_session(sessionmaker(bind=mutator_db_engine))
     worker_name: str = uuid.uuid4().hex
     logging.info(f"STARTING MUTATOR WORKER: {worker_name}.")
@@ -181,63 +244,58 @@ def start_worker_loop(test_run_notification_queue: Queue):
             )
             logging.debug(f"Creating local worker queue for test run {test_run.id}.")
             worker_queue: Queue = Queue(maxsize=worker_queue_blocking_size)
-            remove_old_tests(mutator_db_session, test_run)
-
-            persistent_queue: PersistentQueue = PersistentQueue(
-                test_run.id, mutator_db_session
-            )
-            # Remove any old tests for test run id to start fresh
-            persistent_queue.remove_all()
-            update_test_run_state(
-                test_run,
-                State.GENERATING,
-                StateDescription.GENERATING,
-                mutator_db_session,
+            persistent_queue: QueueBackend = create_persistent_queue(
+                test_run, mutator_db_session
             )
-
-            # Setup and start buffered test run writer to batch save tests to persistent queue
-            buffer_queue = Queue(maxsize=worker_queue_batch_write_size)
-            queue_writer = QueueWriter(
-                buffer_queue, persistent_queue, stop_threads, test_run.id
-            )
-            queue_writer_thread = threading.Thread(target=queue_writer.write_queue)
-            queue_writer_thread.start()
-
-            test_count: int = produce_tests(test_repository, test_run, buffer_queue)
-            update_test_count(test_run, test_count, mutator_db_session)
-            if test_count == 0:
-                update_test_run_state(
+            if should_resume_test_run(test_run, persistent_queue):
+                tested_request_hashes = resume_test_run(test_run, mutator_db_session)
+            else:
+                tested_request_hashes = set()
+                remove_old_tests(mutator_db_session, test_run)
+                # Expected test count is known before generation starts,
+                # it is replaced by the generated count once generation has finished.
+                update_test_count(
                     test_run,
-                    State.FAILED,
-                    StateDescription.TEST_GENERATION_FAILURE,
+                    generator.count(test_repository, test_run),
                     mutator_db_session,
-                    False,
                 )
-                stop_threads.set()
-                continue
 
-            if os.getenv("DRY_RUN"):
-                logging.info("DRY RUN: Finished generating tests for the dry run.")
-                update_test_run_state(
-                    test_run,
-                    State.COMPLETED,
-                    StateDescription.SUCCESS_DRY_RUN,
-                    mutator_db_session,
-                )
-                stop_threads.set()
-                continue
+                if should_stream_tests(test_run):
+                    canceller_thread = run_streamed_tests(
+                        test_run, worker_queue, stop_threads, mutator_db_session
+                    )
+                    finish_test_run(
+                        test_run,
+                        stop_threads,
+                        lock_refresher_thread,
+                        canceller_thread,
+                        mutator_db_session,
+                    )
+                    continue
+
+                if not generate_test_queue(
+                    test_run, persistent_queue, stop_threads, mutator_db_session
+                ):
+                    continue
 
             update_test_run_state(
                 test_run, State.RUNNING, StateDescription.RUNNING, mutator_db_session
             )
 
             # Incrementally load persisted tests into in-memory queue for test runners
+            ack_tracker = AckTracker()
+            concurrency = create_concurrency(test_run)
+            circuit_breaker = create_test_run_circuit_breaker(test_run, stop_threads)
             test_queue_reader_thread = start_test_queue_reader(
                 test_run,
                 persistent_queue,
                 worker_queue,
                 stop_threads,
                 mutator_db_session,
+                ack_tracker,
+                tested_request_hashes,
+                concurrency,
+                circuit_breaker,
             )
 
             # Run test runners
@@ -246,9 +304,26 @@ def start_worker_loop(test_run_notification_queue: Queue):
             validation_config = update_config(
                 test_run.config, default_validation_config, "validation"
             )
+            regression_baseline = create_regression_baseline(
+                test_run, validation_config, mutator_db_session
+            )
+            latency_baseline = create_latency_baseline(
+                test_run, validation_config, mutator_db_session
+            )
 
+            # Tests are acked once the result writer has committed their results
+            result_writer = ResultWriter(mutator_db_session, ack_tracker)
+            result_writer_thread = start_result_writer(result_writer)
             consumers = start_consumers(
-                mutator_db_session, stop_threads, validation_config, worker_queue
+                mutator_db_session,
+                stop_threads,
+                validation_config,
+                worker_queue,
+                result_writer,
+                concurrency,
+                circuit_breaker,
+                regression_baseline,
+                latency_baseline,
             )
             canceller_thread = start_cancellation_monitoring(
                 test_run, stop_threads, mutator_db_session
@@ -258,34 +333,17 @@ def start_worker_loop(test_run_notification_queue: Queue):
             for consumer_thread in consumers:
                 consumer_thread.join()
             test_queue_reader_thread.join()
+            stop_result_writer(result_writer, result_writer_thread)
+            # Tests finished after the queue reader exited
+            persistent_queue.ack_up_to(ack_tracker.checkpoint)
 
-            logging.info(f"Finished running tests for test run {test_run.id}.")
-            logging.info("Processing test results to see if test run passed.")
-            with mutator_db_session() as session:
-                final_test_run: TestRun = test_run_service.get_test_run(
-                    test_run.id, session
-                )
-
-            if can_process_test_results(final_test_run):
-                test_result_failures = get_failed_tests(test_run, mutator_db_session)
-                logging.debug(f"Finalizing state for test: {final_test_run.__dict__}")
-                test_run_final_update = create_final_test_run_state(
-                    test_run, final_test_run, test_result_failures
-                )
-                with mutator_db_session() as session:
-                    test_run_service.update_test_run(test_run_final_update, session)
-            else:
-                logging.info(
-                    f"Test run already in state {final_test_run.state}. Not processing test results"
-                )
-
-            logging.info("Test run is finished. Performing clean up.")
-            logging.info("Stopping background threads.")
-            if not stop_threads.is_set():
-                stop_threads.set()
-            lock_refresher_thread.join()
-            canceller_thread.join()
-            logging.info("Background threads stopped.")
+            finish_test_run(
+                test_run,
+                stop_threads,
+                lock_refresher_thread,
+                canceller_thread,
+                mutator_db_session,
+            )
             clean_up_test_queue(persistent_queue)
             logging.info("Cleanup complete.")
             logging.info("Finished with test run.")
@@ -301,11 +359,220 @@ def start_worker_loop(test_run_notification_queue: Queue):
             )
 
 
+def create_persistent_queue(
+    test_run: TestRun, mutator_db_session: ScopedSession
+) -> QueueBackend:
+    if worker_queue_backend == "segment_file":
+        return SegmentFileQueue(test_run.id)
+    return PersistentQueue(test_run.id, mutator_db_session)
+
+
+def generate_test_queue(
+    test_run: TestRun,
+    persistent_queue: QueueBackend,
+    stop_threads: threading.Event,
+    mutator_db_session: ScopedSession,
+) -> bool:
+    # Returns False if there are no tests to run
+    # Remove any old tests for test run id to start fresh
+    persistent_queue.remove_all()
+    update_test_run_state(
+        test_run,
+        State.GENERATING,
+        StateDescription.GENERATING,
+        mutator_db_session,
+    )
+
+    # Setup and start buffered test run writer to batch save tests to persistent queue
+    buffer_queue = Queue(maxsize=worker_queue_batch_write_size)
+    queue_writer = QueueWriter(
+        buffer_queue, persistent_queue, stop_threads, test_run.id
+    )
+    queue_writer_thread = threading.Thread(target=queue_writer.write_queue)
+    queue_writer_thread.start()
+
+    try:
+        test_count: int = produce_tests(test_repository, test_run, buffer_queue)
+    finally:
+        # Wait for the last batch of tests to be written
+        queue_writer.close()
+        queue_writer_thread.join()
+    if queue_writer.failed:
+        # Running it would end in a test count mismatch, as the test queue is missing tests
+        update_test_run_state(
+            test_run,
+            State.FAILED,
+            StateDescription.TEST_GENERATION_FAILURE,
+            mutator_db_session,
+            False,
+        )
+        stop_threads.set()
+        return False
+    update_test_count(test_run, test_count, mutator_db_session)
+    if test_count == 0:
+        update_test_run_state(
+            test_run,
+            State.FAILED,
+            StateDescription.TEST_GENERATION_FAILURE,
+            mutator_db_session,
+            False,
+        )
+        stop_threads.set()
+        return False
+
+    if os.getenv("DRY_RUN"):
+        logging.info("DRY RUN: Finished generating tests for the dry run.")
+        update_test_run_state(
+            test_run,
+            State.COMPLETED,
+            StateDescription.SUCCESS_DRY_RUN,
+            mutator_db_session,
+        )
+        stop_threads.set()
+        return False
+    return True
+
+
+def should_resume_test_run(test_run: TestRun, persistent_queue: QueueBackend) -> bool:
+    # A test run is only RUNNING once all of its tests have been written to the test queue,
+    # and tests are only acked once their results have been processed.
+    # So the test queue still holds every test of an earlier attempt that might not have a result.
+    if test_run.state != State.RUNNING.value or should_stream_tests(test_run):
+        return False
+    return persistent_queue.size() > 0
+
+
+def resume_test_run(test_run: TestRun, mutator_db_session: ScopedSession) -> Set[str]:
+    # Keep the results of earlier attempts, and only run the tests without results
+    with mutator_db_session() as session:
+        tested_request_hashes = test_result_service.get_tested_request_hashes(
+            test_run.id, session
+        )
+    logging.info(
+        f"Resuming test run {test_run.id} from the test queue. "
+        f"{len(tested_request_hashes)} tests already have results."
+    )
+    test_run_update = TestRun()
+    test_run_update.id = test_run.id
+    test_run_update.test_result_count = len(tested_request_hashes)
+    with mutator_db_session() as session:
+        test_run_service.update_test_run(test_run_update, session)
+    return tested_request_hashes
+
+
+def should_stream_tests(test_run: TestRun) -> bool:
+    if os.getenv("DRY_RUN"):
+        return False
+    streaming = (test_run.config or {}).get("streaming")
+    return worker_queue_streaming if streaming is None else streaming
+
+
+def run_streamed_tests(
+    test_run: TestRun,
+    worker_queue: Queue,
+    stop_threads: threading.Event,
+    mutator_db_session: ScopedSession,
+) -> threading.Thread:
+    # Consumers have to be running before generation starts,
+    # the generator blocks on the bounded worker queue until they pull tests from it.
+    logging.info(f"Streaming tests for test run {test_run.id}.")
+    update_test_run_state(
+        test_run, State.RUNNING, StateDescription.RUNNING, mutator_db_session
+    )
+    validation_config = update_config(
+        test_run.config, default_validation_config, "validation"
+    )
+    regression_baseline = create_regression_baseline(
+        test_run, validation_config, mutator_db_session
+    )
+    latency_baseline = create_latency_baseline(
+        test_run, validation_config, mutator_db_session
+    )
+    concurrency = create_concurrency(test_run)
+    circuit_breaker = create_test_run_circuit_breaker(test_run, stop_threads)
+    result_writer = ResultWriter(mutator_db_session)
+    result_writer_thread = start_result_writer(result_writer)
+    consumers = start_consumers(
+        mutator_db_session,
+        stop_threads,
+        validation_config,
+        worker_queue,
+        result_writer,
+        concurrency=concurrency,
+        circuit_breaker=circuit_breaker,
+        regression_baseline=regression_baseline,
+        latency_baseline=latency_baseline,
+    )
+    canceller_thread = start_cancellation_monitoring(
+        test_run, stop_threads, mutator_db_session
+    )
+
+    stream_writer = StreamWriter(
+        worker_queue,
+        stop_threads,
+        test_run.id,
+        mutator_db_session,
+        concurrency=concurrency,
+        circuit_breaker=circuit_breaker,
+    )
+    test_count: int = stream_tests(test_repository, test_run, stream_writer)
+    update_test_count(test_run, test_count, mutator_db_session)
+    if test_count == 0:
+        update_test_run_state(
+            test_run,
+            State.FAILED,
+            StateDescription.TEST_GENERATION_FAILURE,
+            mutator_db_session,
+            False,
+        )
+        stop_threads.set()
+    stream_writer.close(len(consumers))
+
+    for consumer_thread in consumers:
+        consumer_thread.join()
+    stop_result_writer(result_writer, result_writer_thread)
+    return canceller_thread
+
+
+def finish_test_run(
+    test_run: TestRun,
+    stop_threads: threading.Event,
+    lock_refresher_thread: threading.Thread,
+    canceller_thread: threading.Thread,
+    mutator_db_session: ScopedSession,
+):
+    logging.info(f"Finished running tests for test run {test_run.id}.")
+    logging.info("Processing test results to see if test run passed.")
+    with mutator_db_session() as session:
+        final_test_run: TestRun = test_run_service.get_test_run(test_run.id, session)
+
+    if can_process_test_results(final_test_run):
+        test_result_failures = get_failed_tests(test_run, mutator_db_session)
+        logging.debug(f"Finalizing state for test: {final_test_run.__dict__}")
+        test_run_final_update = create_final_test_run_state(
+            test_run, final_test_run, test_result_failures
+        )
+        with mutator_db_session() as session:
+            test_run_service.update_test_run(test_run_final_update, session)
+    else:
+        logging.info(
+            f"Test run already in state {final_test_run.state}. Not processing test results"
+        )
+
+    logging.info("Test run is finished. Performing clean up.")
+    logging.info("Stopping background threads.")
+    if not stop_threads.is_set():
+        stop_threads.set()
+    lock_refresher_thread.join()
+    canceller_thread.join()
+    logging.info("Background threads stopped.")
+
+
 def can_process_test_results(final_test_run):
-    return final_test_run.state != (State.CANCELLED.value or State.FAILED.value)
+    return final_test_run.state not in (State.CANCELLED.value, State.FAILED.value)
 
 
-def clean_up_test_queue(persistent_queue: PersistentQueue):
+def clean_up_test_queue(persistent_queue: QueueBackend):
     if persistent_queue.size() != 0:
         logging.warning("Test queue is not empty, removing old tests.")
         persistent_queue.remove_all()
@@ -397,10 +664,14 @@ def start_lock_refresher(
 
 def start_test_queue_reader(
     test_run: TestRun,
-    persistent_queue: PersistentQueue,
+    persistent_queue: QueueBackend,
     worker_queue: Queue,
     stop_threads: threading.Event,
     mutator_db_session: ScopedSession,
+    ack_tracker: AckTracker,
+    tested_request_hashes: Set[str],
+    concurrency: AdaptiveConcurrency,
+    circuit_breaker: CircuitBreaker = None,
 ):
     queue_reader: QueueReader = QueueReader(
         persistent_queue,
@@ -408,6 +679,11 @@ def start_test_queue_reader(
         stop_threads,
         test_run.id,
         mutator_db_session,
+        test_run.endpoint,
+        ack_tracker,
+        tested_request_hashes,
+        concurrency,
+        circuit_breaker,
     )
     queue_reader_thread = threading.Thread(target=queue_reader.read_queue)
     queue_reader_thread.start()
@@ -437,25 +713,114 @@ def start_consumers(
     stop_threads: threading.Event,
     validation_config: Dict,
     worker_queue: Queue,
+    result_writer: ResultWriter = None,
+    concurrency: AdaptiveConcurrency = None,
+    circuit_breaker: CircuitBreaker = None,
+    regression_baseline: RegressionBaseline = None,
+    latency_baseline: LatencyBaseline = None,
 ):
+    # Consumers hand their validated results to the result writer, which acks their tests
+    # A single async consumer runs all of the test requests of a worker,
+    # consumer threads share the tests that are waiting to be retried
+    retry_queue = RetryQueue()
     consumers: List[threading.Thread] = [
         threading.Thread(
-            target=consumer,
+            target=get_async_consumer() if consumer_mode == "async" else consumer,
             args=(
                 worker_queue,
                 consumer_worker_queue_blocking_seconds,
                 validation_config,
                 stop_threads,
                 mutator_db_session,
+                None,
+                concurrency,
+                circuit_breaker,
             ),
+            kwargs={
+                "result_writer": result_writer,
+                "regression_baseline": regression_baseline,
+                "latency_baseline": latency_baseline,
+            }
+            if consumer_mode == "async"
+            else {
+                "retry_queue": retry_queue,
+                "result_writer": result_writer,
+                "regression_baseline": regression_baseline,
+                "latency_baseline": latency_baseline,
+            },
         )
-        for _ in range(consumer_count)
+        for _ in range(1 if consumer_mode == "async" else consumer_count)
     ]
     for consumer_thread in consumers:
         consumer_thread.start()
     return consumers
 
 
+def get_async_consumer() -> Callable:
+    # Only imported in the async mode, so the other modes run without aiohttp
+    from src.mutator.async_consumer import async_consumer
+
+    return async_consumer
+
+
+def start_result_writer(result_writer: ResultWriter) -> threading.Thread:
+    result_writer_thread = threading.Thread(target=result_writer.write_results)
+    result_writer_thread.start()
+    return result_writer_thread
+
+
+def stop_result_writer(
+    result_writer: ResultWriter, result_writer_thread: threading.Thread
+) -> None:
+    # Waits for every result the consumers handed over to be written, before the test run is finished
+    result_writer.close()
+    result_writer_thread.join()
+
+
+def create_regression_baseline(
+    test_run: TestRun, validation_config: Dict, mutator_db_session: ScopedSession
+) -> RegressionBaseline:
+    # Loaded once for all of the consumers of the test run. None if the Regression validator is disabled,
+    # or there are too many request hashes to load, previous response hashes are then looked up per result.
+    regression_config = validation_config.get("Regression") or {}
+    if not regression.regression_baseline or not regression_config.get("enabled"):
+        return None
+    with mutator_db_session() as session:
+        return load_regression_baseline(test_run, session)
+
+
+def create_latency_baseline(
+    test_run: TestRun, validation_config: Dict, mutator_db_session: ScopedSession
+) -> LatencyBaseline:
+    # None if the LatencyOutlier validator is disabled, otherwise shared by the consumers of the test run.
+    # Like every validator it is enabled if it is not configured.
+    latency_config = validation_config.get("LatencyOutlier")
+    if latency_config is not None and not latency_config.get("enabled"):
+        return None
+    with mutator_db_session() as session:
+        return load_latency_baseline(test_run, session)
+
+
+def create_concurrency(test_run: TestRun) -> AdaptiveConcurrency:
+    # None unless concurrency is adapted to the target for the test run
+    if consumer_mode == "async":
+        from src.mutator.async_consumer import async_concurrency
+
+        max_limit = async_concurrency
+    else:
+        max_limit = int(consumer_count)
+    return create_adaptive_concurrency(test_run.config, max_limit)
+
+
+def create_test_run_circuit_breaker(
+    test_run: TestRun, stop_threads: threading.Event
+) -> CircuitBreaker:
+    # None unless test requests pause while the target of the test run is down
+    return create_circuit_breaker(
+        test_run.config, (test_run.endpoint or {}).get("url", ""), stop_threads
+    )
+
+
 def update_test_run_state(
     test_run: TestRun,
     state: State,
@@ -0,0 +1,70 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Queue
+from typing import Dict, List, Type
+from unittest import TestCase
+
+from src.mutator.common.utils.persistent_queue.ack_tracker import AckTracker
+from src.mutator.generator.test import Test as MutatorTest
+
+
+# Answers every test request with the path it was sent to, test cases only define when and with which status
+class JsonHandler(BaseHTTPRequestHandler):
+    def read_body(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def send_json(self, status: int = 200, headers: Dict[str, str] = None) -> None:
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+# Runs handler on a local server for every test, at self.url
+class ConsumerServerTestCase(TestCase):
+    handler: Type[JsonHandler] = JsonHandler
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def create_test(url: str, sequence: int = None) -> MutatorTest:
+    test = MutatorTest()
+    test.test_run_id = 1
+    test.test_value = url
+    test.test_type = "REPLACE_BODY_VALUE"
+    test.test_hash = url
+    test.method = "POST"
+    test.headers = {"Content-Type": "application/json"}
+    test.url = url
+    test.body = {"value": url}
+    test.sequence = sequence
+    return test
+
+
+def fill_queue(
+    url: str, paths: List[str], consumers: int, ack_tracker: AckTracker = None
+) -> Queue:
+    # A test per path, numbered from 1 and started on ack_tracker if there is one, and an end for every consumer
+    worker_queue = Queue()
+    for sequence, path in enumerate(paths, 1):
+        if ack_tracker is not None:
+            ack_tracker.start(sequence)
+        worker_queue.put(create_test(f"{url}{path}", sequence))
+    for _ in range(consumers):
+        worker_queue.put(None)
+    return worker_queue
@@ -0,0 +1,75 @@
+from time import monotonic
+from unittest import TestCase
+
+from src.mutator.runner.adaptive_concurrency import (
+    AdaptiveConcurrency,
+    Outcome,
+    create_adaptive_concurrency,
+)
+
+
+def create_concurrency() -> AdaptiveConcurrency:
+    return AdaptiveConcurrency(
+        max_limit=64,
+        limit=4,
+        min_limit=1,
+        target_latency_seconds=1,
+        max_error_rate=0.1,
+        backoff=0.5,
+    )
+
+
+def record_window(concurrency: AdaptiveConcurrency, latency: float, outcome: Outcome):
+    for _ in range(concurrency.get_limit()):
+        concurrency.record(monotonic(), latency, outcome)
+
+
+class Test(TestCase):
+    def test_doubles_until_throttled_then_grows_by_one(self):
+        concurrency = create_concurrency()
+        record_window(concurrency, 0.1, Outcome.SUCCESS)
+        record_window(concurrency, 0.1, Outcome.SUCCESS)
+        self.assertEqual(16, concurrency.get_limit())
+
+        concurrency.record(monotonic(), 0.1, Outcome.THROTTLED)
+        self.assertEqual(8, concurrency.get_limit())
+        record_window(concurrency, 0.1, Outcome.SUCCESS)
+        self.assertEqual(9, concurrency.get_limit())
+
+    def test_requests_sent_before_a_decrease_only_back_off_once(self):
+        concurrency = create_concurrency()
+        started = monotonic()
+        for _ in range(4):
+            concurrency.record(started, 0.1, Outcome.TIMEOUT)
+        self.assertEqual(2, concurrency.get_limit())
+        concurrency.record(monotonic(), 0.1, Outcome.THROTTLED)
+        self.assertEqual(1, concurrency.get_limit())
+        concurrency.record(monotonic(), 0.1, Outcome.THROTTLED)
+        self.assertEqual(1, concurrency.get_limit())
+
+    def test_backs_off_on_latency_and_errors(self):
+        concurrency = create_concurrency()
+        record_window(concurrency, 2, Outcome.SUCCESS)
+        self.assertEqual(2, concurrency.get_limit())
+
+        concurrency = create_concurrency()
+        concurrency.record(monotonic(), 0.1, Outcome.SUCCESS)
+        concurrency.record(monotonic(), 0.1, Outcome.SUCCESS)
+        concurrency.record(monotonic(), 0.1, Outcome.SUCCESS)
+        concurrency.record(monotonic(), 0.1, Outcome.ERROR)
+        self.assertEqual(2, concurrency.get_limit())
+
+    def test_limits_requests_in_flight(self):
+        concurrency = create_concurrency()
+        for _ in range(4):
+            self.assertTrue(concurrency.try_acquire())
+        self.assertFalse(concurrency.try_acquire())
+        concurrency.release()
+        self.assertTrue(concurrency.try_acquire())
+
+    def test_test_run_config_override(self):
+        self.assertIsNone(
+            create_adaptive_concurrency({"adaptive_concurrency": False}, 10)
+        )
+        concurrency = create_adaptive_concurrency({"adaptive_concurrency": True}, 10)
+        self.assertEqual(10, concurrency.max_limit)
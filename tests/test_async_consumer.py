@@ -0,0 +1,77 @@
+import threading
+import time
+from threading import Event
+from unittest.mock import patch
+
+from src.mutator import async_consumer
+from src.mutator.common.utils.persistent_queue.ack_tracker import AckTracker
+from tests.consumer_test_server import ConsumerServerTestCase, JsonHandler, fill_queue
+
+
+class SlowHandler(JsonHandler):
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def do_POST(self):
+        self.read_body()
+        with SlowHandler.lock:
+            SlowHandler.in_flight += 1
+            SlowHandler.max_in_flight = max(
+                SlowHandler.max_in_flight, SlowHandler.in_flight
+            )
+        time.sleep(0.05)
+        with SlowHandler.lock:
+            SlowHandler.in_flight -= 1
+        self.send_json()
+
+
+class Test(ConsumerServerTestCase):
+    handler = SlowHandler
+
+    @patch.object(async_consumer, "async_concurrency", 4)
+    @patch.object(async_consumer, "process_test_result")
+    def test_async_consumer_runs_every_test_with_bounded_concurrency(
+        self, process_test_result
+    ):
+        ack_tracker = AckTracker()
+        worker_queue = fill_queue(
+            self.url, [f"/{sequence}" for sequence in range(1, 21)], 1, ack_tracker
+        )
+
+        async_consumer.async_consumer(worker_queue, 1, {}, Event(), None, ack_tracker)
+
+        results = {
+            call.args[0].sequence: call.args[1]
+            for call in process_test_result.call_args_list
+        }
+        self.assertEqual(set(range(1, 21)), set(results))
+        self.assertEqual({"path": "/7"}, results[7].response.body)
+        self.assertEqual(200, results[7].response.status_code)
+        self.assertEqual(20, ack_tracker.checkpoint)
+        self.assertLessEqual(SlowHandler.max_in_flight, 4)
+        self.assertGreater(SlowHandler.max_in_flight, 1)
+
+    @patch.object(async_consumer, "async_concurrency", 4)
+    @patch.object(async_consumer, "process_test_result")
+    def test_results_of_requests_in_flight_are_processed_when_the_test_run_is_stopped(
+        self, process_test_result
+    ):
+        ack_tracker = AckTracker()
+        worker_queue = fill_queue(
+            self.url, [f"/{sequence}" for sequence in range(1, 21)], 1, ack_tracker
+        )
+        stop_threads = Event()
+        # The test run is stopped as the first result comes in, while the other requests are in flight
+        process_test_result.side_effect = lambda *args: stop_threads.set()
+
+        async_consumer.async_consumer(
+            worker_queue, 1, {}, stop_threads, None, ack_tracker
+        )
+
+        # No more requests are sent, but the ones already sent are processed and acked
+        sequences = {
+            call.args[0].sequence for call in process_test_result.call_args_list
+        }
+        self.assertEqual({1, 2, 3, 4}, sequences)
+        self.assertEqual(4, ack_tracker.checkpoint)
@@ -0,0 +1,103 @@
+import threading
+from time import sleep
+from unittest import TestCase
+
+from src.mutator.runner.circuit_breaker import (
+    CircuitBreaker,
+    CircuitState,
+    create_circuit_breaker,
+)
+
+
+def create_circuit_breaker_for_test(open_seconds: float = 0.1) -> CircuitBreaker:
+    return CircuitBreaker(
+        host="http://localhost:8080",
+        failure_threshold=3,
+        open_seconds=open_seconds,
+        max_open_seconds=0.3,
+        max_outage_seconds=60,
+    )
+
+
+class Test(TestCase):
+    def test_opens_after_failures_in_a_row(self):
+        circuit_breaker = create_circuit_breaker_for_test()
+        circuit_breaker.record_failure()
+        circuit_breaker.record_failure()
+        circuit_breaker.record_success()
+        circuit_breaker.record_failure()
+        circuit_breaker.record_failure()
+        self.assertEqual(CircuitState.CLOSED.value, circuit_breaker.get_state())
+        self.assertEqual(0, circuit_breaker.before_request())
+
+        circuit_breaker.record_failure()
+        self.assertEqual(CircuitState.OPEN.value, circuit_breaker.get_state())
+        self.assertGreater(circuit_breaker.before_request(), 0)
+
+    def test_a_single_probe_closes_the_circuit(self):
+        circuit_breaker = create_circuit_breaker_for_test()
+        for _ in range(3):
+            circuit_breaker.record_failure()
+        sleep(0.1)
+
+        self.assertEqual(0, circuit_breaker.before_request())
+        self.assertEqual(CircuitState.HALF_OPEN.value, circuit_breaker.get_state())
+        # Only the probe is sent while the circuit is half open
+        self.assertGreater(circuit_breaker.before_request(), 0)
+
+        circuit_breaker.record_success()
+        self.assertEqual(CircuitState.CLOSED.value, circuit_breaker.get_state())
+        self.assertEqual(0, circuit_breaker.before_request())
+
+    def test_failed_probe_opens_the_circuit_for_longer(self):
+        circuit_breaker = create_circuit_breaker_for_test()
+        for _ in range(3):
+            circuit_breaker.record_failure()
+        self.assertEqual(0.1, circuit_breaker.get_open_seconds())
+        sleep(0.1)
+        self.assertEqual(0, circuit_breaker.before_request())
+
+        circuit_breaker.record_failure()
+        self.assertEqual(CircuitState.OPEN.value, circuit_breaker.get_state())
+        self.assertEqual(0.2, circuit_breaker.get_open_seconds())
+
+    def test_waiting_requests_resume_once_closed(self):
+        circuit_breaker = create_circuit_breaker_for_test()
+        for _ in range(3):
+            circuit_breaker.record_failure()
+        allowed = []
+        waiters = [
+            threading.Thread(target=lambda: allowed.append(circuit_breaker.wait()))
+            for _ in range(3)
+        ]
+        for waiter in waiters:
+            waiter.start()
+        # The queue reader waits until the probe is due
+        self.assertTrue(circuit_breaker.wait_while_open())
+        sleep(0.05)
+        self.assertEqual(1, len(allowed))
+        circuit_breaker.record_success()
+        for waiter in waiters:
+            waiter.join()
+        self.assertEqual([True, True, True], allowed)
+
+    def test_waiting_stops_with_the_test_run(self):
+        circuit_breaker = create_circuit_breaker_for_test(open_seconds=60)
+        for _ in range(3):
+            circuit_breaker.record_failure()
+        circuit_breaker.stop_threads.set()
+        self.assertFalse(circuit_breaker.wait())
+        self.assertFalse(circuit_breaker.wait_while_open())
+
+    def test_test_run_config_override(self):
+        stop_threads = threading.Event()
+        self.assertIsNone(
+            create_circuit_breaker(
+                {"circuit_breaker": False}, "http://localhost", stop_threads
+            )
+        )
+        circuit_breaker = create_circuit_breaker(
+            {"circuit_breaker": True}, "HTTP://Localhost:8080/path", stop_threads
+        )
+        self.assertEqual("http://localhost:8080", circuit_breaker.host)
+        self.assertIs(stop_threads, circuit_breaker.stop_threads)
@@ -0,0 +1,76 @@
+from unittest import TestCase
+
+from boltons.iterutils import remap
+
+from src.mutator.runner.field_matcher import build_field_matcher
+from src.mutator.runner.hash_strategy import HashStrategy
+
+body = {
+    "id": 1,
+    "name": "Bob",
+    "create_date": "2222-10-24T00:00:00",
+    "address": {"id": 2, "street": "Main", "update_date": None},
+    "orders": [
+        {"id": 3, "name": "first", "items": [1, 2, {"name": "item"}]},
+        "0",
+        [0, {"date": 1}],
+    ],
+    "0": "zero",
+}
+
+
+def remap_fields(field_names, strategy: HashStrategy):
+    # The field matchers before they were compiled
+    if strategy == HashStrategy.INCLUDE_EXACT_MATCH:
+        visit = lambda p, k, v: k in set(field_names)  # noqa: E731
+    elif strategy == HashStrategy.EXCLUDE_EXACT_MATCH:
+        visit = lambda p, k, v: k not in set(field_names)  # noqa: E731
+    else:
+        visit = lambda p, k, v: not any(  # noqa: E731
+            field_name in str(k) for field_name in field_names
+        )
+    return remap(body, visit=visit)
+
+
+class Test(TestCase):
+    def test_extracts_the_same_fields_as_remap(self):
+        for strategy in [
+            HashStrategy.INCLUDE_EXACT_MATCH,
+            HashStrategy.EXCLUDE_EXACT_MATCH,
+            HashStrategy.EXCLUDE_PARTIAL_MATCH,
+        ]:
+            for field_names in [
+                ["id", "name"],
+                ["date", "items"],
+                ["0", "orders", "address"],
+                ["a.b", "(", ""],
+                [],
+            ]:
+                with self.subTest(strategy=strategy.name, field_names=field_names):
+                    field_matcher = build_field_matcher(
+                        {"field_names": field_names, "strategy": strategy.name}
+                    )
+                    extracted = field_matcher.extract(body)
+                    self.assertEqual(remap_fields(field_names, strategy), extracted)
+                    # Same order of fields, for response hash version 1
+                    self.assertEqual(
+                        str(remap_fields(field_names, strategy)), str(extracted)
+                    )
+
+    def test_all_fields(self):
+        self.assertIsNone(
+            build_field_matcher({"field_names": [], "strategy": HashStrategy.ALL.name})
+        )
+
+    def test_remembers_matched_keys(self):
+        field_matcher = build_field_matcher(
+            {
+                "field_names": ["date"],
+                "strategy": HashStrategy.EXCLUDE_PARTIAL_MATCH.name,
+            }
+        )
+        field_matcher.extract(body)
+        field_matcher.extract(body)
+        self.assertFalse(field_matcher.matched_keys["create_date"])
+        self.assertTrue(field_matcher.matched_keys["street"])
+        self.assertTrue(field_matcher.matched_keys[0])
@@ -1,13 +1,16 @@
+import json
 import os
 import pathlib
 from queue import Queue
 from unittest import TestCase
+from unittest.mock import patch
 from urllib.parse import urlparse, urlunparse
 
 from src.common.database.test_run import TestRun
 from src.mutator.common.test_value_storage.test_repository import TestRepository
 from src.mutator.common.utils.persistent_queue.dao.queue_item import QueueItem
 from src.mutator.generator import generator
+from src.mutator.generator.body_mutation import freeze
 from src.mutator.generator.generator import (
     replace_body_key,
     replace_query_parameter_array_key,
@@ -24,6 +27,7 @@ from src.mutator.generator.generator import (
     remove_resource,
     remove_query_parameter_key,
     remove_body_key,
+    replace_body_value,
 )
 
 base_config_dir = (
@@ -697,6 +701,65 @@ class GeneratorTest(TestCase):
 
         self.assertEqual(expected_keyset, keyset)
 
+    def test_replace_body_value_shares_untouched_subtrees(self):
+        body = {"field_1": {"nested": [1, 2, 3]}, "field_2": {"nested": [4, 5, 6]}}
+        keyset = {"path": ("field_1", "nested"), "key": 1, "value": 2}
+        test_body = replace_body_value(body, keyset, "replaced")
+        self.assertEqual(
+            {
+                "field_1": {"nested": [1, "replaced", 3]},
+                "field_2": {"nested": [4, 5, 6]},
+            },
+            test_body,
+        )
+        # Original body is not altered and untouched fields are not copied
+        self.assertEqual([1, 2, 3], body["field_1"]["nested"])
+        self.assertIs(body["field_2"], test_body["field_2"])
+
+    def test_replace_body_key_keeps_field_position(self):
+        body = {"field_1": 1, "field_2": 2, "field_3": 3}
+        keyset = {"path": (), "key": "field_2", "value": 2}
+        test_body = replace_body_key(body, keyset, "replaced")
+        self.assertEqual(["field_1", "replaced", "field_3"], list(test_body.keys()))
+
+    def test_remove_body_key_path_does_not_exist(self):
+        body = {"field_1": [1, 2, 3]}
+        keyset = {"path": ("field_2",), "key": 0, "value": 1}
+        test_body = remove_body_key(body, keyset)
+        self.assertEqual({"field_1": [1, 2, 3]}, test_body)
+
+    def test_frozen_body_cannot_be_altered(self):
+        body = freeze({"field_1": [1, 2, 3]})
+        with self.assertRaises(TypeError):
+            body["field_1"].append(4)
+        with self.assertRaises(TypeError):
+            body["field_2"] = 1
+        self.assertEqual('{"field_1": [1, 2, 3]}', json.dumps(body))
+
+    def test_generate_shares_untouched_body_fields(self):
+        test_run = TestRun()
+        test_run.id = 1
+        test_run.endpoint = {
+            "method": "POST",
+            "headers": {"Content-Type": "application/json"},
+            "url": "http://localhost:8010",
+            "body": {"field_1": {"nested": [1, 2]}, "field_2": {"nested": [3, 4]}},
+        }
+
+        test_repository = TestRepository(base_config_dir, "/test_config.json")
+        queue = Queue()
+        generator.generate(test_repository, test_run, queue)
+        field_1 = None
+        field_2_tests = 0
+        while not queue.empty():
+            body = queue.get().test["body"]
+            # Every test that mutates field_2 should reuse the same field_1 object
+            if "field_1" in body and body.get("field_2") != {"nested": [3, 4]}:
+                field_1 = field_1 or body["field_1"]
+                self.assertIs(field_1, body["field_1"])
+                field_2_tests += 1
+        self.assertGreater(field_2_tests, 0)
+
     def test_parameter_array_check_true(self):
         query_parameter_value = ["username1,username3,username2"]
         is_array = is_comma_separated_parameter_array(query_parameter_value)
@@ -6157,6 +6220,8 @@ class GeneratorTest(TestCase):
             "url": "http://localhost:8010/v1/results?query=parameter&queryArray=1,2,3&item1=hello&item2=world",
             "body": {"modifiers": [1, 2, 3, 4, 5, 6, 7]},
         }
+        # Hashes of the full test request, as created before test hash version 2
+        test_run.config = {"test_hash_version": 1}
 
         test_repository = TestRepository(base_config_dir, "/test_config.json")
         queue = Queue()
@@ -6165,3 +6230,113 @@ class GeneratorTest(TestCase):
             generated_items: QueueItem = queue.get()
             generated_item = generated_items
             self.assertEqual(expected_item, generated_item.test)
+
+    def test_count_matches_generated_tests(self):
+        test_run = TestRun()
+        test_run.id = 1
+        test_run.endpoint = {
+            "method": "POST",
+            "headers": {"Content-Type": "application/json"},
+            "url": "http://localhost:8010/v1/results?query=parameter&queryArray=1,2,3&item1=hello&item2=world",
+            "body": {"modifiers": [1, 2, 3, 4, 5, 6, 7], "nested": {"name": "x"}},
+        }
+
+        test_repository = TestRepository(base_config_dir, "/test_config.json")
+        queue = Queue()
+        generator.generate(test_repository, test_run, queue)
+        self.assertEqual(queue.qsize(), generator.count(test_repository, test_run))
+
+    def test_count_without_body(self):
+        test_run = TestRun()
+        test_run.id = 1
+        test_run.endpoint = {
+            "method": "GET",
+            "headers": {},
+            "url": "http://localhost:8010/v1/results/1?query=parameter",
+        }
+
+        test_repository = TestRepository(base_config_dir, "/test_config.json")
+        queue = Queue()
+        generator.generate(test_repository, test_run, queue)
+        self.assertEqual(queue.qsize(), generator.count(test_repository, test_run))
+
+    @patch.object(generator, "generator_chunk_size", 3)
+    def test_generate_parallel_matches_serial(self):
+        test_run = TestRun()
+        test_run.id = 1
+        test_run.endpoint = {
+            "method": "POST",
+            "headers": {"Content-Type": "application/json"},
+            "url": "http://localhost:8010/v1/results?query=parameter&queryArray=1,2,3",
+            "body": {"modifiers": [1, 2, 3], "nested": {"name": "x"}},
+        }
+        test_repository = TestRepository(base_config_dir, "/test_config.json")
+
+        serial_queue = Queue()
+        with patch.object(generator, "generator_processes", 1):
+            serial_count = generator.generate(test_repository, test_run, serial_queue)
+        parallel_queue = Queue()
+        with patch.object(generator, "generator_processes", 2):
+            parallel_count = generator.generate(
+                test_repository, test_run, parallel_queue
+            )
+
+        self.assertEqual(serial_count, parallel_count)
+        self.assertEqual(serial_queue.qsize(), parallel_queue.qsize())
+        while not serial_queue.empty():
+            self.assertEqual(serial_queue.get().test, parallel_queue.get().test)
+
+    @patch.object(generator, "generator_chunk_size", 3)
+    @patch.object(generator, "generator_processes", 2)
+    def test_generate_in_one_process_overrides_generator_processes(self):
+        test_run = TestRun()
+        test_run.id = 1
+        test_run.endpoint = {
+            "method": "POST",
+            "url": "http://localhost:8010/v1/results?query=parameter",
+            "body": {"modifiers": [1, 2, 3]},
+        }
+        test_repository = TestRepository(base_config_dir, "/test_config.json")
+
+        queue = Queue()
+        with patch.object(generator, "process_test_parallel") as process_test_parallel:
+            test_count = generator.generate(
+                test_repository, test_run, queue, processes=1
+            )
+        process_test_parallel.assert_not_called()
+        self.assertEqual(generator.count(test_repository, test_run), test_count)
+
+    def test_generate_test_hash_version_2(self):
+        test_run = TestRun()
+        test_run.id = 1
+        test_run.endpoint = {
+            "method": "POST",
+            "headers": {"Content-Type": "application/json"},
+            "url": "http://localhost:8010/v1/results?query=parameter&queryArray=1,2,3",
+            "body": {"modifiers": [1, 2, 3], "nested": {"name": "x"}},
+        }
+        test_run.config = {"test_hash_version": 2}
+        test_repository = TestRepository(base_config_dir, "/test_config.json")
+
+        queue = Queue()
+        generator.generate(test_repository, test_run, queue)
+        test_hashes = [queue.get().test["test_hash"] for _ in range(queue.qsize())]
+        # Every test is unique, including key and value tests for the same body field
+        self.assertEqual(len(test_hashes), len(set(test_hashes)))
+
+        # Same hashes for the same request in a different test run
+        test_run.id = 2
+        queue = Queue()
+        generator.generate(test_repository, test_run, queue)
+        self.assertEqual(
+            test_hashes, [queue.get().test["test_hash"] for _ in range(queue.qsize())]
+        )
+
+        # Different hashes once the request changes
+        test_run.endpoint["body"] = {"modifiers": [1, 2, 3], "nested": {"name": "y"}}
+        queue = Queue()
+        generator.generate(test_repository, test_run, queue)
+        self.assertFalse(
+            set(test_hashes)
+            & {queue.get().test["test_hash"] for _ in range(queue.qsize())}
+        )
@@ -0,0 +1,53 @@
+import multiprocessing
+from unittest import TestCase
+
+from src.mutator.runner.host_rate_limiter import (
+    HostRateLimiter,
+    parse_host_overrides,
+)
+
+
+def reserve_from_process(limiter: HostRateLimiter, waits):
+    waits.put(limiter.reserve("http://localhost:8080/from_process"))
+
+
+class Test(TestCase):
+    def test_waits_once_the_burst_is_used(self):
+        limiter = HostRateLimiter(requests_per_second=10, burst=2, slots=8)
+        waits = [limiter.reserve("http://localhost:8080/path") for _ in range(4)]
+        self.assertEqual([0, 0], waits[:2])
+        self.assertAlmostEqual(0.1, waits[2], places=2)
+        self.assertAlmostEqual(0.2, waits[3], places=2)
+
+    def test_limits_each_host_separately(self):
+        limiter = HostRateLimiter(
+            requests_per_second=10,
+            burst=1,
+            slots=8,
+            host_requests_per_second=parse_host_overrides(
+                "http://LOCALHOST:8080=2, https://localhost=0"
+            ),
+        )
+        limiter.reserve("http://localhost:8080/a")
+        self.assertAlmostEqual(0.5, limiter.reserve("http://localhost:8080/b"), 2)
+        self.assertEqual(0, limiter.reserve("http://localhost:8081/a"))
+        # Unlimited
+        for _ in range(3):
+            self.assertEqual(0, limiter.reserve("https://localhost/a"))
+
+    def test_hosts_past_the_slots_share_a_limit(self):
+        limiter = HostRateLimiter(requests_per_second=10, burst=1, slots=1)
+        self.assertEqual(0, limiter.reserve("http://first"))
+        self.assertGreater(limiter.reserve("http://second"), 0)
+
+    def test_limit_is_shared_with_worker_processes(self):
+        limiter = HostRateLimiter(requests_per_second=10, burst=1, slots=8)
+        self.assertEqual(0, limiter.reserve("http://localhost:8080/from_test"))
+        waits = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=reserve_from_process, args=(limiter, waits)
+        )
+        process.start()
+        process.join()
+        self.assertGreater(waits.get(timeout=5), 0)
+        self.assertAlmostEqual(0.2, limiter.reserve("http://localhost:8080/"), 1)
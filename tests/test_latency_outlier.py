@@ -0,0 +1,135 @@
+import pickle
+import random
+from unittest import TestCase
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.common.database.database_base import Base
+from src.common.database.result import Result
+from src.common.database.test_run import TestRun
+from src.common.state.states import State
+from src.common.test_result.test_result import TestResult
+from src.mutator.common.utils.latency_sketch import LatencySketch
+from src.mutator.result_processor.validations.latency_outlier import (
+    LatencyBaseline,
+    LatencyOutlier,
+    load_latency_baseline,
+)
+from src.mutator.runner.response.generic_response import GenericResponse
+
+config = {"quantile": 0.99, "factor": 3, "min_samples": 100, "min_elapsed_time": 0.05}
+
+
+def create_test_result(elapsed_time: float) -> TestResult:
+    test_result = TestResult()
+    response = GenericResponse()
+    response.elapsed_time = elapsed_time
+    test_result.response = response
+    return test_result
+
+
+def create_sketch(latencies) -> LatencySketch:
+    sketch = LatencySketch()
+    for latency in latencies:
+        sketch.add(latency)
+    return sketch
+
+
+class Test(TestCase):
+    def test_sketch_quantiles_are_within_the_relative_accuracy(self):
+        rng = random.Random(1)
+        latencies = sorted(rng.lognormvariate(-2, 1) for _ in range(20000))
+        sketch = create_sketch(latencies)
+
+        self.assertEqual(20000, sketch.count)
+        for q in [0.5, 0.9, 0.95, 0.99, 0.999]:
+            exact = latencies[int(q * (len(latencies) - 1))]
+            self.assertAlmostEqual(exact, sketch.quantile(q), delta=exact * 0.02)
+        # The buckets don't grow with the amount of latencies, only with their range
+        self.assertLess(len(sketch.buckets), 1000)
+
+    def test_merged_sketches_have_the_quantiles_of_all_latencies(self):
+        merged = create_sketch([0.1] * 50)
+        merged.merge(create_sketch([1.0] * 50))
+
+        self.assertEqual(100, merged.count)
+        self.assertAlmostEqual(0.1, merged.quantile(0.25), delta=0.001)
+        self.assertAlmostEqual(1.0, merged.quantile(0.75), delta=0.01)
+        self.assertIsNone(LatencySketch().quantile(0.5))
+
+    def test_fails_outliers_of_the_test_run_once_it_has_min_samples(self):
+        latency_outlier = LatencyOutlier(config, LatencyBaseline())
+
+        # Not judged before the test run has min_samples latencies
+        self.assertTrue(latency_outlier.validate(create_test_result(5)).passed)
+        for _ in range(99):
+            self.assertTrue(latency_outlier.validate(create_test_result(0.1)).passed)
+
+        self.assertTrue(latency_outlier.validate(create_test_result(0.25)).passed)
+        validation = latency_outlier.validate(create_test_result(1))
+        self.assertEqual("LatencyOutlier", validation.type)
+        self.assertFalse(validation.passed)
+        self.assertIn("this test run", validation.message)
+
+    def test_fails_outliers_of_the_previous_test_run(self):
+        latency_outlier = LatencyOutlier(
+            config, LatencyBaseline(create_sketch([0.1] * 100))
+        )
+
+        validation = latency_outlier.validate(create_test_result(0.5))
+        self.assertFalse(validation.passed)
+        self.assertIn("the previous test run", validation.message)
+        self.assertTrue(latency_outlier.validate(create_test_result(0.2)).passed)
+
+    def test_never_fails_responses_faster_than_min_elapsed_time(self):
+        latency_outlier = LatencyOutlier(
+            config, LatencyBaseline(create_sketch([0.001] * 100))
+        )
+
+        self.assertTrue(latency_outlier.validate(create_test_result(0.04)).passed)
+        self.assertFalse(latency_outlier.validate(create_test_result(0.06)).passed)
+        self.assertTrue(latency_outlier.validate(create_test_result(None)).passed)
+
+    def test_baseline_can_be_pickled_for_consumer_processes(self):
+        baseline = LatencyBaseline(create_sketch([0.1] * 100))
+        baseline.live.add(0.2)
+
+        copy = pickle.loads(pickle.dumps(baseline))
+
+        self.assertEqual(100, copy.previous.count)
+        self.assertEqual(1, copy.live.count)
+        with copy.lock:
+            copy.live.add(0.3)
+        self.assertEqual(1, baseline.live.count)
+
+    def test_loads_the_baseline_of_the_previous_test_run_to_the_same_endpoint(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            endpoint = {"url": "http://localhost/items", "method": "POST"}
+            other_endpoint = {"url": "http://localhost/other", "method": "POST"}
+            completed = State.COMPLETED.value
+            test_runs = [
+                TestRun(endpoint=endpoint, state=completed),
+                TestRun(endpoint=endpoint, state=completed),
+                TestRun(endpoint=other_endpoint, state=completed),
+                TestRun(endpoint=endpoint, state=State.RUNNING.value),
+            ]
+            session.add_all(test_runs)
+            session.flush()
+            for test_run, elapsed_time in zip(test_runs[:3], [1.0, 0.1, 2.0]):
+                for _ in range(10):
+                    result = Result()
+                    result.test_run_id = test_run.id
+                    result.response_elapsed_time = elapsed_time
+                    session.add(result)
+            session.add(Result(test_run_id=test_runs[1].id))
+            session.flush()
+
+            baseline = load_latency_baseline(test_runs[3], session)
+            self.assertEqual(10, baseline.previous.count)
+            self.assertAlmostEqual(0.1, baseline.previous.quantile(0.5), delta=0.001)
+            self.assertEqual(0, baseline.live.count)
+
+            self.assertIsNone(load_latency_baseline(test_runs[0], session).previous)
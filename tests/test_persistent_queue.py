@@ -0,0 +1,93 @@
+from queue import Queue
+from threading import Event
+from unittest import TestCase
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from src.mutator.common.utils.persistent_queue.ack_tracker import AckTracker
+from src.mutator.common.utils.persistent_queue.buffer_queues.queue_reader import (
+    QueueReader,
+)
+from src.mutator.common.utils.persistent_queue.dao.queue_item import QueueItem
+from src.mutator.common.utils.persistent_queue.persistent_queue import PersistentQueue
+
+
+def create_queue_item(test_hash: str) -> QueueItem:
+    queue_item = QueueItem()
+    queue_item.test_run_id = 1
+    queue_item.test_hash = test_hash
+    queue_item.test = {"test_hash": test_hash}
+    return queue_item
+
+
+class Test(TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        QueueItem.__table__.create(engine)
+        self.scoped_session = scoped_session(sessionmaker(bind=engine))
+
+    def test_pop_in_push_order(self):
+        persistent_queue = PersistentQueue(1, self.scoped_session)
+        persistent_queue.push_batch([create_queue_item(str(i)) for i in range(5)])
+        persistent_queue.push_batch([create_queue_item(str(i)) for i in range(5, 8)])
+
+        first_batch = persistent_queue.pop(3)
+        second_batch = persistent_queue.pop(10)
+        self.assertEqual(["0", "1", "2"], [item.test_hash for item in first_batch])
+        self.assertEqual(
+            ["3", "4", "5", "6", "7"], [item.test_hash for item in second_batch]
+        )
+        self.assertEqual([], persistent_queue.pop(10))
+
+    def test_ack_removes_everything_up_to_last_item(self):
+        persistent_queue = PersistentQueue(1, self.scoped_session)
+        persistent_queue.push_batch([create_queue_item(str(i)) for i in range(5)])
+        persistent_queue.ack(persistent_queue.pop(3))
+        self.assertEqual(2, persistent_queue.size())
+
+        # A new reader continues from the first test that was not acked
+        persistent_queue = PersistentQueue(1, self.scoped_session)
+        self.assertEqual(["3", "4"], [i.test_hash for i in persistent_queue.pop(10)])
+        persistent_queue.push_batch([create_queue_item("5")])
+        self.assertEqual(["5"], [i.test_hash for i in persistent_queue.pop(10)])
+
+    def test_ack_tracker_checkpoint_waits_for_earlier_tests(self):
+        ack_tracker = AckTracker()
+        for sequence in range(1, 5):
+            ack_tracker.start(sequence)
+        ack_tracker.finish(2)
+        ack_tracker.finish(3)
+        self.assertEqual(0, ack_tracker.checkpoint)
+        ack_tracker.finish(1)
+        self.assertEqual(3, ack_tracker.checkpoint)
+        ack_tracker.finish(4)
+        self.assertEqual(4, ack_tracker.checkpoint)
+
+    @patch.object(QueueReader, "update_progress")
+    def test_queue_reader_skips_tested_and_keeps_unfinished_tests(self, _):
+        persistent_queue = PersistentQueue(1, self.scoped_session)
+        persistent_queue.push_batch([create_queue_item(str(i)) for i in range(5)])
+        worker_queue = Queue()
+        ack_tracker = AckTracker()
+        queue_reader = QueueReader(
+            persistent_queue,
+            worker_queue,
+            Event(),
+            1,
+            self.scoped_session,
+            None,
+            ack_tracker,
+            {"0", "2"},
+        )
+        queue_reader.read_queue()
+
+        tests = [worker_queue.get() for _ in range(worker_queue.qsize())]
+        self.assertEqual(["1", "3", "4"], [test.test_hash for test in tests])
+        # Only the leading test with a result is acked, the rest wait for the consumers
+        self.assertEqual(4, persistent_queue.size())
+
+        for test in tests:
+            ack_tracker.finish(test.sequence)
+        self.assertEqual(5, ack_tracker.checkpoint)
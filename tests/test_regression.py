@@ -1,12 +1,48 @@
+from typing import Dict, List
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
 
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.common.database.database_base import Base
+from src.common.database.result import Result
+from src.common.database.test_run import TestRun
+from src.common.state.states import State
 from src.common.test_result.test_result import TestResult
-from src.mutator.result_processor.validations.regression import Regression
+from src.mutator.common.utils.hash import hash_object, hash_response
+from src.mutator.result_processor.validations import regression as regression_module
+from src.mutator.result_processor.validations.regression import (
+    Regression,
+    RegressionBaseline,
+    load_regression_baseline,
+)
 from src.mutator.runner.request.generic_request import GenericRequest
 from src.mutator.runner.response.generic_response import GenericResponse
 
 
+def create_result(test_run: TestRun, request_hash: str, response_hash: str):
+    result = Result()
+    result.test_run_id = test_run.id
+    result.request_hash = request_hash
+    result.response_hash = response_hash
+    return result
+
+
+def create_test_runs(endpoint: Dict) -> List[TestRun]:
+    # Two completed test runs to the endpoint, one to another endpoint, a failed one, and the current one
+    return [
+        TestRun(endpoint=endpoint, state=State.COMPLETED.value),
+        TestRun(endpoint=endpoint, state=State.COMPLETED.value),
+        TestRun(
+            endpoint={"url": "http://localhost/other", "method": "POST"},
+            state=State.COMPLETED.value,
+        ),
+        TestRun(endpoint=endpoint, state=State.FAILED.value),
+        TestRun(endpoint=endpoint, state=State.RUNNING.value),
+    ]
+
+
 class TestRegression(TestCase):
     def test_response_hashes_match(self):
         test_result = TestResult()
@@ -16,8 +52,10 @@ class TestRegression(TestCase):
         response = GenericResponse()
         response.hash = "1234"
         test_result.response = response
-        regression = Regression(test_result, {})
-        hashed_match: bool = regression.response_hashes_match("1234", "1234")
+        regression = Regression({})
+        hashed_match: bool = regression.response_hashes_match(
+            test_result, "1234", "1234"
+        )
         self.assertTrue(hashed_match)
 
     def test_response_hashes_do_not_match(self):
@@ -28,63 +66,209 @@ class TestRegression(TestCase):
         response = GenericResponse()
         response.hash = "1234"
         test_result.response = response
-        regression = Regression(test_result, {})
-        hashed_match: bool = regression.response_hashes_match("1233", "1234")
+        regression = Regression({})
+        hashed_match: bool = regression.response_hashes_match(
+            test_result, "1233", "1234"
+        )
         self.assertFalse(hashed_match)
 
+    @patch(
+        "src.manager.services.test_run.dao.test_run_dao.get_single_test_run",
+        MagicMock(return_value=None),
+    )
     @patch(
         "src.manager.services.test_run.dao.test_result_dao.get_previous_response_hash",
         MagicMock(return_value="1234"),
     )
     def test_process_previous_response_hash_same_value(self):
         test_result = TestResult()
+        test_result.test_run_id = 1
         request = GenericRequest()
         request.hash = "1234"
         test_result.request = request
         response = GenericResponse()
         response.hash = "1234"
         test_result.response = response
-        regression = Regression(test_result, {})
-        regression.current_response_hash = "1234"
-        validation_response = regression.__validate__()
+        regression = Regression({})
+        validation_response = regression.validate(test_result)
         self.assertEqual("Regression", validation_response.type)
         self.assertEqual("Passed", validation_response.message)
 
+    @patch(
+        "src.manager.services.test_run.dao.test_run_dao.get_single_test_run",
+        MagicMock(return_value=None),
+    )
     @patch(
         "src.manager.services.test_run.dao.test_result_dao.get_previous_response_hash",
         MagicMock(return_value="4321"),
     )
     def test_process_previous_response_hash_different_value(self):
         test_result = TestResult()
+        test_result.test_run_id = 1
         request = GenericRequest()
         request.hash = "1234"
         test_result.request = request
         response = GenericResponse()
         response.hash = "1234"
         test_result.response = response
-        regression = Regression(test_result, {})
-        regression.current_response_hash = "1234"
-        validation_response = regression.__validate__()
+        regression = Regression({})
+        validation_response = regression.validate(test_result)
         self.assertEqual("Regression", validation_response.type)
         self.assertEqual(
             "Regression occurred. Current response hash 1234 is different from previous response hash 4321.",
             validation_response.message,
         )
 
+    @patch(
+        "src.manager.services.test_run.dao.test_run_dao.get_single_test_run",
+        MagicMock(return_value=None),
+    )
     @patch(
         "src.manager.services.test_run.dao.test_result_dao.get_previous_response_hash",
         MagicMock(return_value=None),
     )
     def test_process_previous_response_hash_none(self):
         test_result = TestResult()
+        test_result.test_run_id = 1
         request = GenericRequest()
         request.hash = "1234"
         test_result.request = request
         response = GenericResponse()
         response.hash = "1234"
         test_result.response = response
-        regression = Regression(test_result, {})
-        regression.current_response_hash = "1234"
-        validation_response = regression.__validate__()
+        regression = Regression({})
+        validation_response = regression.validate(test_result)
         self.assertEqual("Regression", validation_response.type)
         self.assertEqual("Passed", validation_response.message)
+
+    def test_compares_to_previous_response_hash_of_older_version(self):
+        hash_fields = {"url": "http://localhost", "body": {"id": 1}, "status_code": 200}
+        test_result = TestResult()
+        test_result.test_run_id = 1
+        request = GenericRequest()
+        request.hash = "1234"
+        test_result.request = request
+        response = GenericResponse()
+        response.hash = hash_response(hash_fields, 2)
+        response.hash_fields = hash_fields
+        test_result.response = response
+
+        with patch(
+            "src.manager.services.test_run.dao.test_result_dao.get_previous_response_hash",
+            MagicMock(return_value=hash_object(hash_fields)),
+        ), patch(
+            "src.manager.services.test_run.dao.test_run_dao.get_single_test_run",
+            MagicMock(return_value=None),
+        ):
+            validation_response = Regression({}).validate(test_result)
+        self.assertEqual("Passed", validation_response.message)
+
+    def test_baseline_has_the_response_hashes_of_the_previous_test_run_to_the_same_endpoint(
+        self,
+    ):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            endpoint = {"url": "http://localhost/items", "method": "POST"}
+            test_runs = create_test_runs(endpoint)
+            session.add_all(test_runs)
+            session.flush()
+            session.add_all(
+                [
+                    create_result(test_runs[0], "a", "older test run"),
+                    create_result(test_runs[0], "d", "older test run"),
+                    create_result(test_runs[1], "a", "old"),
+                    create_result(test_runs[1], "a", "latest"),
+                    create_result(test_runs[1], "b", "only"),
+                    create_result(test_runs[2], "c", "other endpoint"),
+                    create_result(test_runs[3], "a", "failed test run"),
+                    # A resumed test run has results of its own already
+                    create_result(test_runs[4], "b", "current run"),
+                ]
+            )
+            session.commit()
+            baseline = load_regression_baseline(test_runs[4], session)
+            with patch.object(regression_module, "regression_baseline_max_hashes", 1):
+                self.assertIsNone(load_regression_baseline(test_runs[4], session))
+            first_baseline = load_regression_baseline(test_runs[0], session)
+        self.assertEqual({"a": "latest", "b": "current run"}, baseline.response_hashes)
+        self.assertEqual(
+            {"a": "older test run", "d": "older test run"},
+            first_baseline.response_hashes,
+        )
+
+    def test_without_a_baseline_results_are_looked_up_in_the_same_test_runs(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            endpoint = {"url": "http://localhost/items", "method": "POST"}
+            test_runs = create_test_runs(endpoint)
+            session.add_all(test_runs)
+            session.flush()
+            session.add_all(
+                [
+                    create_result(test_runs[0], "a", "older test run"),
+                    create_result(test_runs[0], "d", "older test run"),
+                    create_result(test_runs[1], "a", "previous"),
+                    create_result(test_runs[2], "c", "other endpoint"),
+                    create_result(test_runs[3], "b", "failed test run"),
+                    create_result(test_runs[4], "e", "current run"),
+                ]
+            )
+            session.commit()
+            regression = Regression({})
+            previous_response_hashes = {}
+            for request_hash in ["a", "b", "c", "d", "e"]:
+                test_result = TestResult()
+                test_result.test_run_id = test_runs[4].id
+                request = GenericRequest()
+                request.hash = request_hash
+                test_result.request = request
+                previous_response_hashes[
+                    request_hash
+                ] = regression.get_previous_response_hash(test_result, session)
+        self.assertEqual(
+            {"a": "previous", "b": None, "c": None, "d": None, "e": "current run"},
+            previous_response_hashes,
+        )
+
+    def test_results_are_compared_to_earlier_results_of_the_same_test_run(self):
+        regression = Regression({}, RegressionBaseline({}))
+        validations = []
+        for response_hash in ["1234", "1234", "5678"]:
+            test_result = TestResult()
+            request = GenericRequest()
+            request.hash = "request"
+            test_result.request = request
+            response = GenericResponse()
+            response.hash = response_hash
+            test_result.response = response
+            validations.append(regression.validate(test_result))
+
+        self.assertEqual([True, True, False], [v.passed for v in validations])
+        self.assertEqual(
+            "5678", regression.baseline.get_previous_response_hash("request")
+        )
+
+    @patch(
+        "src.manager.services.test_run.dao.test_result_dao.get_previous_response_hash"
+    )
+    def test_validates_against_the_baseline_without_the_database(
+        self, get_previous_response_hash
+    ):
+        regression = Regression(
+            {}, RegressionBaseline({"1234": "4321", "5678": "5678"})
+        )
+        validations = []
+        for request_hash in ["1234", "5678", "new"]:
+            test_result = TestResult()
+            request = GenericRequest()
+            request.hash = request_hash
+            test_result.request = request
+            response = GenericResponse()
+            response.hash = "5678"
+            test_result.response = response
+            validations.append(regression.validate(test_result))
+
+        self.assertEqual([False, True, True], [v.passed for v in validations])
+        get_previous_response_hash.assert_not_called()
@@ -0,0 +1,62 @@
+import hashlib
+import json
+from unittest import TestCase
+
+from src.mutator.runner.response.response_body import ResponseBody
+
+
+def read(body: bytes, max_bytes: int, chunk_bytes: int = 4) -> ResponseBody:
+    response_body = ResponseBody(max_bytes)
+    for start in range(0, len(body), chunk_bytes):
+        response_body.feed(body[start : start + chunk_bytes])
+    return response_body
+
+
+class Test(TestCase):
+    def test_keeps_bodies_under_the_limit(self):
+        body = json.dumps({"id": 1, "name": "Bob"}).encode()
+        response_body = read(body, 1024)
+
+        self.assertFalse(response_body.truncated)
+        self.assertEqual(
+            {"id": 1, "name": "Bob"}, response_body.build_body("application/json")
+        )
+        self.assertEqual(hashlib.sha1(body).hexdigest(), response_body.get_hash())
+
+    def test_truncates_bodies_over_the_limit_but_hashes_all_of_it(self):
+        body = json.dumps({"trace": "x" * 100}).encode()
+        response_body = read(body, 10)
+
+        self.assertTrue(response_body.truncated)
+        self.assertEqual(10, response_body.kept)
+        self.assertEqual(len(body), response_body.size)
+        self.assertEqual(
+            {"raw_response": f"{body[:10].decode()}...[truncated, {len(body)} bytes]"},
+            response_body.build_body("application/json"),
+        )
+        self.assertEqual(hashlib.sha1(body).hexdigest(), response_body.get_hash())
+
+    def test_no_limit(self):
+        body = ("é" * 100).encode()
+        response_body = read(body, 0)
+
+        self.assertFalse(response_body.truncated)
+        self.assertEqual({"raw_response": "é" * 100}, response_body.build_body(None))
+
+    def test_keeps_invalid_json_as_text(self):
+        response_body = read(b'{"id": 1, "name": <html>', 1024)
+
+        self.assertEqual(
+            {"raw_response": '{"id": 1, "name": <html>'},
+            response_body.build_body("application/json"),
+        )
+        self.assertEqual(
+            {"raw_response": "\ufffd"},
+            read(b"\xff", 1024).build_body("application/json"),
+        )
+        # NaN and Infinity aren't JSON either
+        for body in [b'{"a": NaN}', b'{"a": -Infinity}', b'{"a": 1e999}']:
+            self.assertEqual(
+                {"raw_response": body.decode()},
+                read(body, 1024).build_body("application/json"),
+            )
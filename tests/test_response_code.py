@@ -11,8 +11,8 @@ class TestResponseCode(TestCase):
         response = GenericResponse()
         response.status_code = 200
         test_result.response = response
-        response_code_validator = StatusCode(test_result, {})
-        validation_response = response_code_validator.__validate__()
+        response_code_validator = StatusCode({})
+        validation_response = response_code_validator.validate(test_result)
         self.assertEqual("StatusCode", validation_response.type)
         self.assertEqual("Passed", validation_response.message)
 
@@ -21,10 +21,8 @@ class TestResponseCode(TestCase):
         response = GenericResponse()
         response.status_code = 401
         test_result.response = response
-        response_code_validator = StatusCode(
-            test_result, {"invalid_status_codes": [401, 402]}
-        )
-        validation_response = response_code_validator.__validate__()
+        response_code_validator = StatusCode({"invalid_status_codes": [401, 402]})
+        validation_response = response_code_validator.validate(test_result)
         self.assertEqual("StatusCode", validation_response.type)
         self.assertEqual(
             "Found invalid response code: 401", validation_response.message
@@ -35,8 +33,8 @@ class TestResponseCode(TestCase):
         response = GenericResponse()
         response.status_code = 404
         test_result.response = response
-        response_code_validator = StatusCode(test_result, {})
-        validation_response = response_code_validator.__validate__()
+        response_code_validator = StatusCode({})
+        validation_response = response_code_validator.validate(test_result)
         self.assertEqual("StatusCode", validation_response.type)
         self.assertEqual("Passed", validation_response.message)
 
@@ -45,8 +43,8 @@ class TestResponseCode(TestCase):
         response = GenericResponse()
         response.status_code = 500
         test_result.response = response
-        response_code_validator = StatusCode(test_result, {})
-        validation_response = response_code_validator.__validate__()
+        response_code_validator = StatusCode({})
+        validation_response = response_code_validator.validate(test_result)
         self.assertEqual("StatusCode", validation_response.type)
         self.assertEqual(
             "Found invalid response code: 500", validation_response.message
@@ -57,8 +55,8 @@ class TestResponseCode(TestCase):
         response = GenericResponse()
         response.status_code = 555
         test_result.response = response
-        response_code_validator = StatusCode(test_result, {})
-        validation_response = response_code_validator.__validate__()
+        response_code_validator = StatusCode({})
+        validation_response = response_code_validator.validate(test_result)
         self.assertEqual("StatusCode", validation_response.type)
         self.assertEqual(
             "Found invalid response code: 555", validation_response.message
@@ -0,0 +1,57 @@
+from unittest import TestCase
+
+from src.mutator.common.utils.hash import (
+    canonical_bytes,
+    get_hash_version,
+    hash_object,
+    hash_response,
+)
+
+
+class Test(TestCase):
+    def test_canonical_bytes_ignore_key_order(self):
+        first = {"b": [1, 2.5, None], "a": {"y": True, "x": "é"}}
+        second = {"a": {"x": "é", "y": True}, "b": [1, 2.5, None]}
+        self.assertEqual(canonical_bytes(first), canonical_bytes(second))
+        self.assertEqual(
+            '{"a":{"x":"é","y":true},"b":[1,2.5,null]}'.encode(),
+            canonical_bytes(first),
+        )
+
+    def test_response_hash_versions(self):
+        response = {"url": "http://localhost", "body": {"id": 1}, "status_code": 200}
+        # Version 1 hashes are unchanged, so older results stay comparable
+        self.assertEqual(hash_object(response), hash_response(response, 1))
+        self.assertEqual(1, get_hash_version(hash_response(response, 1)))
+
+        response_hash = hash_response(response, 2)
+        self.assertTrue(response_hash.startswith("2:"))
+        self.assertEqual(2, get_hash_version(response_hash))
+        reordered = {"status_code": 200, "body": {"id": 1}, "url": "http://localhost"}
+        self.assertEqual(response_hash, hash_response(reordered, 2))
+
+    def test_canonical_bytes_normalize_numbers(self):
+        self.assertEqual(
+            canonical_bytes({"a": 1, "b": [2, 2.5]}),
+            canonical_bytes({"a": 1.0, "b": (2.0, 2.5)}),
+        )
+        self.assertEqual(b"100000000000000000000", canonical_bytes(1e20))
+        for number in [float("nan"), float("inf"), -float("inf")]:
+            with self.assertRaises(ValueError):
+                canonical_bytes({"a": [number]})
+        with self.assertRaises(TypeError):
+            canonical_bytes({"a": object()})
+
+    def test_canonical_bytes_only_normalize_numbers_outside_of_strings(self):
+        self.assertEqual(
+            b'{"a":[-3,0,0.05,10.5,15000000000000000,1e-05],"b":"1.0, 2e+3","c":"\\"1.0,"}',
+            canonical_bytes(
+                {
+                    "c": '"1.0,',
+                    "b": "1.0, 2e+3",
+                    "a": [-3.0, -0.0, 0.05, 10.5, 1.5e16, 1e-05],
+                }
+            ),
+        )
+        # Without a float that has to be normalized, the JSON is kept as the encoder wrote it
+        self.assertEqual(b'{"a":"1.0"}', canonical_bytes({"a": "1.0"}))
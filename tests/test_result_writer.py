@@ -0,0 +1,183 @@
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.common.database.database_base import Base
+from src.common.database.result import Result
+from src.common.database.test_run import TestRun  # noqa, for the foreign key of results
+from src.common.database.validation_result import ValidationResult
+from src.common.test_result.test_result import TestResult
+from src.mutator import consumer
+from src.mutator.generator.test import Test as MutatorTest
+from src.mutator.common.utils.persistent_queue.ack_tracker import AckTracker
+from src.mutator.result_processor.service import result_processor_service
+from src.mutator.result_processor.service import result_writer as result_writer_module
+from src.mutator.result_processor.service.result_writer import ResultWriter
+from src.mutator.runner.request.generic_request import GenericRequest
+from src.mutator.runner.response.generic_response import GenericResponse
+
+
+def create_test_result(sequence: int, response_body=None) -> TestResult:
+    test_result = TestResult()
+    test_result.test_run_id = 1
+    test_result.test_type = "REPLACE_BODY_VALUE"
+    test_result.test_value = str(sequence)
+    test_result.retries = 0
+    request = GenericRequest()
+    request.hash = str(sequence)
+    request.method = "POST"
+    request.headers = {}
+    request.url = f"http://localhost/{sequence}"
+    request.body = {"value": sequence}
+    test_result.request = request
+    response = GenericResponse()
+    response.hash = None
+    response.headers = {}
+    response.body = response_body or {"sequence": sequence}
+    response.status_code = 200
+    test_result.response = response
+    validation = ValidationResult()
+    validation.type = "StatusCode"
+    validation.passed = sequence != 2
+    validation.message = "Passed"
+    test_result.validations = [validation]
+    return test_result
+
+
+@patch.object(result_writer_module, "result_writer_batch_size", 3)
+class Test(TestCase):
+    def setUp(self):
+        # One connection, so the writer thread sees the same in memory database
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(engine)
+        self.scoped_session = scoped_session(sessionmaker(bind=engine))
+
+    def write(self, result_writer: ResultWriter, test_results) -> None:
+        result_writer_thread = threading.Thread(target=result_writer.write_results)
+        result_writer_thread.start()
+        for sequence, test_result in test_results:
+            result_writer.put(test_result, sequence)
+        result_writer.close()
+        result_writer_thread.join()
+
+    def test_writes_results_in_batches_and_acks_once_committed(self):
+        ack_tracker = AckTracker()
+        for sequence in range(1, 8):
+            ack_tracker.start(sequence)
+        result_writer = ResultWriter(self.scoped_session, ack_tracker)
+
+        with patch.object(
+            result_processor_service,
+            "persist_test_results",
+            wraps=result_processor_service.persist_test_results,
+        ) as persist_test_results:
+            self.write(
+                result_writer,
+                [(sequence, create_test_result(sequence)) for sequence in range(1, 8)],
+            )
+
+        self.assertEqual(
+            [3, 3, 1],
+            [len(call.args[0]) for call in persist_test_results.call_args_list],
+        )
+        self.assertEqual(7, ack_tracker.checkpoint)
+        self.assertEqual(7, result_writer.written_counter)
+        with self.scoped_session() as session:
+            results = session.query(Result).order_by(Result.id).all()
+            self.assertEqual(
+                [str(sequence) for sequence in range(1, 8)],
+                [result.request_hash for result in results],
+            )
+            for result in results:
+                self.assertEqual(1, len(result.validations))
+                self.assertEqual(result.request_hash != "2", result.passed)
+
+    def test_a_result_that_cannot_be_written_does_not_lose_its_batch(self):
+        ack_tracker = AckTracker()
+        for sequence in range(1, 4):
+            ack_tracker.start(sequence)
+        result_writer = ResultWriter(self.scoped_session, ack_tracker)
+
+        self.write(
+            result_writer,
+            [
+                (1, create_test_result(1)),
+                (2, create_test_result(2, {"not_json": object()})),
+                (3, create_test_result(3)),
+            ],
+        )
+
+        # The result that could not be written is not acked, so a resumed test run runs it again
+        self.assertEqual(1, ack_tracker.checkpoint)
+        self.assertEqual({3}, ack_tracker.finished)
+        with self.scoped_session() as session:
+            self.assertEqual(
+                ["1", "3"],
+                [
+                    result.request_hash
+                    for result in session.query(Result).order_by(Result.id)
+                ],
+            )
+
+    def test_skipped_results_are_acked_without_being_written(self):
+        ack_tracker = AckTracker()
+        for sequence in range(1, 4):
+            ack_tracker.start(sequence)
+        result_writer = ResultWriter(self.scoped_session, ack_tracker)
+
+        result_writer.skip(1)
+        self.write(result_writer, [(2, create_test_result(2))])
+        result_writer.skip(3)
+
+        self.assertEqual(3, ack_tracker.checkpoint)
+        self.assertEqual(1, result_writer.written_counter)
+
+    @patch.object(
+        result_processor_service,
+        "validate_test_result",
+        side_effect=ValueError("invalid"),
+    )
+    def test_consumers_ack_results_they_do_not_hand_to_the_writer(self, _):
+        ack_tracker = AckTracker()
+        tests = []
+        for sequence in range(1, 3):
+            ack_tracker.start(sequence)
+            test = MutatorTest()
+            test.test_run_id = 1
+            test.test_value = str(sequence)
+            test.test_type = "REPLACE_BODY_VALUE"
+            test.test_hash = str(sequence)
+            test.method = "POST"
+            test.headers = {}
+            test.url = f"http://localhost/{sequence}"
+            test.body = {"value": sequence}
+            test.sequence = sequence
+            tests.append(test)
+        result_writer = ResultWriter(self.scoped_session, ack_tracker)
+
+        # No test result, and a test result that could not be validated
+        self.assertFalse(
+            consumer.process_test_result(
+                tests[0], None, None, self.scoped_session, result_writer
+            )
+        )
+        self.assertFalse(
+            consumer.process_test_result(
+                tests[1],
+                create_test_result(2),
+                None,
+                self.scoped_session,
+                result_writer,
+            )
+        )
+
+        self.assertEqual(2, ack_tracker.checkpoint)
+        self.assertTrue(result_writer.result_queue.empty())
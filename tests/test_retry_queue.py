@@ -0,0 +1,159 @@
+import threading
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from queue import Queue
+from threading import Event
+from unittest.mock import patch
+
+from src.mutator import async_consumer, consumer
+from src.mutator.runner import retry_queue
+from src.mutator.runner.retry_queue import (
+    RetryQueue,
+    get_retry_delay,
+    parse_retry_after,
+)
+from tests.consumer_test_server import (
+    ConsumerServerTestCase,
+    JsonHandler,
+    create_test,
+    fill_queue,
+)
+
+
+class ThrottlingHandler(JsonHandler):
+    # Answers the first request to every path with a 429, or every request if the path starts with /always
+    lock = threading.Lock()
+    throttled_paths = set()
+
+    def do_POST(self):
+        self.read_body()
+        with ThrottlingHandler.lock:
+            throttle = (
+                self.path.startswith("/always")
+                or self.path not in ThrottlingHandler.throttled_paths
+            )
+            ThrottlingHandler.throttled_paths.add(self.path)
+        if throttle:
+            self.send_json(429, {"Retry-After": "0"})
+        else:
+            self.send_json()
+
+
+class Test(ConsumerServerTestCase):
+    handler = ThrottlingHandler
+
+    def setUp(self):
+        ThrottlingHandler.throttled_paths = set()
+        super().setUp()
+
+    def test_parse_retry_after(self):
+        self.assertEqual(120, parse_retry_after("120"))
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        self.assertAlmostEqual(
+            30, parse_retry_after(format_datetime(retry_at, usegmt=True)), delta=2
+        )
+
+    @patch.object(retry_queue, "retry_after_max_seconds", 60)
+    @patch.object(retry_queue, "retry_backoff_max_seconds", 10)
+    def test_retry_delay(self):
+        self.assertEqual(5, get_retry_delay(1, 5))
+        self.assertEqual(60, get_retry_delay(1, 3600))
+        self.assertLessEqual(get_retry_delay(2), 4)
+        self.assertLessEqual(get_retry_delay(8), 10)
+
+    def test_retries_are_popped_once_due_in_order(self):
+        retries = RetryQueue()
+        later = create_test("later")
+        retries.schedule(later, 0.2)
+        first = create_test("first")
+        retries.schedule(first, 0)
+        self.assertIs(first, retries.pop_due())
+        self.assertIsNone(retries.pop_due())
+        self.assertLessEqual(retries.seconds_until_due(5), 0.2)
+        retries.wait(5)
+        self.assertIs(later, retries.pop_due())
+        self.assertEqual(0, len(retries))
+
+    @patch.object(consumer, "process_test_result")
+    def test_consumers_retry_throttled_tests(self, process_test_result):
+        paths = [f"/{i}" for i in range(10)]
+        worker_queue = fill_queue(self.url, paths, 2)
+        retries = RetryQueue()
+        stop_threads = Event()
+        threads = [
+            threading.Thread(
+                target=consumer.consumer,
+                args=(worker_queue, 5, {}, stop_threads, None),
+                kwargs={"retry_queue": retries},
+            )
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        tests = [call.args[0] for call in process_test_result.call_args_list]
+        self.assertEqual(
+            {f"{self.url}{path}" for path in paths}, {test.url for test in tests}
+        )
+        self.assertEqual({1}, {test.retries for test in tests})
+        self.assertEqual(0, len(retries))
+
+    @patch.object(consumer, "process_test_result")
+    def test_consumer_waits_for_retries_of_tests_other_consumers_run(
+        self, process_test_result
+    ):
+        # The worker queue has no more tests for now, while another consumer is still running a test
+        worker_queue = Queue()
+        retries = RetryQueue()
+        retries.start()
+        test = create_test(f"{self.url}/retried")
+        stop_threads = Event()
+
+        def fail_with_retry():
+            if not stop_threads.wait(0.5):
+                retries.schedule(test, 0)
+
+        other_consumer = threading.Thread(target=fail_with_retry)
+        other_consumer.start()
+        consumer.consumer(
+            worker_queue, 0.1, {}, stop_threads, None, retry_queue=retries
+        )
+        other_consumer.join()
+
+        self.assertEqual(
+            [test], [call.args[0] for call in process_test_result.call_args_list]
+        )
+        self.assertFalse(retries.has_pending())
+
+    @patch.object(retry_queue, "retry_max_retries", 2)
+    @patch.object(consumer, "process_test_result")
+    def test_test_out_of_retries_stops_the_test_run(self, process_test_result):
+        test = create_test(f"{self.url}/always")
+        worker_queue = Queue()
+        worker_queue.put(test)
+        worker_queue.put(None)
+        stop_threads = Event()
+
+        consumer.consumer(worker_queue, 5, {}, stop_threads, None)
+
+        self.assertTrue(stop_threads.is_set())
+        self.assertEqual(2, test.retries)
+        process_test_result.assert_not_called()
+
+    @patch.object(async_consumer, "process_test_result")
+    def test_async_consumer_retries_throttled_tests(self, process_test_result):
+        paths = [f"/{i}" for i in range(10)]
+
+        async_consumer.async_consumer(
+            fill_queue(self.url, paths, 1), 5, {}, Event(), None
+        )
+
+        tests = [call.args[0] for call in process_test_result.call_args_list]
+        self.assertEqual(
+            {f"{self.url}{path}" for path in paths}, {test.url for test in tests}
+        )
+        self.assertEqual({1}, {test.retries for test in tests})
@@ -0,0 +1,90 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from src.mutator.common.utils.persistent_queue.dao.queue_item import QueueItem
+from src.mutator.common.utils.persistent_queue.segment_file_queue import (
+    SegmentFileQueue,
+)
+
+
+def create_queue_item(test_hash: str) -> QueueItem:
+    queue_item = QueueItem()
+    queue_item.test_run_id = 1
+    queue_item.test_hash = test_hash
+    queue_item.test = {"test_hash": test_hash, "url": "http://localhost/" + test_hash}
+    return queue_item
+
+
+class Test(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create_queue(self, max_segment_bytes=1024) -> SegmentFileQueue:
+        return SegmentFileQueue(1, self.directory.name, max_segment_bytes)
+
+    def test_pop_in_push_order_across_segments(self):
+        segment_queue = self.create_queue()
+        segment_queue.push_batch([create_queue_item(str(i)) for i in range(50)])
+        segment_queue.push_batch([create_queue_item(str(i)) for i in range(50, 60)])
+        self.assertGreater(len(segment_queue.list_segments()), 1)
+        self.assertEqual(60, segment_queue.size())
+
+        queue_items = segment_queue.pop(25) + segment_queue.pop(100)
+        self.assertEqual(
+            [str(i) for i in range(60)], [i.test_hash for i in queue_items]
+        )
+        self.assertEqual(list(range(1, 61)), [i.sequence for i in queue_items])
+        self.assertEqual(
+            {"test_hash": "7", "url": "http://localhost/7"}, queue_items[7].test
+        )
+        self.assertEqual([], segment_queue.pop(10))
+
+    def test_ack_removes_done_segments_and_new_queue_continues_from_checkpoint(self):
+        segment_queue = self.create_queue()
+        segment_queue.push_batch([create_queue_item(str(i)) for i in range(60)])
+        segment_count = len(segment_queue.list_segments())
+        segment_queue.ack(segment_queue.pop(40))
+        segment_queue.pop(5)
+        self.assertEqual(20, segment_queue.size())
+        self.assertLess(len(segment_queue.list_segments()), segment_count)
+
+        # Tests that were popped but not acked are read again
+        segment_queue = self.create_queue()
+        self.assertEqual(20, segment_queue.size())
+        queue_items = segment_queue.pop(100)
+        self.assertEqual(
+            [str(i) for i in range(40, 60)], [i.test_hash for i in queue_items]
+        )
+        segment_queue.push_batch([create_queue_item("60")])
+        self.assertEqual(["60"], [i.test_hash for i in segment_queue.pop(10)])
+        self.assertEqual(61, segment_queue.tail_sequence)
+
+        segment_queue.ack_up_to(61)
+        self.assertEqual(0, segment_queue.size())
+        self.assertFalse(os.path.exists(segment_queue.get_run_directory()))
+
+    def test_partly_written_test_is_removed(self):
+        segment_queue = self.create_queue(max_segment_bytes=1024 * 1024)
+        segment_queue.push_batch([create_queue_item(str(i)) for i in range(3)])
+        segment_path = segment_queue.get_segment_path(1)
+        with open(segment_path, "ab") as segment_file:
+            segment_file.write(b"\x00\x00\x01\x00partly")
+
+        segment_queue = self.create_queue()
+        self.assertEqual(3, segment_queue.size())
+        segment_queue.push_batch([create_queue_item("3")])
+        queue_items = segment_queue.pop(10)
+        self.assertEqual(["0", "1", "2", "3"], [i.test_hash for i in queue_items])
+
+    def test_remove_all(self):
+        segment_queue = self.create_queue()
+        segment_queue.push_batch([create_queue_item(str(i)) for i in range(10)])
+        segment_queue.remove_all()
+        self.assertEqual(0, segment_queue.size())
+        self.assertFalse(os.path.exists(segment_queue.get_run_directory()))
+        segment_queue.push_batch([create_queue_item("0")])
+        self.assertEqual([1], [i.sequence for i in segment_queue.pop(10)])
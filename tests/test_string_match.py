@@ -0,0 +1,122 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.common.test_result.test_result import TestResult
+from src.mutator.result_processor.validations import string_match as string_match_module
+from src.mutator.result_processor.validations.string_match import (
+    StringMatch,
+    message_max_length,
+)
+from src.mutator.runner.response.generic_response import GenericResponse
+
+config = {
+    "match_strings": ["SQL", "SQLSTATE", "internal.example.corp", "Traceback"],
+    "match_patterns": [r"ORA-\d{5}", r"\w+Exception", "[unterminated"],
+}
+raw_body = (
+    b'{"error": "SQLSTATE[42000] at db.internal.example.corp", '
+    b'"cause": "java.lang.NullPointerException", "code": "ORA-00942"}'
+)
+
+
+def create_test_result(raw_body: bytes = None, body=None) -> TestResult:
+    test_result = TestResult()
+    response = GenericResponse()
+    response.raw_body = raw_body
+    response.body = body
+    test_result.response = response
+    return test_result
+
+
+class Test(TestCase):
+    def test_reports_every_match_string_and_pattern_found(self):
+        for trie_min_match_strings in [256, 0]:
+            with self.subTest(trie_min_match_strings=trie_min_match_strings):
+                with patch.object(
+                    string_match_module,
+                    "trie_min_match_strings",
+                    trie_min_match_strings,
+                ):
+                    string_match = StringMatch(config)
+                validation = string_match.validate(create_test_result(raw_body))
+                self.assertFalse(validation.passed)
+                self.assertEqual(
+                    "String found in response body: SQL, SQLSTATE, internal.example.corp, "
+                    "ORA-\\d{5}, \\w+Exception",
+                    validation.message,
+                )
+
+    def test_passes_if_nothing_is_found(self):
+        validation = StringMatch(config).validate(create_test_result(b'{"id": 1}'))
+        self.assertTrue(validation.passed)
+        self.assertEqual(
+            "None of 6 match strings found in response body.", validation.message
+        )
+
+    def test_ignores_case(self):
+        for trie_min_match_strings in [256, 0]:
+            with patch.object(
+                string_match_module, "trie_min_match_strings", trie_min_match_strings
+            ):
+                string_match = StringMatch(
+                    {
+                        "match_strings": ["Traceback", "sqlstate"],
+                        "match_patterns": ["ora-\\d+"],
+                        "ignore_case": True,
+                    }
+                )
+            self.assertEqual(
+                ["Traceback", "sqlstate", "ora-\\d+"],
+                string_match.find(b"TRACEBACK SqlState ORA-1"),
+            )
+
+    def test_finds_overlapping_match_strings_and_patterns(self):
+        for trie_min_match_strings in [256, 0]:
+            with self.subTest(trie_min_match_strings=trie_min_match_strings):
+                with patch.object(
+                    string_match_module,
+                    "trie_min_match_strings",
+                    trie_min_match_strings,
+                ):
+                    string_match = StringMatch(
+                        {
+                            "match_strings": ["abc", "bcd", "cdx"],
+                            "match_patterns": ["a.c", "b.d", "d+x"],
+                        }
+                    )
+                self.assertEqual(
+                    ["abc", "bcd", "cdx", "a.c", "b.d", "d+x"],
+                    string_match.find(b"xxabcdxx"),
+                )
+
+    def test_single_match_string_in_parsed_body(self):
+        string_match = StringMatch({"match_string": "test"})
+        validation = string_match.validate(create_test_result(body={"name": "test"}))
+        self.assertFalse(validation.passed)
+        self.assertEqual("String found in response body: test", validation.message)
+
+    def test_message_fits_the_database_when_many_strings_are_found(self):
+        match_strings = [f"error-{i:03d}" for i in range(100)]
+        string_match = StringMatch({"match_strings": match_strings})
+
+        validation = string_match.validate(
+            create_test_result(" ".join(match_strings).encode())
+        )
+
+        self.assertFalse(validation.passed)
+        self.assertLessEqual(len(validation.message), message_max_length)
+        self.assertTrue(
+            validation.message.startswith(
+                "String found in response body: error-000, error-001, "
+            )
+        )
+        shown = validation.message.count("error-")
+        self.assertTrue(validation.message.endswith(f", and {100 - shown} more"))
+
+        long_string = "x" * 300
+        validation = StringMatch({"match_string": long_string}).validate(
+            create_test_result(long_string.encode())
+        )
+        self.assertEqual(
+            "String found in response body: and 1 more", validation.message
+        )
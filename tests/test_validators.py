@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+from src.common.test_result.test_result import TestResult
+from src.mutator.result_processor.service import result_processor_service
+from src.mutator.result_processor.validations.regression import Regression
+from src.mutator.result_processor.validations.status_code import StatusCode
+from src.mutator.runner.response.generic_response import GenericResponse
+
+
+def create_test_result(status_code: int, body) -> TestResult:
+    test_result = TestResult()
+    response = GenericResponse()
+    response.status_code = status_code
+    response.body = body
+    response.elapsed_time = 0.1
+    test_result.response = response
+    return test_result
+
+
+class Test(TestCase):
+    def test_validators_are_built_once_and_validate_every_result(self):
+        validators = result_processor_service.build_validators(
+            {
+                "StatusCode": {"enabled": True, "invalid_status_codes": [401]},
+                "StringMatch": {"enabled": True, "match_string": "Traceback"},
+                "ElapsedTime": {"enabled": False},
+                "Regression": {"enabled": True},
+                "LatencyOutlier": {"enabled": False},
+            }
+        )
+        self.assertEqual(
+            ["StatusCode", "StringMatch"],
+            sorted(type(validator).__name__ for validator in validators.validators),
+        )
+        self.assertIsInstance(validators.regression, Regression)
+
+        passing = create_test_result(200, {"id": 1})
+        failing = create_test_result(401, "Traceback (most recent call last)")
+        for test_result in [passing, failing, passing]:
+            result_processor_service.validate_test_result(test_result, validators)
+
+        self.assertTrue(all(v.passed for v in passing.validations))
+        self.assertEqual(
+            {"StatusCode": False, "StringMatch": False},
+            {v.type: v.passed for v in failing.validations},
+        )
+
+    def test_unconfigured_validators_are_enabled_with_an_empty_config(self):
+        validators = result_processor_service.build_validators({})
+        self.assertIsNone(validators.regression)
+        status_code = [v for v in validators.validators if isinstance(v, StatusCode)]
+        self.assertEqual(1, len(status_code))
+        self.assertEqual(frozenset(), status_code[0].invalid_status_codes)
@@ -1,6 +1,37 @@
+import json
+import os
+import pathlib
+from queue import Queue
+from threading import Event
 from unittest import TestCase
+from unittest.mock import MagicMock, patch
 
-from src.mutator.worker_loop import update_config
+from src.common.database.test_run import TestRun
+from src.mutator.common.test_value_storage.test_repository import TestRepository
+from src.mutator.common.utils.persistent_queue.buffer_queues.queue_reader import (
+    QueueReader,
+)
+from src.mutator.common.utils.persistent_queue.buffer_queues import (
+    queue_writer as queue_writer_module,
+)
+from src.mutator.common.utils.persistent_queue.buffer_queues.queue_writer import (
+    QueueWriter,
+)
+from src.mutator.common.utils.persistent_queue.buffer_queues.stream_writer import (
+    StreamWriter,
+)
+from src.mutator.common.utils.persistent_queue.dao.queue_item import QueueItem
+from src.mutator.generator import generator
+from src.common.state.states import State
+from src.mutator.worker_loop import (
+    update_config,
+    should_stream_tests,
+    should_resume_test_run,
+)
+
+base_config_dir = (
+    pathlib.Path(os.path.abspath(__file__)).parents[0].__str__() + "/config"
+)
 
 
 class Test(TestCase):
@@ -49,3 +80,119 @@ class Test(TestCase):
         new_config = update_config(override_config, default_config, "hash_generation")
         self.assertEqual(["id", "date"], new_config.get("field_names"))
         self.assertEqual("ALL", new_config.get("strategy"))
+
+    def test_should_stream_tests_default_config(self):
+        test_run = TestRun()
+        test_run.config = None
+        self.assertFalse(should_stream_tests(test_run))
+
+    def test_should_stream_tests_test_run_override(self):
+        test_run = TestRun()
+        test_run.config = {"streaming": True}
+        self.assertTrue(should_stream_tests(test_run))
+
+    @patch.object(StreamWriter, "update_progress", MagicMock())
+    def test_stream_writer_closes_consumers(self):
+        worker_queue = Queue(maxsize=10)
+        stream_writer = StreamWriter(worker_queue, Event(), 1, None)
+        queue_item = QueueItem()
+        queue_item.test = {"test_run_id": 1, "test_hash": "1234"}
+        stream_writer.put(queue_item)
+        stream_writer.close(2)
+        self.assertEqual("1234", worker_queue.get().test_hash)
+        self.assertIsNone(worker_queue.get())
+        self.assertIsNone(worker_queue.get())
+        self.assertEqual(1, stream_writer.progress_counter)
+
+    def test_compact_queue_item_builds_same_test(self):
+        test_run = TestRun()
+        test_run.id = 1
+        test_run.endpoint = {
+            "method": "POST",
+            "headers": {"Content-Type": "application/json"},
+            "url": "http://localhost:8010/v1/results?query=parameter&queryArray=1,2,3",
+            "body": {"modifiers": [1, 2, 3], "nested": {"name": "x"}},
+        }
+        test_repository = TestRepository(base_config_dir, "/test_config.json")
+        queue = Queue()
+        generator.generate(test_repository, test_run, queue)
+
+        queue_writer = QueueWriter(Queue(), None, Event(), test_run.id)
+        queue_reader = QueueReader(
+            None, None, Event(), test_run.id, None, test_run.endpoint
+        )
+        while not queue.empty():
+            queue_item: QueueItem = queue.get()
+            expected_test = dict(queue_item.test)
+            queue_writer.compact_queue_item(queue_item)
+            self.assertNotIn("body", queue_item.test)
+            # Stored as JSON in the test queue
+            queue_item.test = json.loads(json.dumps(queue_item.test))
+            expected_test["sequence"] = queue_item.sequence
+            self.assertEqual(
+                expected_test, queue_reader.create_test(queue_item).__dict__
+            )
+
+    def test_queue_writer_writes_last_batch_on_close(self):
+        persistent_queue = MagicMock()
+        buffer_queue = Queue(maxsize=10)
+        queue_writer = QueueWriter(buffer_queue, persistent_queue, Event(), 1)
+        for i in range(3):
+            queue_item = QueueItem()
+            queue_item.test = {"test_hash": str(i)}
+            buffer_queue.put(queue_item)
+        queue_writer.close()
+        queue_writer.write_queue()
+        self.assertEqual(3, queue_writer.progress_counter)
+        written = [
+            queue_item.test["test_hash"]
+            for call in persistent_queue.push_batch.call_args_list
+            for queue_item in call.args[0]
+        ]
+        self.assertEqual(["0", "1", "2"], written)
+
+    @patch.object(queue_writer_module, "worker_queue_batch_write_interval_seconds", 0)
+    def test_queue_writer_retries_and_fails_when_a_batch_cannot_be_written(self):
+        persistent_queue = MagicMock()
+        # Fails once, then for good
+        persistent_queue.push_batch.side_effect = [Exception("locked"), None] + [
+            Exception("locked")
+        ] * queue_writer_module.PUSH_BATCH_ATTEMPTS
+        buffer_queue = Queue()
+        queue_writer = QueueWriter(buffer_queue, persistent_queue, Event(), 1)
+        for i in range(2):
+            queue_item = QueueItem()
+            queue_item.test = {"test_hash": str(i)}
+            queue_writer.write_batch([queue_item])
+        self.assertEqual(1, queue_writer.progress_counter)
+        self.assertTrue(queue_writer.failed)
+
+        # Tests generated after the failure are taken from the buffer queue, not written
+        buffer_queue.put(QueueItem())
+        queue_writer.close()
+        queue_writer.write_queue()
+        self.assertTrue(buffer_queue.empty())
+        self.assertEqual(
+            2 + queue_writer_module.PUSH_BATCH_ATTEMPTS,
+            persistent_queue.push_batch.call_count,
+        )
+
+    def test_should_resume_test_run(self):
+        test_run = TestRun()
+        test_run.state = State.RUNNING.value
+        test_run.config = {}
+        persistent_queue = MagicMock()
+        persistent_queue.size.return_value = 5
+        self.assertTrue(should_resume_test_run(test_run, persistent_queue))
+
+        # Nothing left to run, or generation never finished
+        persistent_queue.size.return_value = 0
+        self.assertFalse(should_resume_test_run(test_run, persistent_queue))
+        persistent_queue.size.return_value = 5
+        test_run.state = State.GENERATING.value
+        self.assertFalse(should_resume_test_run(test_run, persistent_queue))
+
+        # Streamed tests are not persisted, so streamed test runs start over
+        test_run.state = State.RUNNING.value
+        test_run.config = {"streaming": True}
+        self.assertFalse(should_resume_test_run(test_run, persistent_queue))